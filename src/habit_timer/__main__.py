@@ -1,5 +1,30 @@
-from habit_timer.main import main
+import sys
+
+# 这些参数开头时走命令行界面（habit_timer.cli），不导入 Toga
+CLI_OPTIONS = ("-h", "--help", "--db", "--json")
+
+
+def wants_cli(argv) -> bool:
+    """第一个参数是子命令或命令行选项时使用命令行界面；macOS 传入的 -psn_ 等参数仍启动图形界面。"""
+    if len(argv) < 2:
+        return False
+    first = argv[1]
+    return not first.startswith("-") or first in CLI_OPTIONS or first.startswith("--db=")
+
 
 if __name__ == '__main__':
+    if wants_cli(sys.argv):
+        from habit_timer.cli import main as cli_main
+
+        sys.exit(cli_main(sys.argv[1:]))
+
+    # 最先导入计时模块，把它的导入时刻作为启动计时的起点
+    from habit_timer.utils.profiling import profiler
+
+    if "--profile-startup" in sys.argv:
+        sys.argv.remove("--profile-startup")
+        profiler.enable()
+    with profiler.phase("import main"):
+        from habit_timer.main import main
     app = main()
-    app.main_loop()
\ No newline at end of file
+    app.main_loop()
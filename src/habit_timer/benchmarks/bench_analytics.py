@@ -0,0 +1,108 @@
+"""全部习惯统计指标的耗时基准。
+
+用法：python -m habit_timer.benchmarks.bench_analytics [--habits 1000] [--days 3650] [--db PATH]
+
+对比逐个习惯的旧做法（compute_streaks + 每个窗口一次 recent_completion_stats，
+每周达标逐周查询记录）与 AnalyticsService 的纯 Python、NumPy 两种实现。
+"""
+
+import argparse
+import datetime as dt
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+from ..domain.models import Habit
+from ..repository.database import Database
+from ..repository.habit_repository import HabitRepository
+from ..repository.record_repository import HabitRecordRepository
+from ..service import analytics
+from ..service.analytics import DEFAULT_WEEKS, DEFAULT_WINDOWS, AnalyticsService
+from ..service.habit_service import HabitService
+from ..utils import dates
+
+
+def populate(path: Path, habits: int, days: int) -> None:
+    db = Database(path, profile="bulk")
+    habit_repo = HabitRepository(db)
+    rng = random.Random(42)
+    today = dates.today_date()
+    first = today - dt.timedelta(days=days - 1)
+    stamp = dt.datetime(2024, 1, 1, 8, 0).isoformat()
+    ids = [
+        habit_repo.create(Habit(id=None, name=f"habit-{i}", target_per_week=rng.randint(1, 7))).id
+        for i in range(habits)
+    ]
+    with db.transaction() as conn:
+        conn.execute("UPDATE habits SET created_at=?", (first.isoformat(),))
+        for habit_id in ids:
+            p = rng.uniform(0.3, 0.95)
+            conn.executemany(
+                "INSERT INTO habit_records(habit_id, date, is_completed, note, recorded_at) VALUES(?, ?, ?, '', ?)",
+                (
+                    (habit_id, (first + dt.timedelta(days=d)).isoformat(), rng.random() < p, stamp)
+                    for d in range(days)
+                ),
+            )
+    db.close()
+    # 流水式写入绕过了缓存维护，统一重建一次
+    db = Database(path)
+    HabitRecordRepository(db).rebuild_caches()
+    db.close()
+
+
+def per_habit(service: HabitService, record_repo: HabitRecordRepository) -> int:
+    """改造前的做法：每个习惯、每个窗口、每一周分别查询。"""
+    today = dates.today_date()
+    this_monday = today - dt.timedelta(days=today.weekday())
+    habits = service.list_habits()
+    for habit in habits:
+        service.compute_streaks(habit.id)
+        for days in DEFAULT_WINDOWS:
+            service.recent_completion_stats(habit.id, days)
+        for i in range(DEFAULT_WEEKS, 0, -1):
+            monday = this_monday - dt.timedelta(weeks=i)
+            records = record_repo.fetch_record_tuples(habit.id, monday, monday + dt.timedelta(days=6))
+            sum(r.is_completed for r in records) >= habit.target_per_week
+    return len(habits)
+
+
+def timed(label: str, run: Callable[[], int], repeat: int) -> None:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = run()
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<36} {best * 1000:9.1f} ms {best / max(count, 1) * 1e6:9.1f} µs/习惯")
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--habits", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=3650)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--db", type=Path, help="复用已生成的数据库；不存在时自动生成")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.db or Path(tmp) / "bench.db"
+        if not path.exists():
+            populate(path, args.habits, args.days)
+        db = Database(path)
+        habit_repo = HabitRepository(db)
+        record_repo = HabitRecordRepository(db)
+        service = AnalyticsService(habit_repo, record_repo)
+        print(f"== {args.habits} 个习惯 × {args.days} 天，窗口 {DEFAULT_WINDOWS}，最近 {DEFAULT_WEEKS} 周 ==")
+        timed("旧：逐个习惯查询", lambda: per_habit(HabitService(habit_repo, record_repo), record_repo), args.repeat)
+        timed("AnalyticsService（纯 Python）", lambda: len(service.compute(use_numpy=False)), args.repeat)
+        if analytics.np is not None:
+            timed("AnalyticsService（NumPy）", lambda: len(service.compute(use_numpy=True)), args.repeat)
+        else:
+            print("未安装 NumPy，跳过向量化实现")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""模型与记录读取路径的内存/耗时基准。
+
+用法：python -m habit_timer.benchmarks.bench_models [--rows 1000000] [--db PATH]
+
+对比三种记录表示：旧版普通 dataclass（带 __dict__）、当前的 slots dataclass、RecordTuple；
+并在 --rows 行的数据库上对比旧版读取方式（sqlite3.Row + 全字段解析）与当前各读取路径。
+"""
+
+import argparse
+import dataclasses
+import datetime as dt
+import gc
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Optional
+
+from ..domain.models import Habit, HabitRecord, RecordTuple
+from ..repository.database import Database
+from ..repository.habit_repository import HabitRepository
+from ..repository.record_repository import HabitRecordRepository
+
+
+@dataclasses.dataclass
+class LegacyHabitRecord:
+    """改造前的 HabitRecord 定义（无 __slots__），仅用于对照。"""
+
+    id: Optional[int]
+    habit_id: int
+    date: dt.date
+    is_completed: bool
+    note: str = ""
+    recorded_at: dt.datetime = dataclasses.field(default_factory=lambda: dt.datetime.now(dt.timezone.utc))
+
+
+def measure(label: str, build: Callable[[], list], rows: int) -> None:
+    """报告构造耗时与保留内存（tracemalloc 统计，含日期等字段对象）。"""
+    gc.collect()
+    start = time.perf_counter()
+    items = build()
+    elapsed = time.perf_counter() - start
+    del items
+    gc.collect()
+    tracemalloc.start()
+    items = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    count = len(items)
+    del items
+    print(f"{label:<44} {elapsed:8.2f} s {elapsed / max(count, 1) * 1e9:8.0f} ns/行 {current / max(count, 1):8.1f} B/行")
+
+
+def construction(rows: int) -> None:
+    print(f"\n== 构造 {rows} 个对象（字段已解析好，只比较容器本身） ==")
+    date = dt.date(2024, 1, 1)
+    stamp = dt.datetime(2024, 1, 1, 8, 0)
+    measure("dataclass（旧，__dict__）", lambda: [LegacyHabitRecord(i, 1, date, True, "", stamp) for i in range(rows)], rows)
+    measure("dataclass(slots=True)", lambda: [HabitRecord(i, 1, date, True, "", stamp) for i in range(rows)], rows)
+    measure("RecordTuple", lambda: [RecordTuple(1, date, True) for _ in range(rows)], rows)
+
+
+def populate(path: Path, rows: int, habits: int = 100) -> None:
+    db = Database(path, profile="bulk")
+    habit_repo = HabitRepository(db)
+    ids = [habit_repo.create(Habit(id=None, name=f"habit-{i}")).id for i in range(habits)]
+    per_habit = rows // habits
+    base = dt.date(2000, 1, 1)
+    stamp = dt.datetime(2024, 1, 1, 8, 0).isoformat()
+    with db.transaction() as conn:
+        for habit_id in ids:
+            conn.executemany(
+                "INSERT INTO habit_records(habit_id, date, is_completed, note, recorded_at) VALUES(?, ?, ?, '', ?)",
+                (
+                    (habit_id, (base + dt.timedelta(days=d)).isoformat(), (d * 7 + habit_id) % 3 != 0, stamp)
+                    for d in range(per_habit)
+                ),
+            )
+    db.close()
+
+
+def legacy_all_records(db: Database) -> list:
+    """改造前 all_by_habit 的读取方式：sqlite3.Row 按列名取值并构造普通 dataclass。"""
+    rows = db.read_cursor().execute("SELECT * FROM habit_records ORDER BY habit_id, date").fetchall()
+    return [
+        LegacyHabitRecord(
+            id=r["id"],
+            habit_id=r["habit_id"],
+            date=dt.date.fromisoformat(r["date"]),
+            is_completed=bool(r["is_completed"]),
+            note=r["note"],
+            recorded_at=dt.datetime.fromisoformat(r["recorded_at"]),
+        )
+        for r in rows
+    ]
+
+
+def read_paths(path: Path, rows: int) -> None:
+    print(f"\n== 读取 {rows} 行打卡记录（含 SQL 与字段解析） ==")
+    db = Database(path)
+    repo = HabitRecordRepository(db)
+    habit_ids = [h.id for h in HabitRepository(db).list_all()]
+    measure("旧：Row + 普通 dataclass", lambda: legacy_all_records(db), rows)
+    measure(
+        "新：all_by_habit（元组行 + slots）",
+        lambda: [r for habit_id in habit_ids for r in repo.all_by_habit(habit_id)],
+        rows,
+    )
+    measure("新：iter_record_tuples（RecordTuple）", lambda: list(repo.iter_record_tuples()), rows)
+    db.close()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--db", type=Path, help="复用已生成的数据库；不存在时自动生成")
+    args = parser.parse_args(argv)
+
+    construction(args.rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.db or Path(tmp) / "bench.db"
+        if not path.exists():
+            populate(path, args.rows)
+        with sqlite3.connect(path) as conn:
+            rows = conn.execute("SELECT COUNT(*) FROM habit_records").fetchone()[0]
+        read_paths(path, rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""可复现的合成数据集。
+
+用法：python -m habit_timer.benchmarks.dataset --size medium [--data-dir DIR] [--seed 42]
+
+数据截止到 end（默认今天，服务层按真实日期统计“今天/本周”）；同一组参数、种子与截止日期总是生成相同的数据，
+生成结果按这些参数缓存在 data-dir 中，重复运行直接复用。
+"""
+
+import argparse
+import dataclasses
+import datetime as dt
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from ..repository.database import Database
+from ..repository.pomodoro_repository import PomodoroRepository
+from ..repository.record_repository import HabitRecordRepository
+from ..utils import dates
+
+# 每批 executemany 的行数
+INSERT_BATCH = 50_000
+
+
+@dataclasses.dataclass(frozen=True)
+class DatasetSpec:
+    """数据集规模。
+
+    Attributes:
+        name: 预设名。
+        habits: 习惯数。
+        years: 每个习惯的打卡历史年数。
+        pomodoros: 番茄记录数，均匀分布在历史区间内。
+        completion: 每天打卡（有记录）的概率；有记录时约八成为完成。
+    """
+
+    name: str
+    habits: int
+    years: int
+    pomodoros: int
+    completion: float = 0.6
+
+    @property
+    def key(self) -> str:
+        return f"{self.name}-h{self.habits}-y{self.years}-p{self.pomodoros}-c{self.completion}"
+
+
+SIZES: Dict[str, DatasetSpec] = {
+    "small": DatasetSpec("small", habits=10, years=1, pomodoros=10_000),
+    "medium": DatasetSpec("medium", habits=500, years=3, pomodoros=200_000),
+    "large": DatasetSpec("large", habits=5_000, years=10, pomodoros=2_000_000, completion=0.3),
+}
+
+
+def generate(spec: DatasetSpec, path: Path, seed: int = 42, end: Optional[dt.date] = None) -> Path:
+    """在 path 生成截止到 end 的数据集（已存在则先删除），返回 path。
+
+    直接批量写表并推迟二级索引，最后重建派生缓存（连续打卡、位图、周汇总、番茄日汇总）。
+    """
+    path = Path(path)
+    for suffix in ("", "-wal", "-shm"):
+        Path(f"{path}{suffix}").unlink(missing_ok=True)
+    rng = random.Random(seed)
+    end = end or dates.today_date()
+    first_day = end - dt.timedelta(days=365 * spec.years - 1)
+    created_at = dt.datetime.combine(first_day, dt.time(8, 0)).isoformat()
+    recorded_at = dt.datetime.combine(end, dt.time(8, 0)).isoformat()
+    db = Database(path, profile="bulk")
+    db.drop_secondary_indexes()
+    with db.transaction() as conn:
+        conn.executemany(
+            "INSERT INTO habits(id, name, category, target_per_week, enabled, created_at) VALUES(?, ?, ?, ?, 1, ?)",
+            [
+                (i, f"habit-{i}", rng.choice(["健康", "学习", "工作", "其它"]), rng.randint(1, 7), created_at)
+                for i in range(1, spec.habits + 1)
+            ],
+        )
+    days = [(first_day + dt.timedelta(days=d)).isoformat() for d in range((end - first_day).days + 1)]
+    batch = []
+    for habit_id in range(1, spec.habits + 1):
+        # 每个习惯的打卡频率不同，使连续天数与完成率有差异
+        rate = min(0.98, max(0.05, rng.gauss(spec.completion, 0.15)))
+        for day in days:
+            if rng.random() < rate:
+                batch.append((habit_id, day, rng.random() < 0.8, recorded_at))
+        if len(batch) >= INSERT_BATCH:
+            _insert_records(db, batch)
+            batch = []
+    _insert_records(db, batch)
+
+    span = int((dt.datetime.combine(end, dt.time.max) - dt.datetime.combine(first_day, dt.time.min)).total_seconds())
+    base = int(dt.datetime.combine(first_day, dt.time.min, tzinfo=dt.timezone.utc).timestamp())
+    batch = []
+    for _ in range(spec.pomodoros):
+        start = base + rng.randrange(span)
+        seconds = rng.choice((1500, 1500, 1500, 900, 3000))
+        status = "completed" if rng.random() < 0.85 else "aborted"
+        habit_id = rng.randint(1, spec.habits) if rng.random() < 0.7 else None
+        batch.append((habit_id, start, start + seconds, seconds, status))
+        if len(batch) >= INSERT_BATCH:
+            _insert_pomodoros(db, batch)
+            batch = []
+    _insert_pomodoros(db, batch)
+
+    db.create_secondary_indexes()
+    HabitRecordRepository(db).rebuild_caches()
+    PomodoroRepository(db).rebuild_daily()
+    db.connect().execute("ANALYZE")
+    db.close()
+    return path
+
+
+def _insert_records(db: Database, rows) -> None:
+    with db.transaction() as conn:
+        conn.executemany(
+            "INSERT INTO habit_records(habit_id, date, is_completed, note, recorded_at) VALUES(?, ?, ?, '', ?)",
+            rows,
+        )
+
+
+def _insert_pomodoros(db: Database, rows) -> None:
+    utc = dt.timezone.utc
+    with db.transaction() as conn:
+        conn.executemany(
+            """
+            INSERT INTO pomodoro_sessions(
+                habit_id, start_time, end_time, duration_seconds, status, start_epoch, end_epoch
+            ) VALUES(?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                (
+                    habit_id,
+                    dt.datetime.fromtimestamp(start, utc).isoformat(),
+                    dt.datetime.fromtimestamp(end, utc).isoformat(),
+                    seconds,
+                    status,
+                    start,
+                    end,
+                )
+                for habit_id, start, end, seconds, status in rows
+            ),
+        )
+
+
+def ensure_dataset(
+    spec: DatasetSpec, data_dir: Optional[Path] = None, seed: int = 42, end: Optional[dt.date] = None
+) -> Path:
+    """返回数据集文件路径，不存在时生成。data_dir 默认为系统临时目录下的 habit_timer_bench。"""
+    end = end or dates.today_date()
+    data_dir = Path(data_dir or Path(tempfile.gettempdir()) / "habit_timer_bench")
+    data_dir.mkdir(parents=True, exist_ok=True)
+    path = data_dir / f"{spec.key}-s{seed}-{end.isoformat()}.db"
+    if not path.exists():
+        tmp = path.with_name(path.name + ".partial")
+        generate(spec, tmp, seed, end)
+        tmp.replace(path)
+    return path
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", choices=sorted(SIZES), default="small")
+    parser.add_argument("--habits", type=int, help="覆盖预设的习惯数")
+    parser.add_argument("--years", type=int, help="覆盖预设的历史年数")
+    parser.add_argument("--pomodoros", type=int, help="覆盖预设的番茄记录数")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-dir", type=Path)
+    args = parser.parse_args(argv)
+
+    spec = spec_from_args(args)
+    start = time.perf_counter()
+    path = ensure_dataset(spec, args.data_dir, args.seed)
+    print(f"{path} ({path.stat().st_size / 1e6:.1f} MB, {time.perf_counter() - start:.1f} s)")
+
+
+def spec_from_args(args: argparse.Namespace) -> DatasetSpec:
+    """按 --size 预设与 --habits/--years/--pomodoros 覆盖项得到数据集规模。"""
+    spec = SIZES[args.size]
+    overrides = {
+        name: getattr(args, name) for name in ("habits", "years", "pomodoros") if getattr(args, name) is not None
+    }
+    return dataclasses.replace(spec, **overrides) if overrides else spec
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""服务层热点调用的基准套件（无界面）。
+
+用法：
+    python -m habit_timer.benchmarks.suite --size small --output result.json
+    python -m habit_timer.benchmarks.suite --size medium --baseline baseline.json [--threshold 0.2]
+    python -m habit_timer.benchmarks.suite --size medium --baseline baseline.json --save-baseline
+
+在 dataset 生成的数据库上逐次计时每个调用，报告中位数、p95 与均值；指定 --baseline 时按中位数与基线比较，
+有用例变慢超过阈值时以退出码 1 结束，便于在 CI 中使用。
+"""
+
+import argparse
+import dataclasses
+import datetime as dt
+import json
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from ..repository import caching
+from ..repository.config_repository import ConfigRepository
+from ..repository.database import Database
+from ..repository.habit_repository import HabitRepository
+from ..repository.pomodoro_repository import PomodoroRepository
+from ..repository.record_repository import HabitRecordRepository
+from ..service.backup_service import BackupService
+from ..service.event_bus import EventBus
+from ..service.habit_service import HabitService
+from ..service.pomodoro_service import PomodoroService
+from ..service.record_service import HabitRecordService
+from ..utils import dates
+from ..utils.sql_trace import percentile
+from .dataset import SIZES, ensure_dataset, spec_from_args
+
+# 默认的回归阈值：中位数比基线慢 20% 以上视为回归
+DEFAULT_THRESHOLD = 0.2
+
+# 中位数差值低于该毫秒数时不判定回归，避免微秒级调用的计时抖动误报
+MIN_REGRESSION_MS = 0.05
+
+# 结果文件格式版本，结构变化时加一
+RESULT_VERSION = 1
+
+
+@dataclasses.dataclass
+class Case:
+    """一个基准用例。
+
+    Attributes:
+        name: 用例名，与服务方法名一致，也是结果与基线中的键。
+        calls: 一轮中依次计时的调用（例如对抽样的每个习惯调用一次）。
+        passes: 轮数。
+        setup: 每次调用前执行、不计时的准备工作。
+    """
+
+    name: str
+    calls: List[Callable[[], object]]
+    passes: int
+    setup: Optional[Callable[[], None]] = None
+
+
+class Workspace:
+    """基准所用的服务实例及临时文件。"""
+
+    def __init__(self, db_path: Path, work_dir: Path, use_cache: bool = False):
+        self.db = Database(db_path)
+        self.work_dir = work_dir
+        if use_cache:
+            habit_repo = caching.CachingHabitRepository(self.db)
+            record_repo = caching.CachingRecordRepository(self.db)
+            config_repo = caching.CachingConfigRepository(self.db)
+        else:
+            habit_repo = HabitRepository(self.db)
+            record_repo = HabitRecordRepository(self.db)
+            config_repo = ConfigRepository(self.db)
+        pomodoro_repo = PomodoroRepository(self.db)
+        events = EventBus()
+        self.habit_service = HabitService(habit_repo, record_repo, events)
+        self.record_service = HabitRecordService(record_repo, events)
+        self.pomodoro_service = PomodoroService(pomodoro_repo, events)
+        self.backup_service = BackupService(habit_repo, record_repo, pomodoro_repo, config_repo, events)
+        self.export_path = work_dir / "export.json"
+        self.import_path = work_dir / "import.db"
+        self._import_db: Optional[Database] = None
+        self.import_service: Optional[BackupService] = None
+
+    def ensure_export(self) -> None:
+        if not self.export_path.exists():
+            self.backup_service.export_to_file(self.export_path)
+
+    def fresh_import_target(self) -> None:
+        """为导入用例准备空数据库。"""
+        self.ensure_export()
+        if self._import_db is not None:
+            self._import_db.close()
+        for suffix in ("", "-wal", "-shm"):
+            Path(f"{self.import_path}{suffix}").unlink(missing_ok=True)
+        db = self._import_db = Database(self.import_path)
+        self.import_service = BackupService(
+            HabitRepository(db), HabitRecordRepository(db), PomodoroRepository(db), ConfigRepository(db)
+        )
+
+    def close(self) -> None:
+        if self._import_db is not None:
+            self._import_db.close()
+        self.db.close()
+
+
+def build_cases(ws: Workspace, habit_ids: List[int], repeat: int, io_repeat: int) -> List[Case]:
+    """按服务方法组织用例；逐习惯的调用在抽样的 habit_ids 上各执行一次。"""
+
+    def each(call: Callable[[int], object]) -> List[Callable[[], object]]:
+        return [lambda habit_id=habit_id: call(habit_id) for habit_id in habit_ids]
+
+    habits = ws.habit_service
+    return [
+        Case("today_status", [habits.today_status], repeat * 10),
+        Case("compute_streaks", each(habits.compute_streaks), repeat),
+        Case("recent_completion_stats", each(lambda h: habits.recent_completion_stats(h, 30)), repeat),
+        Case("calendar_view", each(lambda h: ws.record_service.calendar_view(h, 30)), repeat),
+        Case("stats_today_week_month", [ws.pomodoro_service.stats_today_week_month], repeat * 10),
+        Case("export_to_file", [lambda: ws.backup_service.export_to_file(ws.export_path)], io_repeat),
+        Case(
+            "import_from_file",
+            [lambda: ws.import_service.import_from_file(ws.export_path, merge_strategy="replace")],
+            io_repeat,
+            setup=ws.fresh_import_target,
+        ),
+    ]
+
+
+def run_case(case: Case) -> Dict[str, float]:
+    """预热一次后逐次计时，返回毫秒统计。"""
+    if case.setup:
+        case.setup()
+    case.calls[0]()
+    samples = []
+    for _ in range(case.passes):
+        for call in case.calls:
+            if case.setup:
+                case.setup()
+            start = time.perf_counter()
+            call()
+            samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "count": len(samples),
+        "median_ms": round(statistics.median(samples), 4),
+        "p95_ms": round(percentile(samples, 95), 4),
+        "mean_ms": round(statistics.fmean(samples), 4),
+        "min_ms": round(samples[0], 4),
+    }
+
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> List[Dict]:
+    """按中位数与基线比较，返回每个共同用例的对比；regression 为 True 表示变慢超过阈值。"""
+    rows = []
+    for name, current in results["cases"].items():
+        base = baseline.get("cases", {}).get(name)
+        if base is None:
+            continue
+        before, after = base["median_ms"], current["median_ms"]
+        change = (after - before) / before if before > 0 else 0.0
+        rows.append(
+            {
+                "case": name,
+                "baseline_ms": before,
+                "median_ms": after,
+                "change": round(change, 4),
+                "regression": change > threshold and after - before > MIN_REGRESSION_MS,
+            }
+        )
+    return rows
+
+
+def format_results(results: Dict, comparison: Optional[List[Dict]] = None) -> str:
+    by_case = {row["case"]: row for row in comparison or []}
+    header = f"{'case':<26} {'n':>6} {'median':>10} {'p95':>10} {'mean':>10}"
+    if comparison is not None:
+        header += f" {'baseline':>10} {'change':>8}"
+    lines = [header]
+    for name, stats in results["cases"].items():
+        line = (
+            f"{name:<26} {stats['count']:6d} {stats['median_ms']:10.3f} "
+            f"{stats['p95_ms']:10.3f} {stats['mean_ms']:10.3f}"
+        )
+        row = by_case.get(name)
+        if row is not None:
+            line += f" {row['baseline_ms']:10.3f} {row['change'] * 100:+7.1f}%"
+            if row["regression"]:
+                line += "  REGRESSION"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", choices=sorted(SIZES), default="small")
+    parser.add_argument("--habits", type=int, help="覆盖预设的习惯数")
+    parser.add_argument("--years", type=int, help="覆盖预设的历史年数")
+    parser.add_argument("--pomodoros", type=int, help="覆盖预设的番茄记录数")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-dir", type=Path, help="数据集缓存目录")
+    parser.add_argument("--cases", help="只运行这些用例，逗号分隔")
+    parser.add_argument("--sample", type=int, default=50, help="逐习惯用例抽样的习惯数")
+    parser.add_argument("--repeat", type=int, default=5, help="逐习惯用例的轮数")
+    parser.add_argument("--io-repeat", type=int, default=3, help="导出/导入用例的次数")
+    parser.add_argument("--cache", action="store_true", help="使用带读缓存的仓储")
+    parser.add_argument("--output", type=Path, help="结果 JSON 的保存路径")
+    parser.add_argument("--baseline", type=Path, help="与该基线 JSON 比较")
+    parser.add_argument("--save-baseline", action="store_true", help="把本次结果写为 --baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="回归阈值（比例）")
+    args = parser.parse_args(argv)
+    if args.save_baseline and not args.baseline:
+        parser.error("--save-baseline 需要 --baseline")
+
+    spec = spec_from_args(args)
+    end = dates.today_date()
+    db_path = ensure_dataset(spec, args.data_dir, args.seed, end)
+    wanted = set(args.cases.split(",")) if args.cases else None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ws = Workspace(db_path, Path(tmp), use_cache=args.cache)
+        try:
+            all_ids = [h.id for h in ws.habit_service.list_habits(enabled_only=True)]
+            habit_ids = sorted(random.Random(args.seed).sample(all_ids, min(args.sample, len(all_ids))))
+            cases = build_cases(ws, habit_ids, args.repeat, args.io_repeat)
+            if wanted is not None:
+                unknown = wanted - {case.name for case in cases}
+                if unknown:
+                    parser.error(f"未知的用例: {', '.join(sorted(unknown))}")
+                cases = [case for case in cases if case.name in wanted]
+            results = {
+                "version": RESULT_VERSION,
+                "meta": {
+                    "dataset": {**dataclasses.asdict(spec), "seed": args.seed, "end": end.isoformat()},
+                    "cache": args.cache,
+                    "sample": len(habit_ids),
+                    "python": platform.python_version(),
+                    "sqlite": sqlite3.sqlite_version,
+                    "platform": platform.platform(),
+                    "timestamp": dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds"),
+                },
+                "cases": {case.name: run_case(case) for case in cases},
+            }
+        finally:
+            ws.close()
+
+    comparison = None
+    if args.baseline and not args.save_baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        if baseline.get("meta", {}).get("dataset", {}).get("name") != spec.name:
+            print(f"注意：基线的数据集与本次（{spec.name}）不同", file=sys.stderr)
+        comparison = compare(results, baseline, args.threshold)
+        results["comparison"] = {"baseline": str(args.baseline), "threshold": args.threshold, "cases": comparison}
+
+    print(f"== {spec.key}, {results['meta']['sample']} 个抽样习惯, 单位 ms ==")
+    print(format_results(results, comparison))
+    text = json.dumps(results, ensure_ascii=False, indent=2) + "\n"
+    if args.output:
+        args.output.write_text(text, encoding="utf-8")
+    if args.save_baseline:
+        args.baseline.write_text(text, encoding="utf-8")
+        print(f"基线已写入 {args.baseline}")
+
+    regressions = [row["case"] for row in comparison or [] if row["regression"]]
+    if regressions:
+        print(f"回归（> {args.threshold:.0%}）：{', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,398 @@
+"""HabitTimer 命令行：不导入 Toga，直接组装 Database、仓储与服务。
+
+用法：
+    python -m habit_timer list
+    python -m habit_timer check-in 跑步 [--date 2024-05-01] [--note ...]
+    python -m habit_timer uncheck 3 --date 2024-05-01
+    python -m habit_timer stats [--json]
+    python -m habit_timer export backup.json / import backup.json [--replace]
+    python -m habit_timer snapshot [--list]
+    python -m habit_timer batch < ops.txt
+
+batch 从标准输入逐行读取 "check-in|uncheck 习惯 [日期]"（# 开头为注释），先校验全部行，
+有错误时不写入任何数据；全部有效时在一个事务中写入。
+"""
+
+import argparse
+import datetime as dt
+import functools
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .utils import dates, paths
+
+# 启动耗时：模块顶层只导入标准库与 utils，解析参数（含 --help）不加载仓储；仓储、事件总线与服务在命令首次用到时才导入，
+# list 走返回普通元组的汇总查询，不导入领域模型（dataclasses 的导入与类创建约占 20 ms）；
+# 数据库已是最新版本时不导入迁移模块（见 Database._migrate）。
+
+
+class CliError(Exception):
+    """可预期的用户错误：输出消息并以退出码 1 结束。"""
+
+
+class Context:
+    """一次命令行调用的依赖，仓储与服务按需创建。"""
+
+    def __init__(self, db_path: Path, as_json: bool = False):
+        from .repository.database import Database
+
+        self.db = Database(db_path)
+        self.as_json = as_json
+        # 名称 -> 习惯 id 列表，首次按名称查找时一次读入（batch 逐行查找不重复查询）
+        self._names: Optional[Dict[str, List[int]]] = None
+
+    @functools.cached_property
+    def events(self):
+        from .service.event_bus import EventBus
+
+        return EventBus()
+
+    @functools.cached_property
+    def habit_repo(self):
+        from .repository.habit_repository import HabitRepository
+
+        return HabitRepository(self.db)
+
+    @functools.cached_property
+    def record_repo(self):
+        from .repository.record_repository import HabitRecordRepository
+
+        return HabitRecordRepository(self.db)
+
+    def summary_repo(self):
+        from .repository.summary_repository import HabitSummaryRepository
+
+        return HabitSummaryRepository(self.db)
+
+    def habit_service(self):
+        from .service.habit_service import HabitService
+
+        return HabitService(self.habit_repo, self.record_repo, self.events)
+
+    def record_service(self):
+        from .service.record_service import HabitRecordService
+
+        return HabitRecordService(self.record_repo, self.events)
+
+    def pomodoro_repo(self):
+        from .repository.pomodoro_repository import PomodoroRepository
+
+        return PomodoroRepository(self.db)
+
+    def backup_service(self):
+        from .repository.config_repository import ConfigRepository
+        from .service.backup_service import BackupService
+
+        return BackupService(
+            self.habit_repo, self.record_repo, self.pomodoro_repo(), ConfigRepository(self.db), self.events
+        )
+
+    def resolve_habit(self, ref: str) -> int:
+        """按 id 或名称找到未删除的习惯，名称重复时要求使用 id。"""
+        if ref.isdigit():
+            habit = self.habit_repo.get(int(ref))
+            if habit is None:
+                raise CliError(f"习惯不存在: {ref}")
+            return habit.id
+        if self._names is None:
+            self._names = {}
+            for habit in self.habit_repo.list_all():
+                self._names.setdefault(habit.name, []).append(habit.id)
+        matches = self._names.get(ref)
+        if not matches:
+            raise CliError(f"习惯不存在: {ref}")
+        if len(matches) > 1:
+            raise CliError(f"有多个名为 {ref} 的习惯，请使用 id: {', '.join(map(str, matches))}")
+        return matches[0]
+
+    def output(self, data, lines: Sequence[str]) -> None:
+        if self.as_json:
+            import json
+
+            print(json.dumps(data, ensure_ascii=False, indent=2, default=str))
+        else:
+            for line in lines:
+                print(line)
+
+    def close(self) -> None:
+        self.db.close()
+
+
+def parse_date(text: Optional[str]) -> dt.date:
+    """YYYY-MM-DD、today 或 yesterday；未给出时为今天。"""
+    if text is None or text == "today":
+        return dates.today_date()
+    if text == "yesterday":
+        return dates.today_date() - dt.timedelta(days=1)
+    try:
+        return dt.date.fromisoformat(text)
+    except ValueError:
+        raise CliError(f"日期格式应为 YYYY-MM-DD: {text}") from None
+
+
+def _habit_dict(habit) -> Dict:
+    return {
+        "id": habit.id,
+        "name": habit.name,
+        "category": habit.category,
+        "target_per_week": habit.target_per_week,
+        "enabled": habit.enabled,
+    }
+
+
+def cmd_list(ctx: Context, args: argparse.Namespace) -> None:
+    summary = ctx.summary_repo()
+    today = dates.today_date()
+    rows = summary.today_rows(today)
+    missing = [row[0] for row in rows if row[5] is None]
+    if missing:
+        # 旧库升级或新建习惯时连续打卡缓存缺失，由记录仓储重建后再读
+        ctx.record_repo.streaks_for_habits(missing)
+        rows = summary.today_rows(today)
+    data = [
+        {
+            "id": habit_id,
+            "name": name,
+            "category": category,
+            "target_per_week": target_per_week,
+            "enabled": True,
+            "today": completed,
+            "current_streak": current,
+            "longest_streak": longest,
+        }
+        for habit_id, name, category, target_per_week, completed, current, longest in rows
+    ]
+    lines = [
+        f"{'✓' if item['today'] else '·'} {item['id']:>4}  {item['name']}  [{item['category']}]  "
+        f"连续 {item['current_streak']} 天 / 最长 {item['longest_streak']} 天"
+        for item in data
+    ]
+    ctx.output(data, lines)
+
+
+def cmd_set_status(ctx: Context, args: argparse.Namespace) -> None:
+    habit_id = ctx.resolve_habit(args.habit)
+    date = parse_date(args.date)
+    completed = args.command == "check-in"
+    record = ctx.record_service().set_status_for_date(habit_id, date, completed, note=args.note or "")
+    current, longest = ctx.record_repo.get_streak(habit_id)
+    data = {
+        "habit_id": habit_id,
+        "date": record.date.isoformat(),
+        "is_completed": record.is_completed,
+        "current_streak": current,
+        "longest_streak": longest,
+    }
+    ctx.output(data, [f"{'已打卡' if completed else '已取消'} {args.habit} {record.date}，连续 {current} 天"])
+
+
+def parse_batch(ctx: Context, lines) -> Tuple[List[Tuple[int, dt.date, bool]], List[str]]:
+    """解析 batch 输入，返回 (操作, 错误)。"""
+    import shlex
+
+    ops: List[Tuple[int, dt.date, bool]] = []
+    errors: List[str] = []
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            parts = shlex.split(line)
+            if parts[0] not in ("check-in", "uncheck") or len(parts) not in (2, 3):
+                raise CliError("应为 check-in|uncheck 习惯 [日期]")
+            habit_id = ctx.resolve_habit(parts[1])
+            ops.append((habit_id, parse_date(parts[2] if len(parts) == 3 else None), parts[0] == "check-in"))
+        except (CliError, ValueError) as exc:
+            errors.append(f"第 {number} 行: {exc}")
+    return ops, errors
+
+
+def cmd_batch(ctx: Context, args: argparse.Namespace) -> None:
+    ops, errors = parse_batch(ctx, sys.stdin)
+    if errors:
+        raise CliError("输入有误，未写入任何数据:\n" + "\n".join(errors))
+    service = ctx.record_service()
+    with ctx.db.transaction():
+        for habit_id, date, completed in ops:
+            service.set_status_for_date(habit_id, date, completed)
+    ctx.output({"applied": len(ops)}, [f"已写入 {len(ops)} 条"])
+
+
+def cmd_stats(ctx: Context, args: argparse.Namespace) -> None:
+    from .service.pomodoro_service import PomodoroService
+    from .service.stats_service import StatsService
+
+    windows = (7, 30)
+    overview = StatsService(ctx.habit_repo, ctx.record_repo).habit_overview(windows=windows, weeks=args.weeks)
+    pomodoros = PomodoroService(ctx.pomodoro_repo(), ctx.events).stats_today_week_month()
+    habits = [
+        {
+            **_habit_dict(item["habit"]),
+            "current_streak": item["current_streak"],
+            "longest_streak": item["longest_streak"],
+            "windows": item["windows"],
+            "weekly": item["weekly"],
+        }
+        for item in overview
+    ]
+    lines = [f"番茄: 今日 {pomodoros['today']} | 本周 {pomodoros['this_week']} | 本月 {pomodoros['this_month']}"]
+    for item in habits:
+        rates = " | ".join(f"{days} 天 {item['windows'][days]['completion_rate']}%" for days in windows)
+        weekly = item["weekly"]
+        lines.append(
+            f"{item['id']:>4}  {item['name']}: 连续 {item['current_streak']} / 最长 {item['longest_streak']} | {rates}"
+            f" | 周达标 {weekly['weeks_met']}/{weekly['weeks_total']} 连续 {weekly['current_streak']} 周"
+        )
+    ctx.output({"pomodoros": pomodoros, "habits": habits}, lines)
+
+
+def cmd_export(ctx: Context, args: argparse.Namespace) -> None:
+    habit_ids = [ctx.resolve_habit(ref) for ref in args.habit] if args.habit else None
+    start = parse_date(args.start) if args.start else None
+    end = parse_date(args.end) if args.end else None
+    written = ctx.backup_service().export_to_file(args.path, habit_ids=habit_ids, start=start, end=end, fmt=args.format)
+    ctx.output({"path": str(args.path), "rows": written}, [f"已导出 {written} 行到 {args.path}"])
+
+
+def cmd_import(ctx: Context, args: argparse.Namespace) -> None:
+    if not args.path.is_file():
+        raise CliError(f"文件不存在: {args.path}")
+    try:
+        report = ctx.backup_service().import_from_file(
+            args.path, merge_strategy="replace" if args.replace else "append", fmt=args.format
+        )
+    except ValueError as exc:
+        # 文件格式错误（含 JSON 语法错误）：追加模式下已提交的批次保留，替换模式整体回滚
+        raise CliError(f"导入失败: {exc}") from None
+    data = {
+        "inserted": report.inserted,
+        "skipped": report.skipped,
+        "error_count": report.error_count,
+        "errors": report.errors,
+    }
+    lines = [
+        "已导入 " + ", ".join(f"{section} {count}" for section, count in report.inserted.items())
+        + f"；跳过 {report.skipped}，错误 {report.error_count}"
+    ]
+    lines += [f"  {section} #{index}: {message}" for section, index, message in report.errors[:20]]
+    ctx.output(data, lines)
+
+
+def cmd_snapshot(ctx: Context, args: argparse.Namespace) -> None:
+    from .service.snapshot_service import SnapshotService
+
+    service = SnapshotService(ctx.db, args.snapshot_dir, events=ctx.events)
+    if args.list:
+        snapshots = [str(path) for path in service.list_snapshots()]
+        ctx.output(snapshots, snapshots)
+        return
+    path = service.create_snapshot(args.dest)
+    if args.dest is None:
+        service.prune()
+    ctx.output({"path": str(path)}, [f"快照已写入 {path}"])
+
+
+def cmd_rebuild(ctx: Context, args: argparse.Namespace) -> None:
+    from .service.pomodoro_service import PomodoroService
+
+    ctx.record_repo.rebuild_caches()
+    PomodoroService(ctx.pomodoro_repo(), ctx.events).rebuild_rollups()
+    ctx.output({"rebuilt": True}, ["已重建连续打卡、完成位图、周汇总与番茄按日汇总"])
+
+
+def _terminal_width() -> int:
+    """与 shutil.get_terminal_size 相同的取值顺序：COLUMNS、标准输出所在终端、默认 80。"""
+    try:
+        columns = int(os.environ.get("COLUMNS", 0))
+    except ValueError:
+        columns = 0
+    if columns <= 0:
+        try:
+            columns = os.get_terminal_size(sys.__stdout__.fileno()).columns
+        except (AttributeError, ValueError, OSError):
+            columns = 0
+    return columns if columns > 0 else 80
+
+
+class HelpFormatter(argparse.RawDescriptionHelpFormatter):
+    """argparse 每添加一个参数都会创建格式器，未给出 width 时会导入 shutil 取终端宽度（约 3 ms），这里直接用 os 取。"""
+
+    def __init__(self, prog: str, **kwargs):
+        kwargs.setdefault("width", _terminal_width() - 2)
+        super().__init__(prog, **kwargs)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="habit_timer", description=__doc__.splitlines()[0], formatter_class=HelpFormatter
+    )
+    parser.add_argument("--db", type=Path, help=f"数据库文件，默认 {paths.database_path()}")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出")
+    sub = parser.add_subparsers(
+        dest="command",
+        required=True,
+        metavar="COMMAND",
+        parser_class=functools.partial(argparse.ArgumentParser, formatter_class=HelpFormatter),
+    )
+
+    sub.add_parser("list", help="列出启用的习惯及今日状态").set_defaults(handler=cmd_list)
+    for name, help_text in (("check-in", "打卡"), ("uncheck", "取消打卡")):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument("habit", help="习惯 id 或名称")
+        p.add_argument("--date", help="YYYY-MM-DD、today 或 yesterday，默认今天")
+        p.add_argument("--note", help="备注")
+        p.set_defaults(handler=cmd_set_status)
+
+    p = sub.add_parser("stats", help="习惯与番茄统计")
+    p.add_argument("--weeks", type=int, default=12, help="周达标统计的周数")
+    p.set_defaults(handler=cmd_stats)
+
+    p = sub.add_parser("export", help="导出 JSON/NDJSON 备份")
+    p.add_argument("path", type=Path)
+    p.add_argument("--habit", action="append", help="只导出该习惯，可重复")
+    p.add_argument("--start", help="起始日期")
+    p.add_argument("--end", help="结束日期")
+    p.add_argument("--format", choices=("json", "ndjson"), help="默认按扩展名判断")
+    p.set_defaults(handler=cmd_export)
+
+    p = sub.add_parser("import", help="导入备份")
+    p.add_argument("path", type=Path)
+    p.add_argument("--replace", action="store_true", help="先清空现有数据（默认追加）")
+    p.add_argument("--format", choices=("json", "ndjson"), help="默认按扩展名判断")
+    p.set_defaults(handler=cmd_import)
+
+    p = sub.add_parser("snapshot", help="生成整库快照")
+    p.add_argument("dest", nargs="?", type=Path, help="快照文件，默认写入快照目录并只保留最近 7 份")
+    p.add_argument("--list", action="store_true", help="列出快照目录中的快照")
+    p.add_argument("--snapshot-dir", type=Path, help=f"快照目录，默认 {paths.snapshot_dir()}")
+    p.set_defaults(handler=cmd_snapshot)
+
+    sub.add_parser("batch", help="从标准输入批量打卡/取消").set_defaults(handler=cmd_batch)
+    sub.add_parser("rebuild", help="重建派生的汇总表").set_defaults(handler=cmd_rebuild)
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    db_path = args.db or paths.database_path()
+    if args.command == "snapshot" and args.snapshot_dir is None:
+        args.snapshot_dir = db_path.parent / paths.SNAPSHOT_DIRNAME
+    ctx = Context(db_path, as_json=args.json)
+    try:
+        args.handler(ctx, args)
+    except CliError as exc:
+        print(f"错误: {exc}", file=sys.stderr)
+        return 1
+    except BrokenPipeError:
+        # 输出被 head 等提前关闭：把 stdout 指向 devnull，避免退出时刷新缓冲区再次报错
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    finally:
+        ctx.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
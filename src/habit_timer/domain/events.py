@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import dataclasses
+import datetime as dt
+from typing import Optional
+
+# 领域事件：服务在数据变更后发布，视图按需订阅。事件只携带定位信息，不携带完整数据。
+
+
+@dataclasses.dataclass(frozen=True)
+class DomainEvent:
+    """所有领域事件的基类，订阅基类即可收到全部事件。"""
+
+
+@dataclasses.dataclass(frozen=True)
+class HabitChanged(DomainEvent):
+    """习惯被创建、编辑或删除。
+
+    Attributes:
+        habit_id: 习惯主键。
+        action: created/updated/deleted。
+    """
+
+    habit_id: int
+    action: str = "updated"
+
+
+@dataclasses.dataclass(frozen=True)
+class RecordChanged(DomainEvent):
+    """某习惯在某天的打卡状态发生变化。"""
+
+    habit_id: int
+    date: dt.date
+
+
+@dataclasses.dataclass(frozen=True)
+class SessionCompleted(DomainEvent):
+    """番茄钟结束并写入数据库（包括中途停止）。"""
+
+    session_id: Optional[int]
+    habit_id: Optional[int]
+    status: str = "completed"
+
+
+@dataclasses.dataclass(frozen=True)
+class ConfigChanged(DomainEvent):
+    """全局设置已保存。"""
+
+
+@dataclasses.dataclass(frozen=True)
+class DataReloaded(DomainEvent):
+    """导入备份或恢复快照等整体变更，依赖数据库的视图都应重新加载。
+
+    Attributes:
+        source: import/restore/manual。
+    """
+
+    source: str = "import"
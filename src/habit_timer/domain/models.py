@@ -2,12 +2,13 @@ from __future__ import annotations
 
 import dataclasses
 import datetime as dt
-from typing import Optional
+from typing import NamedTuple, Optional, Tuple
 
 # 域模型定义：纯数据结构，不包含 UI 逻辑。
+# 模型使用 __slots__，不为每个实例分配 __dict__，大量记录时内存占用明显更低。
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class Habit:
     """习惯定义模型。
 
@@ -31,7 +32,7 @@ class Habit:
     deleted_at: Optional[dt.datetime] = None
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class HabitRecord:
     """习惯的每日打卡记录。"""
 
@@ -43,7 +44,77 @@ class HabitRecord:
     recorded_at: dt.datetime = dataclasses.field(default_factory=lambda: dt.datetime.now(dt.timezone.utc))
 
 
-@dataclasses.dataclass
+class RecordTuple(NamedTuple):
+    """只读的轻量打卡记录，用于统计、日历等只关心日期与完成状态的大批量读取。
+
+    不含 note/recorded_at，构造时无需解析时间戳；不可变，可直接作为字典键或集合元素。
+    """
+
+    habit_id: int
+    date: dt.date
+    is_completed: bool
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class MonthTile:
+    """某个习惯一个自然月的完成情况，只读，可在缓存中共享。
+
+    Attributes:
+        habit_id: 习惯主键。
+        month: 该月第一天。
+        days: 每天是否完成，days[0] 为 1 号。
+    """
+
+    habit_id: int
+    month: dt.date
+    days: Tuple[bool, ...]
+
+    @property
+    def completed(self) -> int:
+        return sum(self.days)
+
+
+@dataclasses.dataclass(slots=True)
+class HabitStreak:
+    """习惯连续打卡的增量状态，对应 habit_streaks 表。
+
+    Attributes:
+        habit_id: 习惯主键。
+        last_date: 最后一条记录的日期。
+        last_completed: 最后一条记录是否完成。
+        base_run: 截至 last_date 前一天的连续完成天数。
+        base_longest: last_date 之前所有记录中的最长连续天数。
+        current_streak: 当前连续（最后一条记录未完成时为 0）。
+        longest_streak: 历史最长连续。
+    """
+
+    habit_id: int
+    last_date: Optional[dt.date] = None
+    last_completed: bool = False
+    base_run: int = 0
+    base_longest: int = 0
+    current_streak: int = 0
+    longest_streak: int = 0
+
+
+@dataclasses.dataclass(slots=True)
+class WeeklyRollup:
+    """习惯在一个 ISO 周内的完成汇总，对应 habit_weekly 表。
+
+    Attributes:
+        habit_id: 习惯主键。
+        week_start: 该周的周一。
+        completed_days: 该周完成的天数。
+        met: 是否达到习惯当前的 target_per_week。
+    """
+
+    habit_id: int
+    week_start: dt.date
+    completed_days: int = 0
+    met: bool = False
+
+
+@dataclasses.dataclass(slots=True)
 class PomodoroSession:
     """番茄钟记录。"""
 
@@ -55,7 +126,26 @@ class PomodoroSession:
     status: str = "completed"  # completed/aborted
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
+class PomodoroDaily:
+    """某个本地日期、某个习惯的番茄汇总，对应 pomodoro_daily 表。
+
+    Attributes:
+        day: 本地日期（按开始时间换算）。
+        habit_id: 关联的习惯；未关联习惯的番茄为 None。
+        completed: 完成的番茄数。
+        aborted: 中止的番茄数。
+        focus_seconds: 完成番茄的专注总秒数。
+    """
+
+    day: dt.date
+    habit_id: Optional[int] = None
+    completed: int = 0
+    aborted: int = 0
+    focus_seconds: int = 0
+
+
+@dataclasses.dataclass(slots=True)
 class AppConfig:
     """全局设置。"""
 
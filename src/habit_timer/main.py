@@ -1,78 +1,226 @@
 import toga
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-from .repository.config_repository import ConfigRepository
-from .repository.database import Database
-from .repository.habit_repository import HabitRepository
-from .repository.pomodoro_repository import PomodoroRepository
-from .repository.record_repository import HabitRecordRepository
-from .service.backup_service import BackupService
-from .service.habit_service import HabitService
-from .service.pomodoro_service import PomodoroService
-from .service.record_service import HabitRecordService
-from .service.settings_service import SettingsService
-from .ui.calendar_view import CalendarView
-from .ui.pomodoro_view import PomodoroView
-from .ui.settings_view import SettingsView
-from .ui.stats_view import StatsView
-from .ui.today_view import TodayView
 from .utils.i18n import t
+from .utils.profiling import profiler
+
+# 启动路径上只导入今日选项卡需要的模块；其余视图与服务在对应选项卡首次构建时才导入。
 
 
 class HabitTimerApp(toga.App):
     """应用入口：初始化依赖并拼装 UI。"""
 
     def startup(self):
-        db_path = Path(self.paths.data) / "habit_timer.db"
-        self.database = Database(db_path)
-
-        # Repository 层
-        habit_repo = HabitRepository(self.database)
-        record_repo = HabitRecordRepository(self.database)
-        pomodoro_repo = PomodoroRepository(self.database)
-        config_repo = ConfigRepository(self.database)
-
-        # Service 层
-        self.habit_service = HabitService(habit_repo, record_repo)
-        self.record_service = HabitRecordService(record_repo)
-        self.pomodoro_service = PomodoroService(pomodoro_repo)
-        self.settings_service = SettingsService(config_repo)
-        self.backup_service = BackupService(habit_repo, record_repo, pomodoro_repo, config_repo)
-
-        # UI
-        self.stats_view = StatsView(self.habit_service, self.pomodoro_service)
-        self.today_view = TodayView(
-            self.habit_service, self.record_service, on_data_changed=self.refresh_views
-        )
-        self.pomodoro_view = PomodoroView(
-            self.pomodoro_service,
-            self.habit_service,
-            self.settings_service,
-            on_data_changed=self.refresh_views,
-        )
-        self.calendar_view = CalendarView(self.habit_service, self.record_service)
-        self.settings_view = SettingsView(
-            self.settings_service, self.backup_service, on_saved=self.refresh_views
+        with profiler.phase("import core"):
+            from .repository import caching
+            from .repository.config_repository import ConfigRepository
+            from .repository.database import Database
+            from .repository.habit_repository import HabitRepository
+            from .repository.pomodoro_repository import PomodoroRepository
+            from .repository.record_repository import HabitRecordRepository
+            from .domain.events import DataReloaded
+            from .service.async_service import AsyncService
+            from .service.event_bus import EventBus
+            from .service.habit_service import HabitService
+            from .service.pomodoro_service import PomodoroService
+            from .service.record_service import HabitRecordService
+            from .service.settings_service import SettingsService
+            from .service.snapshot_service import SnapshotScheduler, SnapshotService, snapshot_interval_from_env
+            from .ui.lazy_tab import LazyTab
+            from .ui.refresh import RefreshScheduler
+            from .utils import paths
+            from .utils.sql_trace import SqlTracer
+
+        data_dir = paths.data_dir(Path(self.paths.data))
+        self.database = Database(data_dir / paths.DATABASE_FILENAME)
+        # 设置 HABIT_TIMER_SQL_TRACE 时统计语句与仓储/服务方法耗时，退出时输出报告
+        self.sql_tracer = SqlTracer.from_env()
+        if self.sql_tracer.enabled:
+            self.database.instrument(self.sql_tracer)
+        # 打卡等高频小写入合并为一次提交，读取前或延迟到期时刷盘
+        self.database.enable_group_commit()
+        # 视图通过异步外观调用服务，数据库读写在线程池中执行，不阻塞事件循环
+        self.executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="habit-db")
+        # 打开数据库与迁移检查放到线程池，与界面构建并行；失败时在事件循环中弹出错误对话框
+        self.executor.submit(self._open_database).add_done_callback(self._on_database_opened)
+
+        with profiler.phase("wire services"):
+            # Repository 层：环境变量 HABIT_TIMER_CACHE=1 时使用带读缓存的子类；缓存感知不到命令行等其它进程的写入，默认关闭
+            if caching.cache_enabled():
+                habit_repo = caching.CachingHabitRepository(self.database)
+                record_repo = caching.CachingRecordRepository(self.database)
+                config_repo = caching.CachingConfigRepository(self.database)
+            else:
+                habit_repo = HabitRepository(self.database)
+                record_repo = HabitRecordRepository(self.database)
+                config_repo = ConfigRepository(self.database)
+            pomodoro_repo = PomodoroRepository(self.database)
+            self._repos = (habit_repo, record_repo, pomodoro_repo, config_repo)
+
+            # Service 层：写操作向事件总线发布领域事件
+            self.events = EventBus()
+            # 导入、恢复快照绕过仓储替换了数据，先于视图刷新丢弃读缓存
+            self.events.subscribe(DataReloaded, lambda event: self._invalidate_caches())
+            self.habit_service = HabitService(habit_repo, record_repo, self.events)
+            self.record_service = HabitRecordService(record_repo, self.events)
+            self.pomodoro_service = PomodoroService(pomodoro_repo, self.events)
+            self.settings_service = SettingsService(config_repo, self.events)
+            self.snapshot_service = SnapshotService(
+                self.database, data_dir / paths.SNAPSHOT_DIRNAME, events=self.events
+            )
+            # 环境变量 HABIT_TIMER_SNAPSHOT_HOURS 设置间隔时在后台定时生成整库快照，保留最近 keep 份
+            self.snapshot_scheduler = None
+            interval = snapshot_interval_from_env()
+            if interval is not None:
+                self.snapshot_scheduler = SnapshotScheduler(self.snapshot_service, interval)
+                self.snapshot_scheduler.start()
+
+            for obj in (
+                *self._repos,
+                self.habit_service,
+                self.record_service,
+                self.pomodoro_service,
+                self.settings_service,
+                self.snapshot_service,
+            ):
+                self._instrument(obj)
+
+            self.habit_async = AsyncService(self.habit_service, self.executor)
+            self.record_async = AsyncService(self.record_service, self.executor)
+            self.pomodoro_async = AsyncService(self.pomodoro_service, self.executor)
+            self.settings_async = AsyncService(self.settings_service, self.executor)
+
+        # UI：选项卡首次被选中时才导入并构建视图，启动时只加载今日选项卡
+        # 视图只处理自己展示的数据对应的事件，同一事件循环周期内的多次变更合并为一次刷新
+        self.refresh_scheduler = RefreshScheduler(self.events, loop=self.loop)
+        self.tab_container = toga.OptionContainer(on_select=self.on_tab_select)
+        self.lazy_tabs = []
+        for key, factory in (
+            ("today", self._build_today),
+            ("pomodoro", self._build_pomodoro),
+            ("calendar", self._build_calendar),
+            ("stats", self._build_stats),
+            ("settings", self._build_settings),
+        ):
+            tab = LazyTab(_profiled(f"build view: {key}", factory))
+            self.refresh_scheduler.watch(LazyTab.REFRESH_EVENTS, tab.apply_events)
+            self.tab_container.add(t(f"tabs.{key}"), tab)
+            self.lazy_tabs.append(tab)
+        self.lazy_tabs[0].activate()
+
+        with profiler.phase("first show"):
+            self.main_window = toga.MainWindow(title=self.formal_name)
+            self.main_window.content = self.tab_container
+            self.main_window.show()
+        self.on_exit = self.on_app_exit
+        # 事件循环开始处理回调时输出启动报告
+        self.loop.call_soon(self._startup_done)
+
+    def _open_database(self):
+        with profiler.phase("open db + schema check"):
+            self.database.connect()
+
+    def _on_database_opened(self, future):
+        """在线程池中回调：迁移失败、文件损坏等错误转到事件循环线程显示。"""
+        if future.cancelled() or future.exception() is None:
+            return
+        message = str(future.exception())
+        self.loop.call_soon_threadsafe(lambda: self.main_window.error_dialog(t("dialog.error"), message))
+
+    def _startup_done(self):
+        profiler.mark("event loop running")
+        profiler.emit()
+
+    def _build_today(self):
+        from .ui.today_view import TodayView
+
+        return TodayView(self.habit_async, self.record_async)
+
+    def _build_pomodoro(self):
+        from .ui.pomodoro_view import PomodoroView
+
+        return PomodoroView(self.pomodoro_async, self.habit_async, self.settings_async)
+
+    def _build_calendar(self):
+        from .ui.calendar_view import CalendarView
+
+        return CalendarView(self.habit_async, self.record_async)
+
+    def _build_stats(self):
+        from .service.async_service import AsyncService
+        from .service.stats_service import StatsService
+        from .ui.stats_view import StatsView
+
+        habit_repo, record_repo, _, _ = self._repos
+        self.stats_service = self._instrument(StatsService(habit_repo, record_repo))
+        return StatsView(AsyncService(self.stats_service, self.executor), self.pomodoro_async)
+
+    def _build_settings(self):
+        from .service.async_service import AsyncService
+        from .service.backup_service import BackupService
+        from .ui.settings_view import SettingsView
+
+        self.backup_service = self._instrument(BackupService(*self._repos, self.events))
+        return SettingsView(
+            self.settings_async,
+            AsyncService(self.backup_service, self.executor),
+            AsyncService(self.snapshot_service, self.executor),
         )
 
-        tabs = toga.OptionContainer()
-        tabs.add(t("tabs.today"), self.today_view)
-        tabs.add(t("tabs.pomodoro"), self.pomodoro_view)
-        tabs.add(t("tabs.calendar"), self.calendar_view)
-        tabs.add(t("tabs.stats"), self.stats_view)
-        tabs.add(t("tabs.settings"), self.settings_view)
+    def _instrument(self, obj):
+        """启用 SQL 跟踪时包装仓储/服务的公开方法以统计耗时。"""
+        if self.sql_tracer.enabled:
+            self.sql_tracer.wrap(obj)
+        return obj
+
+    def _invalidate_caches(self):
+        habit_repo, record_repo, _, config_repo = self._repos
+        habit_repo.invalidate()
+        record_repo.invalidate()
+        config_repo.invalidate()
 
-        self.main_window = toga.MainWindow(title=self.formal_name)
-        self.main_window.content = tabs
-        self.main_window.show()
+    def cache_report(self):
+        """各缓存仓储的命中统计，未启用缓存时为空字典。"""
+        from .repository.caching import cache_report
+
+        return cache_report(*self._repos)
+
+    def on_app_exit(self, app, **kwargs):
+        """退出前停止后台任务并提交尚未落盘的写入。"""
+        self.refresh_scheduler.close()
+        if self.snapshot_scheduler is not None:
+            self.snapshot_scheduler.stop(timeout=1)
+        self.executor.shutdown(wait=True)
+        self.database.close()
+        self.sql_tracer.emit()
+        return True
+
+    def on_tab_select(self, widget, **kwargs):
+        """切换选项卡：构建或补刷新选中的视图，其余视图转为后台（只记录变更）。"""
+        current = widget.current_tab.content if widget.current_tab else None
+        for tab in self.lazy_tabs:
+            if tab is current:
+                tab.activate()
+            else:
+                tab.deactivate()
 
     def refresh_views(self):
-        """数据更新后刷新依赖视图。"""
-        self.stats_view.refresh_view()
-        self.pomodoro_view.refresh_habits()
-        self.pomodoro_view.load_default_time()
-        self.calendar_view.refresh_habits()
-        self.today_view.refresh_view()
+        """全量刷新：可见视图立即刷新，隐藏视图标记为 dirty，切换到时再刷新；未构建的视图跳过。"""
+        from .domain.events import DataReloaded
+
+        for tab in self.lazy_tabs:
+            tab.apply_events([DataReloaded("manual")])
+
+
+def _profiled(name, factory):
+    """包装视图工厂，启用启动计时时记录每个视图的构建耗时。"""
+
+    def build():
+        with profiler.phase(name):
+            return factory()
+
+    return build
 
 
 def main():
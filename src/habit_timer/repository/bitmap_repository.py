@@ -0,0 +1,104 @@
+import datetime as dt
+from typing import Dict, Iterable, Optional
+
+from ..utils.bitset import CompletionBitmap
+from .database import Database
+
+# 重建位图时每次从游标读取的行数
+BITMAP_REBUILD_CHUNK = 5000
+
+
+class BitmapRepository:
+    """习惯完成位图（habit_bitmaps 表）的读写。
+
+    位图由 HabitRecordRepository.upsert 在同一事务中维护，是 habit_records 中已完成记录的派生数据。
+    """
+
+    def __init__(self, db: Database):
+        self.db = db
+
+    def load(self, habit_ids: Optional[Iterable[int]] = None) -> Dict[int, CompletionBitmap]:
+        """一条查询载入多个习惯的位图；缺失的位图（旧数据、新建习惯）先重建再返回。"""
+        from .record_repository import _habit_filter
+
+        where, params = _habit_filter(habit_ids, column="h.id")
+        sql = f"""
+            SELECT h.id AS habit_id, b.origin, b.bits
+            FROM habits h LEFT JOIN habit_bitmaps b ON b.habit_id = h.id
+            WHERE 1=1 {where}
+        """
+        rows = self.db.read_cursor().execute(sql, params).fetchall()
+        missing = [r["habit_id"] for r in rows if r["origin"] is None]
+        if missing:
+            self.rebuild(missing)
+            rows = self.db.read_cursor().execute(sql, params).fetchall()
+        return {
+            r["habit_id"]: CompletionBitmap(dt.date.fromisoformat(r["origin"]), r["bits"]) for r in rows
+        }
+
+    def get(self, habit_id: int) -> Optional[CompletionBitmap]:
+        return self.load([habit_id]).get(habit_id)
+
+    def set_day(self, habit_id: int, date: dt.date, completed: bool) -> None:
+        """更新某天的完成位，须在调用方的工作单元内执行，不单独提交。"""
+        conn = self.db.cursor()
+        row = conn.execute("SELECT origin, bits FROM habit_bitmaps WHERE habit_id=?", (habit_id,)).fetchone()
+        if row is None:
+            self.rebuild([habit_id])
+            return
+        bitmap = CompletionBitmap(dt.date.fromisoformat(row["origin"]), row["bits"])
+        # 早于起点的记录即使未完成也要前移起点，与 rebuild 按最早记录日取起点一致
+        if bitmap.get(date) == completed and date >= bitmap.origin:
+            return
+        bitmap.set(date, completed)
+        conn.execute(
+            "UPDATE habit_bitmaps SET origin=?, bits=? WHERE habit_id=?",
+            (bitmap.origin.isoformat(), bitmap.to_bytes(), habit_id),
+        )
+
+    def rebuild(self, habit_ids: Optional[Iterable[int]] = None) -> None:
+        """按已完成记录重建位图；起点为习惯创建日，有更早的记录时前移。"""
+        from .record_repository import _habit_filter
+
+        if habit_ids is not None:
+            habit_ids = list(habit_ids)
+        where, params = _habit_filter(habit_ids, column="h.id")
+        with self.db.transaction() as conn:
+            bitmaps = {
+                r["id"]: CompletionBitmap(_origin(r["created_at"], r["first_date"]))
+                for r in conn.execute(
+                    f"""
+                    SELECT h.id, h.created_at, MIN(r.date) AS first_date
+                    FROM habits h LEFT JOIN habit_records r ON r.habit_id = h.id
+                    WHERE 1=1 {where}
+                    GROUP BY h.id
+                    """,
+                    params,
+                )
+            }
+            where, params = _habit_filter(list(bitmaps))
+            reader = conn.execute(
+                f"SELECT habit_id, date FROM habit_records WHERE is_completed=1 {where} ORDER BY habit_id, date",
+                params,
+            )
+            while True:
+                rows = reader.fetchmany(BITMAP_REBUILD_CHUNK)
+                if not rows:
+                    break
+                for habit_id, date in rows:
+                    bitmaps[habit_id].set(dt.date.fromisoformat(date), True)
+            conn.executemany(
+                "INSERT OR REPLACE INTO habit_bitmaps(habit_id, origin, bits) VALUES(?, ?, ?)",
+                [(habit_id, b.origin.isoformat(), b.to_bytes()) for habit_id, b in bitmaps.items()],
+            )
+
+
+def _origin(created_at: Optional[str], first_date: Optional[str]) -> dt.date:
+    """位图起点：习惯创建日与最早记录日中较早者（创建时间无法解析时只看记录）。"""
+    candidates = []
+    for value in (created_at, first_date):
+        try:
+            candidates.append(dt.date.fromisoformat((value or "")[:10]))
+        except ValueError:
+            pass
+    return min(candidates) if candidates else dt.date.today()
@@ -0,0 +1,256 @@
+import dataclasses
+import datetime as dt
+import functools
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Tuple, TypeVar
+
+from ..domain.models import AppConfig, Habit, HabitRecord, RecordTuple
+from .config_repository import ConfigRepository
+from .database import Database
+from .habit_repository import HabitRepository
+from .record_repository import HabitRecordRepository
+
+# 可选的读缓存层：与基类接口相同的仓储子类，读取走内存，写入后精确失效。
+# 缓存只感知经由本仓储的写入；导入、恢复快照等绕过仓储整体替换数据后，须调用 invalidate()
+# （应用中由 DataReloaded 事件触发）。其它连接或进程（如命令行）对同一数据库的写入无法感知，
+# 因此默认关闭，只在确定数据库仅由本进程写入时开启。
+
+# 打卡记录区间查询的 LRU 容量（条目数）
+RECORD_CACHE_SIZE = 256
+
+# 设置为 1/true/yes 时应用使用缓存仓储
+CACHE_ENV = "HABIT_TIMER_CACHE"
+
+T = TypeVar("T")
+
+
+@dataclasses.dataclass(slots=True)
+class CacheStats:
+    """缓存命中统计。"""
+
+    hits: int = 0
+    misses: int = 0
+    invalidations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return round(self.hits / total * 100, 2) if total else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": self.hit_rate,
+        }
+
+
+class _Snapshot:
+    """带版本号的单值缓存：失效时版本加一，读取期间发生过失效的结果不写回。"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = 0
+        self.value = None
+        self.stats = CacheStats()
+
+    def get(self, load: Callable[[], T]) -> T:
+        with self.lock:
+            if self.value is not None:
+                self.stats.hits += 1
+                return self.value
+            self.stats.misses += 1
+            version = self.version
+        value = load()
+        with self.lock:
+            if version == self.version:
+                self.value = value
+        return value
+
+    def invalidate(self) -> None:
+        with self.lock:
+            self.version += 1
+            self.value = None
+            self.stats.invalidations += 1
+
+
+class CachingHabitRepository(HabitRepository):
+    """习惯目录缓存：一次读入全部习惯（含已删除），list_all/get 在内存中过滤。
+
+    create/update/soft_delete 后目录版本号加一并在下次读取时重新加载。
+    返回的是缓存对象的副本，调用方可以修改（如编辑表单）而不影响缓存。
+    """
+
+    def __init__(self, db: Database):
+        super().__init__(db)
+        self._catalog = _Snapshot()
+
+    @property
+    def catalog_version(self) -> int:
+        return self._catalog.version
+
+    @property
+    def cache_stats(self) -> CacheStats:
+        return self._catalog.stats
+
+    def _habits(self) -> Tuple[List[Habit], Dict[int, Habit]]:
+        list_all = super().list_all
+
+        def load():
+            habits = list_all(include_deleted=True)
+            return habits, {h.id: h for h in habits}
+
+        return self._catalog.get(load)
+
+    def list_all(self, enabled_only: bool = False, include_deleted: bool = False) -> List[Habit]:
+        habits, _ = self._habits()
+        return [
+            dataclasses.replace(h)
+            for h in habits
+            if (h.enabled or not enabled_only) and (h.deleted_at is None or include_deleted)
+        ]
+
+    def get(self, habit_id: int, include_deleted: bool = False) -> Optional[Habit]:
+        _, by_id = self._habits()
+        habit = by_id.get(habit_id)
+        if habit is None or (habit.deleted_at is not None and not include_deleted):
+            return None
+        return dataclasses.replace(habit)
+
+    def create(self, habit: Habit) -> Habit:
+        try:
+            return super().create(habit)
+        finally:
+            self.invalidate()
+
+    def update(self, habit: Habit) -> None:
+        try:
+            super().update(habit)
+        finally:
+            self.invalidate()
+
+    def soft_delete(self, habit_id: int) -> None:
+        try:
+            super().soft_delete(habit_id)
+        finally:
+            self.invalidate()
+
+    def invalidate(self) -> None:
+        self._catalog.invalidate()
+
+
+class CachingConfigRepository(ConfigRepository):
+    """配置快照缓存：load 只在首次或保存后读取数据库。"""
+
+    def __init__(self, db: Database):
+        super().__init__(db)
+        self._config = _Snapshot()
+
+    @property
+    def cache_stats(self) -> CacheStats:
+        return self._config.stats
+
+    def load(self) -> AppConfig:
+        return dataclasses.replace(self._config.get(super().load))
+
+    def save(self, config: AppConfig) -> None:
+        try:
+            super().save(config)
+        finally:
+            self.invalidate()
+
+    def invalidate(self) -> None:
+        self._config.invalidate()
+
+
+class CachingRecordRepository(HabitRecordRepository):
+    """打卡记录查询的 LRU 缓存。
+
+    缓存 fetch_by_habit_and_range、fetch_record_tuples、status_on_date 与 get_by_habit_date 的结果，
+    每个条目记下覆盖的习惯与日期区间；upsert 只淘汰包含所写 (习惯, 日期) 的条目。
+    返回的记录对象在缓存中共享，调用方不应修改。
+    """
+
+    def __init__(self, db: Database, max_entries: int = RECORD_CACHE_SIZE):
+        super().__init__(db)
+        self.max_entries = max_entries
+        self.cache_stats = CacheStats()
+        # 键 -> (习惯 id 集合，None 表示全部习惯; 开始日期; 结束日期; 结果)
+        self._entries: "OrderedDict[Hashable, Tuple[Optional[frozenset], dt.date, dt.date, object]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = 0
+
+    def _cached(
+        self,
+        key: Hashable,
+        habit_ids: Optional[frozenset],
+        start: dt.date,
+        end: dt.date,
+        load: Callable[[], T],
+    ) -> T:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.cache_stats.hits += 1
+                return entry[3]
+            self.cache_stats.misses += 1
+            version = self._version
+        value = load()
+        with self._lock:
+            if version == self._version:
+                self._entries[key] = (habit_ids, start, end, value)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return value
+
+    def fetch_by_habit_and_range(self, habit_id: int, start: dt.date, end: dt.date) -> List[HabitRecord]:
+        load = functools.partial(super().fetch_by_habit_and_range, habit_id, start, end)
+        return list(self._cached(("range", habit_id, start, end), frozenset([habit_id]), start, end, load))
+
+    def fetch_record_tuples(self, habit_id: int, start: dt.date, end: dt.date) -> List[RecordTuple]:
+        load = functools.partial(super().fetch_record_tuples, habit_id, start, end)
+        return list(self._cached(("tuples", habit_id, start, end), frozenset([habit_id]), start, end, load))
+
+    def status_on_date(self, date: dt.date, habit_ids: Optional[Iterable[int]] = None) -> Dict[int, bool]:
+        ids = None if habit_ids is None else frozenset(habit_ids)
+        load = functools.partial(super().status_on_date, date, ids)
+        return dict(self._cached(("status", date, ids), ids, date, date, load))
+
+    def get_by_habit_date(self, habit_id: int, date: dt.date) -> Optional[HabitRecord]:
+        load = functools.partial(super().get_by_habit_date, habit_id, date)
+        return self._cached(("record", habit_id, date), frozenset([habit_id]), date, date, load)
+
+    def upsert(self, habit_id: int, date: dt.date, is_completed: bool, note: str = "") -> HabitRecord:
+        try:
+            return super().upsert(habit_id, date, is_completed, note=note)
+        finally:
+            self.invalidate(habit_id, date)
+
+    def invalidate(self, habit_id: Optional[int] = None, date: Optional[dt.date] = None) -> None:
+        """淘汰包含 (habit_id, date) 的条目；只给 habit_id 时淘汰涉及该习惯的全部条目，不带参数时清空全部。"""
+        with self._lock:
+            self._version += 1
+            self.cache_stats.invalidations += 1
+            if habit_id is None:
+                self._entries.clear()
+                return
+            stale = [
+                key
+                for key, (ids, start, end, _) in self._entries.items()
+                if (ids is None or habit_id in ids) and (date is None or start <= date <= end)
+            ]
+            for key in stale:
+                del self._entries[key]
+
+
+def cache_report(*repos) -> Dict[str, Dict[str, float]]:
+    """各缓存仓储的命中统计，键为类名；非缓存仓储被忽略。"""
+    return {type(repo).__name__: repo.cache_stats.as_dict() for repo in repos if hasattr(repo, "cache_stats")}
+
+
+def cache_enabled() -> bool:
+    return os.environ.get(CACHE_ENV, "").strip().lower() in ("1", "true", "yes")
@@ -8,8 +8,12 @@ class ConfigRepository:
     def __init__(self, db: Database):
         self.db = db
 
+    def invalidate(self) -> None:
+        """丢弃缓存的读取结果。基类不缓存，供 caching 模块中的子类覆盖；
+        导入、恢复快照等绕过仓储替换数据之后调用。"""
+
     def load(self) -> AppConfig:
-        row = self.db.cursor().execute("SELECT * FROM app_config WHERE id=1").fetchone()
+        row = self.db.read_cursor().execute("SELECT * FROM app_config WHERE id=1").fetchone()
         if not row:
             return AppConfig()
         return AppConfig(
@@ -21,22 +25,22 @@ class ConfigRepository:
         )
 
     def save(self, config: AppConfig) -> None:
-        cursor = self.db.cursor()
-        cursor.execute(
-            """
-            INSERT INTO app_config(id, work_minutes, short_break_minutes, long_break_minutes, long_break_interval)
-            VALUES(1, ?, ?, ?, ?)
-            ON CONFLICT(id) DO UPDATE SET
-                work_minutes=excluded.work_minutes,
-                short_break_minutes=excluded.short_break_minutes,
-                long_break_minutes=excluded.long_break_minutes,
-                long_break_interval=excluded.long_break_interval
-            """,
-            (
-                config.work_minutes,
-                config.short_break_minutes,
-                config.long_break_minutes,
-                config.long_break_interval,
-            ),
-        )
-        self.db.connect().commit()
+        with self.db.transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                INSERT INTO app_config(id, work_minutes, short_break_minutes, long_break_minutes, long_break_interval)
+                VALUES(1, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    work_minutes=excluded.work_minutes,
+                    short_break_minutes=excluded.short_break_minutes,
+                    long_break_minutes=excluded.long_break_minutes,
+                    long_break_interval=excluded.long_break_interval
+                """,
+                (
+                    config.work_minutes,
+                    config.short_break_minutes,
+                    config.long_break_minutes,
+                    config.long_break_interval,
+                ),
+            )
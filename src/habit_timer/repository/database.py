@@ -1,93 +1,370 @@
+import os
 import sqlite3
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional
 
-# 负责 SQLite 连接与建表，保证上层只需要拿到连接对象即可。
+if TYPE_CHECKING:
+    from .migrations import MigrationProgress
+
+# 负责 SQLite 连接与表结构迁移，保证上层只需要拿到连接对象即可。
+
+# 当前表结构版本，须与 migrations.LATEST_VERSION 一致。已是该版本时不导入迁移模块，缩短命令行等场景的启动耗时
+SCHEMA_VERSION = 7
+
+# 非约束类的二级索引，批量导入时可先删除、导入完成后再统一重建
+SECONDARY_INDEXES = {
+    "idx_habit_records_habit_date": "CREATE INDEX IF NOT EXISTS idx_habit_records_habit_date ON habit_records(habit_id, date)",
+    "idx_pomodoro_start_time": "CREATE INDEX IF NOT EXISTS idx_pomodoro_start_time ON pomodoro_sessions(start_time)",
+    "idx_pomodoro_status_start_epoch": "CREATE INDEX IF NOT EXISTS idx_pomodoro_status_start_epoch ON pomodoro_sessions(status, start_epoch)",
+}
+
+# 在线备份每一步复制的页数，步与步之间会释放锁并回调进度
+BACKUP_PAGES_PER_STEP = 1024
+
+# 连接参数预设。cache_size 为负数时单位是 KiB；mmap_size 单位为字节。
+PRAGMA_PROFILES: Dict[str, Dict[str, object]] = {
+    # 桌面默认：WAL 下 NORMAL 不会损坏数据库，只可能丢失最后一次提交
+    "balanced": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -16 * 1024,
+        "mmap_size": 64 * 1024 * 1024,
+        "temp_store": "MEMORY",
+    },
+    # 每次提交都落盘
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -8 * 1024,
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+    },
+    # 大批量导入/基准测试：更大的缓存，提交不等待落盘
+    "bulk": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "cache_size": -64 * 1024,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+    },
+    # 与早期版本一致的回滚日志模式
+    "legacy": {
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "cache_size": -2 * 1024,
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+    },
+}
+DEFAULT_PROFILE = "balanced"
+DEFAULT_BUSY_TIMEOUT_MS = 5000
+
+# 组提交默认参数：最多延迟提交的秒数、累计多少个工作单元后立即提交
+GROUP_COMMIT_DELAY = 0.2
+GROUP_COMMIT_MAX_PENDING = 64
 
 
 class Database:
-    """SQLite 数据库包装，启动时自动建表。"""
+    """SQLite 数据库包装，首次连接时按 user_version 执行表结构迁移（见 migrations.py）。
+
+    一个写连接（connect/cursor）供所有写操作共享，写操作通过 transaction() 进入工作单元；
+    每个线程另有一个只读连接（reader/read_cursor），WAL 模式下读写互不阻塞。
+    """
 
-    def __init__(self, db_path: Path):
+    def __init__(
+        self,
+        db_path: Path,
+        profile: str = DEFAULT_PROFILE,
+        busy_timeout_ms: int = DEFAULT_BUSY_TIMEOUT_MS,
+        pragmas: Optional[Dict[str, object]] = None,
+        migration_progress: Optional["MigrationProgress"] = None,
+    ):
+        if profile not in PRAGMA_PROFILES:
+            raise ValueError(f"未知的连接参数预设: {profile}")
         self.db_path = db_path
+        self.busy_timeout_ms = busy_timeout_ms
+        self.migration_progress = migration_progress
+        self.pragmas = {**PRAGMA_PROFILES[profile], **(pragmas or {})}
+        self.write_lock = threading.RLock()
         self._conn: Optional[sqlite3.Connection] = None
+        self._local = threading.local()
+        self._readers: List[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+        # 工作单元状态，均在 write_lock 保护下读写
+        self._tx_depth = 0
+        self._tx_owner: Optional[int] = None
+        self._group_delay: Optional[float] = None
+        self._group_max_pending = GROUP_COMMIT_MAX_PENDING
+        self._group_pending = 0
+        self._group_timer: Optional[threading.Timer] = None
+        self.supports_returning = sqlite3.sqlite_version_info >= (3, 35, 0)
+        # 语句回调（utils.sql_trace.SqlTracer.trace_statement），由 instrument() 设置
+        self._trace: Optional[Callable[[str], None]] = None
         db_path.parent.mkdir(parents=True, exist_ok=True)
 
     def connect(self) -> sqlite3.Connection:
+        """返回共享的写连接，首次调用时设置日志模式并执行表结构迁移。"""
         if self._conn:
             return self._conn
-        self._conn = sqlite3.connect(self.db_path)
-        self._conn.row_factory = sqlite3.Row
-        self._conn.execute("PRAGMA foreign_keys = ON;")
-        self._init_schema()
-        return self._conn
+        with self.write_lock:
+            if self._conn:
+                return self._conn
+            conn = self._open()
+            conn.execute(f"PRAGMA journal_mode = {self.pragmas['journal_mode']}")
+            self._conn = conn
+            try:
+                self._migrate()
+            except BaseException:
+                self._conn = None
+                conn.close()
+                raise
+            return conn
 
     def cursor(self) -> sqlite3.Cursor:
         return self.connect().cursor()
 
-    def _init_schema(self) -> None:
-        conn = self.connect()
-        conn.executescript(
-            """
-            CREATE TABLE IF NOT EXISTS habits (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                description TEXT DEFAULT '',
-                category TEXT DEFAULT '其它',
-                target_per_week INTEGER DEFAULT 7,
-                enabled INTEGER DEFAULT 1,
-                created_at TEXT NOT NULL,
-                deleted_at TEXT
-            );
-
-            CREATE TABLE IF NOT EXISTS habit_records (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                habit_id INTEGER NOT NULL,
-                date TEXT NOT NULL,
-                is_completed INTEGER NOT NULL,
-                note TEXT DEFAULT '',
-                recorded_at TEXT NOT NULL,
-                FOREIGN KEY(habit_id) REFERENCES habits(id) ON DELETE CASCADE,
-                UNIQUE(habit_id, date)
-            );
-
-            CREATE INDEX IF NOT EXISTS idx_habit_records_habit_date
-                ON habit_records(habit_id, date);
-
-            CREATE TABLE IF NOT EXISTS pomodoro_sessions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                habit_id INTEGER,
-                start_time TEXT NOT NULL,
-                end_time TEXT,
-                duration_seconds INTEGER NOT NULL,
-                status TEXT NOT NULL,
-                FOREIGN KEY(habit_id) REFERENCES habits(id) ON DELETE SET NULL
-            );
-
-            CREATE INDEX IF NOT EXISTS idx_pomodoro_start_time
-                ON pomodoro_sessions(start_time);
-
-            CREATE TABLE IF NOT EXISTS app_config (
-                id INTEGER PRIMARY KEY CHECK (id = 1),
-                work_minutes INTEGER NOT NULL DEFAULT 25,
-                short_break_minutes INTEGER NOT NULL DEFAULT 5,
-                long_break_minutes INTEGER NOT NULL DEFAULT 15,
-                long_break_interval INTEGER NOT NULL DEFAULT 4
-            );
-
-            INSERT OR IGNORE INTO app_config(id, work_minutes, short_break_minutes, long_break_minutes, long_break_interval)
-            VALUES (1, 25, 5, 15, 4);
-            """
+    def reader(self) -> sqlite3.Connection:
+        """返回当前线程专用的只读连接，只能看到已提交的数据。"""
+        conn = getattr(self._local, "reader", None)
+        if conn is None:
+            self.connect()  # 确保表结构已初始化
+            conn = self._open(readonly=True)
+            self._local.reader = conn
+            with self._readers_lock:
+                self._readers.append(conn)
+        return conn
+
+    def read_cursor(self) -> sqlite3.Cursor:
+        """只读游标。
+
+        当前线程处于工作单元内时返回写连接的游标，以便读到本事务尚未提交的写入；
+        存在等待组提交的写入时先提交，保证读到最新数据。
+        """
+        if self._tx_owner == threading.get_ident():
+            return self.cursor()
+        if self._group_pending:
+            self.flush()
+        return self.reader().cursor()
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """写操作的工作单元：块内的写入在同一事务中一次提交，异常时整体回滚。
+
+        嵌套调用通过 SAVEPOINT 加入外层事务，内层异常只回滚内层写入。
+        开启组提交后，最外层正常结束时不立即提交，而是与随后的工作单元合并提交；
+        合并期间每个最外层工作单元也放在自己的 SAVEPOINT 中，失败时只回滚本单元，
+        不影响之前已成功返回（事件已发布）的工作单元。
+        """
+        with self.write_lock:
+            conn = self.connect()
+            top = self._tx_depth == 0
+            savepoint = None
+            if top and not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
+            else:
+                savepoint = f"uow_{self._tx_depth}"
+                conn.execute(f"SAVEPOINT {savepoint}")
+            if top:
+                self._tx_owner = threading.get_ident()
+            self._tx_depth += 1
+            try:
+                yield conn
+            except BaseException:
+                self._tx_depth -= 1
+                if top:
+                    self._tx_owner = None
+                # 磁盘已满等错误会使 SQLite 自动回滚整个事务，此时已没有可回滚的保存点
+                if savepoint and conn.in_transaction:
+                    conn.execute(f"ROLLBACK TO {savepoint}")
+                    conn.execute(f"RELEASE {savepoint}")
+                elif conn.in_transaction:
+                    conn.rollback()
+                raise
+            self._tx_depth -= 1
+            if savepoint:
+                conn.execute(f"RELEASE {savepoint}")
+            if not top:
+                return
+            self._tx_owner = None
+            if self._group_delay is None:
+                conn.commit()
+                return
+            self._group_pending += 1
+            if self._group_pending >= self._group_max_pending:
+                self.flush()
+            elif self._group_timer is None:
+                self._group_timer = threading.Timer(self._group_delay, self.flush)
+                self._group_timer.daemon = True
+                self._group_timer.start()
+
+    def enable_group_commit(
+        self, delay: float = GROUP_COMMIT_DELAY, max_pending: int = GROUP_COMMIT_MAX_PENDING
+    ) -> None:
+        """开启组提交：delay 秒内的多个工作单元（如连续快速打卡）合并为一次提交。
+
+        代价是最多 delay 秒内的写入在崩溃时可能丢失；任何读取都会先触发提交。
+        """
+        with self.write_lock:
+            self._group_delay = delay
+            self._group_max_pending = max(1, max_pending)
+
+    def disable_group_commit(self) -> None:
+        with self.write_lock:
+            self._group_delay = None
+            self.flush()
+
+    def flush(self) -> None:
+        """立即提交等待组提交的写入。"""
+        with self.write_lock:
+            self._cancel_group_timer()
+            if self._tx_depth == 0 and self._conn is not None and self._conn.in_transaction:
+                self._conn.commit()
+            self._group_pending = 0
+
+    def _cancel_group_timer(self) -> None:
+        if self._group_timer is not None:
+            self._group_timer.cancel()
+            self._group_timer = None
+
+    def _open(self, readonly: bool = False) -> sqlite3.Connection:
+        """按当前预设打开新连接；连接可跨线程使用，由调用方保证串行。"""
+        # isolation_level=None：不隐式开启事务，事务边界由 transaction() 显式控制
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000,
+            check_same_thread=False,
+            isolation_level=None,
         )
-        # 兼容旧版本表结构，补充 deleted_at 字段
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON;")
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        for name in ("synchronous", "cache_size", "mmap_size", "temp_store"):
+            conn.execute(f"PRAGMA {name} = {self.pragmas[name]}")
+        if readonly:
+            conn.execute("PRAGMA query_only = ON")
+        if self._trace is not None:
+            conn.set_trace_callback(self._trace)
+        return conn
+
+    def instrument(self, tracer) -> None:
+        """为已打开和之后打开的连接安装语句回调（SqlTracer），tracer 为 None 时移除。"""
+        self._trace = tracer.trace_statement if tracer is not None else None
+        with self._readers_lock:
+            connections = list(self._readers)
+        if self._conn is not None:
+            connections.append(self._conn)
+        for conn in connections:
+            conn.set_trace_callback(self._trace)
+
+    @contextmanager
+    def read_transaction(self) -> Iterator[sqlite3.Connection]:
+        """在独立连接上开启只读事务，事务内的多次查询看到同一份一致快照。
+
+        用于导出等长时间读取，结束后回滚并关闭连接，不影响主连接。
+        """
+        self.connect()  # 确保表结构已初始化
+        self.flush()  # 独立连接看不到组提交尚未提交的写入
+        conn = self._open(readonly=True)
         try:
-            conn.execute("ALTER TABLE habits ADD COLUMN deleted_at TEXT;")
-        except sqlite3.OperationalError:
-            # 已存在该字段时忽略
-            pass
-        conn.commit()
+            conn.execute("BEGIN")
+            yield conn
+        finally:
+            conn.rollback()
+            conn.close()
+
+    def _migrate(self) -> None:
+        """已是最新版本时只读取一次 user_version，否则导入迁移模块并依次执行尚未完成的迁移。"""
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            from .migrations import run_migrations
+
+            run_migrations(self, self.migration_progress)
+
+    def backup_to(
+        self,
+        dest: Path,
+        pages: int = BACKUP_PAGES_PER_STEP,
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> None:
+        """通过 SQLite 在线备份 API 按页复制整个数据库到 dest。
+
+        使用独立连接，可在后台线程调用；先写临时文件，完成后原子替换。
+        progress 回调 (已复制页数, 总页数)。
+        """
+        self.connect()
+        self.flush()  # 独立连接看不到组提交尚未提交的写入
+        dest = Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = dest.with_name(dest.name + ".tmp")
+        tmp_path.unlink(missing_ok=True)
+        src = self._open(readonly=True)
+        dst = sqlite3.connect(tmp_path)
+        try:
+            src.backup(dst, pages=pages, progress=_backup_progress(progress))
+        except BaseException:
+            dst.close()
+            tmp_path.unlink(missing_ok=True)
+            raise
+        finally:
+            src.close()
+        dst.close()
+        os.replace(tmp_path, dest)
+
+    def restore_from(
+        self,
+        src_path: Path,
+        pages: int = BACKUP_PAGES_PER_STEP,
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> None:
+        """用快照文件按页覆盖当前数据库，完成后补齐旧快照缺失的表结构。"""
+        src_path = Path(src_path)
+        if not src_path.is_file():
+            raise FileNotFoundError(src_path)
+        src = sqlite3.connect(f"{src_path.resolve().as_uri()}?mode=ro", uri=True)
+        try:
+            tables = {r[0] for r in src.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+            if "habits" not in tables:
+                raise ValueError(f"不是有效的数据快照: {src_path}")
+            with self.write_lock:
+                self.flush()
+                conn = self.connect()
+                src.backup(conn, pages=pages, progress=_backup_progress(progress))
+                conn.execute("PRAGMA foreign_keys = ON;")
+                self._migrate()
+        finally:
+            src.close()
+
+    def drop_secondary_indexes(self) -> None:
+        """删除二级索引，配合 create_secondary_indexes 用于大批量写入。"""
+        with self.transaction() as conn:
+            for name in SECONDARY_INDEXES:
+                conn.execute(f"DROP INDEX IF EXISTS {name}")
+
+    def create_secondary_indexes(self) -> None:
+        with self.transaction() as conn:
+            for ddl in SECONDARY_INDEXES.values():
+                conn.execute(ddl)
 
     def close(self) -> None:
-        if self._conn:
-            self._conn.close()
-            self._conn = None
+        with self._readers_lock:
+            readers, self._readers = self._readers, []
+        for conn in readers:
+            conn.close()
+        self._local = threading.local()
+        with self.write_lock:
+            self.flush()
+            if self._conn:
+                self._conn.close()
+                self._conn = None
+
+
+def _backup_progress(progress: Optional[Callable[[int, int], None]]):
+    """把 sqlite3 的 (status, remaining, total) 回调转换为 (已完成, 总数)。"""
+    if progress is None:
+        return None
+
+    def handler(status: int, remaining: int, total: int) -> None:
+        progress(total - remaining, total)
+
+    return handler
@@ -3,6 +3,7 @@ from typing import List, Optional
 
 from ..domain.models import Habit
 from .database import Database
+from .weekly_repository import WeeklyRollupRepository
 
 
 def now_utc_iso():
@@ -15,65 +16,72 @@ class HabitRepository:
 
     def __init__(self, db: Database):
         self.db = db
+        self.weekly = WeeklyRollupRepository(db)
 
     def create(self, habit: Habit) -> Habit:
-        cursor = self.db.cursor()
-        cursor.execute(
-            """
-            INSERT INTO habits(name, description, category, target_per_week, enabled, created_at)
-            VALUES(?, ?, ?, ?, ?, ?)
-            """,
-            (
-                habit.name,
-                habit.description,
-                habit.category,
-                habit.target_per_week,
-                habit.enabled,
-                now_utc_iso(),
-            ),
-        )
-        self.db.connect().commit()
+        with self.db.transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                INSERT INTO habits(name, description, category, target_per_week, enabled, created_at)
+                VALUES(?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    habit.name,
+                    habit.description,
+                    habit.category,
+                    habit.target_per_week,
+                    habit.enabled,
+                    now_utc_iso(),
+                ),
+            )
         habit.id = cursor.lastrowid
         return habit
 
     def update(self, habit: Habit) -> None:
-        cursor = self.db.cursor()
-        cursor.execute(
-            """
-            UPDATE habits SET
-                name=?, description=?, category=?, target_per_week=?, enabled=?
-            WHERE id=?
-            """,
-            (
-                habit.name,
-                habit.description,
-                habit.category,
-                habit.target_per_week,
-                habit.enabled,
-                habit.id,
-            ),
-        )
-        self.db.connect().commit()
+        with self.db.transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                UPDATE habits SET
+                    name=?, description=?, category=?, target_per_week=?, enabled=?
+                WHERE id=?
+                """,
+                (
+                    habit.name,
+                    habit.description,
+                    habit.category,
+                    habit.target_per_week,
+                    habit.enabled,
+                    habit.id,
+                ),
+            )
+            # 周汇总的 met 按当前目标判定，目标变化时在同一事务中重算
+            self.weekly.retarget(habit.id, habit.target_per_week)
 
     def soft_delete(self, habit_id: int) -> None:
         """软删除：打标 deleted_at，保留历史记录。"""
-        cursor = self.db.cursor()
-        cursor.execute(
-            "UPDATE habits SET enabled=0, deleted_at=? WHERE id=?",
-            (now_utc_iso(), habit_id),
-        )
-        self.db.connect().commit()
+        with self.db.transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "UPDATE habits SET enabled=0, deleted_at=? WHERE id=?",
+                (now_utc_iso(), habit_id),
+            )
+
+    def invalidate(self) -> None:
+        """丢弃缓存的读取结果。基类不缓存，供 caching 模块中的子类覆盖；
+        导入、恢复快照等绕过仓储替换数据之后调用。"""
 
     def get(self, habit_id: int, include_deleted: bool = False) -> Optional[Habit]:
         sql = "SELECT * FROM habits WHERE id=?"
         params = [habit_id]
         if not include_deleted:
             sql += " AND deleted_at IS NULL"
-        row = self.db.cursor().execute(sql, params).fetchone()
+        row = self.db.read_cursor().execute(sql, params).fetchone()
         return self._to_model(row) if row else None
 
     def list_all(self, enabled_only: bool = False, include_deleted: bool = False) -> List[Habit]:
-        cursor = self.db.cursor()
+        cursor = self.db.read_cursor()
         clauses = []
         params = []
         if enabled_only:
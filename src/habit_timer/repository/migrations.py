@@ -0,0 +1,439 @@
+from __future__ import annotations
+
+import dataclasses
+import datetime as dt
+import itertools
+import sqlite3
+from typing import TYPE_CHECKING, Callable, List, Optional
+
+if TYPE_CHECKING:
+    from .database import Database
+
+# 按版本号排列的表结构迁移，当前版本记录在 PRAGMA user_version 中。
+#
+# 每个迁移分两步：upgrade 在单个事务中执行 DDL；可选的 backfill 在其后分批提交，用于回填数据、
+# 建大索引等耗时操作。两步都必须可重复执行（IF NOT EXISTS、只处理尚未回填的行），
+# 这样中途退出后下次启动会从断点继续，全部完成后才写入新版本号。
+# 已发布的迁移不要再修改，表结构变化一律追加新的迁移。回填的 SQL 与算法也固定写在迁移里，
+# 不调用会继续演进的仓储方法，否则同一个迁移在不同版本中会写出不同的数据。
+
+# 迁移进度回调：(迁移版本号, 已完成, 总数)
+MigrationProgress = Callable[[int, int, int], None]
+
+# 回填连续打卡缓存时每批处理的习惯数，每批一个事务
+STREAK_BACKFILL_BATCH = 200
+# 回填完成位图时每批处理的习惯数
+BITMAP_BACKFILL_BATCH = 500
+# 回填每周汇总时每批处理的习惯数
+WEEKLY_BACKFILL_BATCH = 500
+# 回填番茄记录 epoch 列时每批更新的行数
+EPOCH_BACKFILL_BATCH = 5000
+
+# 按状态与开始时间（Unix 秒）的覆盖索引，区间计数只需扫描索引
+POMODORO_EPOCH_INDEX = (
+    "CREATE INDEX IF NOT EXISTS idx_pomodoro_status_start_epoch ON pomodoro_sessions(status, start_epoch)"
+)
+
+
+@dataclasses.dataclass(frozen=True)
+class Migration:
+    """一次表结构升级。
+
+    Attributes:
+        version: 迁移完成后的 user_version，从 1 开始连续递增。
+        description: 简要说明。
+        upgrade: 在事务中执行的 DDL。
+        backfill: 可选的分批数据回填，自行管理事务并通过回调报告 (已完成, 总数)。
+    """
+
+    version: int
+    description: str
+    upgrade: Callable[[sqlite3.Connection], None]
+    backfill: Optional[Callable[["Database", Callable[[int, int], None]], None]] = None
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def pending_migrations(version: int) -> List[Migration]:
+    return [m for m in MIGRATIONS if m.version > version]
+
+
+def run_migrations(db: "Database", progress: Optional[MigrationProgress] = None) -> List[int]:
+    """把数据库升级到 LATEST_VERSION，返回本次执行的迁移版本号。
+
+    调用方需持有 db.write_lock；已是最新版本时只读取一次 user_version。
+    """
+    conn = db.connect()
+    applied = []
+    for migration in pending_migrations(schema_version(conn)):
+        with db.transaction() as tx:
+            migration.upgrade(tx)
+        if migration.backfill is not None:
+            report = _bind_progress(progress, migration.version)
+            migration.backfill(db, report)
+        with db.transaction() as tx:
+            tx.execute(f"PRAGMA user_version = {migration.version}")
+        applied.append(migration.version)
+    # 组提交模式下迁移同样立即落盘
+    db.flush()
+    return applied
+
+
+def _bind_progress(progress: Optional[MigrationProgress], version: int) -> Callable[[int, int], None]:
+    def report(done: int, total: int) -> None:
+        if progress:
+            progress(version, done, total)
+
+    return report
+
+
+def _habits_missing(db: "Database", table: str) -> List[int]:
+    """table 中还没有对应行的习惯 id，分批回填按此断点续做。"""
+    return [
+        row[0]
+        for row in db.connect().execute(
+            f"""
+            SELECT h.id FROM habits h LEFT JOIN {table} t ON t.habit_id = h.id
+            WHERE t.habit_id IS NULL ORDER BY h.id
+            """
+        )
+    ]
+
+
+def _placeholders(values: List[int]) -> str:
+    return ", ".join("?" * len(values))
+
+
+def _column_names(conn: sqlite3.Connection, table: str) -> List[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+# ---- 迁移定义 ----
+
+
+def _v1_base_schema(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS habits (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            description TEXT DEFAULT '',
+            category TEXT DEFAULT '其它',
+            target_per_week INTEGER DEFAULT 7,
+            enabled INTEGER DEFAULT 1,
+            created_at TEXT NOT NULL,
+            deleted_at TEXT
+        )
+        """
+    )
+    # 兼容更早版本建出的 habits 表，补充 deleted_at 字段
+    if "deleted_at" not in _column_names(conn, "habits"):
+        conn.execute("ALTER TABLE habits ADD COLUMN deleted_at TEXT")
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS habit_records (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            habit_id INTEGER NOT NULL,
+            date TEXT NOT NULL,
+            is_completed INTEGER NOT NULL,
+            note TEXT DEFAULT '',
+            recorded_at TEXT NOT NULL,
+            FOREIGN KEY(habit_id) REFERENCES habits(id) ON DELETE CASCADE,
+            UNIQUE(habit_id, date)
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS pomodoro_sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            habit_id INTEGER,
+            start_time TEXT NOT NULL,
+            end_time TEXT,
+            duration_seconds INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            FOREIGN KEY(habit_id) REFERENCES habits(id) ON DELETE SET NULL
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS app_config (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            work_minutes INTEGER NOT NULL DEFAULT 25,
+            short_break_minutes INTEGER NOT NULL DEFAULT 5,
+            long_break_minutes INTEGER NOT NULL DEFAULT 15,
+            long_break_interval INTEGER NOT NULL DEFAULT 4
+        )
+        """
+    )
+    conn.execute(
+        """
+        INSERT OR IGNORE INTO app_config(id, work_minutes, short_break_minutes, long_break_minutes, long_break_interval)
+        VALUES (1, 25, 5, 15, 4)
+        """
+    )
+
+
+def _v2_secondary_indexes(conn: sqlite3.Connection) -> None:
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_habit_records_habit_date ON habit_records(habit_id, date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_pomodoro_start_time ON pomodoro_sessions(start_time)")
+
+
+def _v3_habit_streaks(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS habit_streaks (
+            habit_id INTEGER PRIMARY KEY,
+            last_date TEXT,
+            last_completed INTEGER NOT NULL DEFAULT 0,
+            base_run INTEGER NOT NULL DEFAULT 0,
+            base_longest INTEGER NOT NULL DEFAULT 0,
+            current_streak INTEGER NOT NULL DEFAULT 0,
+            longest_streak INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY(habit_id) REFERENCES habits(id) ON DELETE CASCADE
+        )
+        """
+    )
+
+
+def _v3_backfill_streaks(db: "Database", report: Callable[[int, int], None]) -> None:
+    """按习惯分批计算尚无缓存行的连续打卡状态。"""
+    missing = _habits_missing(db, "habit_streaks")
+    report(0, len(missing))
+    for start in range(0, len(missing), STREAK_BACKFILL_BATCH):
+        batch = missing[start : start + STREAK_BACKFILL_BATCH]
+        with db.transaction() as conn:
+            reader = conn.execute(
+                f"""
+                SELECT habit_id, date, is_completed FROM habit_records
+                WHERE habit_id IN ({_placeholders(batch)}) ORDER BY habit_id, date
+                """,
+                batch,
+            )
+            rows = {habit_id: (habit_id, None, 0, 0, 0, 0, 0) for habit_id in batch}
+            for habit_id, records in itertools.groupby(reader, key=lambda row: row[0]):
+                rows[habit_id] = _v3_streak_row(habit_id, ((date, done) for _, date, done in records))
+            conn.executemany(
+                """
+                INSERT OR REPLACE INTO habit_streaks(
+                    habit_id, last_date, last_completed, base_run, base_longest, current_streak, longest_streak
+                ) VALUES(?, ?, ?, ?, ?, ?, ?)
+                """,
+                list(rows.values()),
+            )
+        report(min(start + STREAK_BACKFILL_BATCH, len(missing)), len(missing))
+
+
+def _v3_streak_row(habit_id: int, records) -> tuple:
+    """按日期升序遍历一个习惯的 (date, is_completed)，得到 habit_streaks 的一行。"""
+    last = None
+    completed = False
+    base_run = base_longest = current = longest = 0
+    for date, is_completed in records:
+        day = dt.date.fromisoformat(date)
+        if last is not None:
+            base_longest = max(base_longest, current)
+            base_run = current if (day - last).days == 1 else 0
+        last, completed = day, bool(is_completed)
+        current = base_run + 1 if completed else 0
+        longest = max(base_longest, current)
+    return (habit_id, last.isoformat() if last else None, int(completed), base_run, base_longest, current, longest)
+
+
+def _v4_habit_bitmaps(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS habit_bitmaps (
+            habit_id INTEGER PRIMARY KEY,
+            origin TEXT NOT NULL,
+            bits BLOB NOT NULL,
+            FOREIGN KEY(habit_id) REFERENCES habits(id) ON DELETE CASCADE
+        )
+        """
+    )
+
+
+def _v4_backfill_bitmaps(db: "Database", report: Callable[[int, int], None]) -> None:
+    """按习惯分批生成尚无位图的完成位图：起点为创建日与最早记录日中较早者，第 i 位为起点后第 i 天。"""
+    missing = _habits_missing(db, "habit_bitmaps")
+    report(0, len(missing))
+    for start in range(0, len(missing), BITMAP_BACKFILL_BATCH):
+        batch = missing[start : start + BITMAP_BACKFILL_BATCH]
+        marks = _placeholders(batch)
+        with db.transaction() as conn:
+            origins = {
+                habit_id: _v4_origin(created_at, first_date)
+                for habit_id, created_at, first_date in conn.execute(
+                    f"""
+                    SELECT h.id, h.created_at, MIN(r.date)
+                    FROM habits h LEFT JOIN habit_records r ON r.habit_id = h.id
+                    WHERE h.id IN ({marks})
+                    GROUP BY h.id
+                    """,
+                    batch,
+                )
+            }
+            bits = dict.fromkeys(origins, 0)
+            for habit_id, date in conn.execute(
+                f"SELECT habit_id, date FROM habit_records WHERE is_completed=1 AND habit_id IN ({marks})", batch
+            ):
+                bits[habit_id] |= 1 << (dt.date.fromisoformat(date) - origins[habit_id]).days
+            conn.executemany(
+                "INSERT OR REPLACE INTO habit_bitmaps(habit_id, origin, bits) VALUES(?, ?, ?)",
+                [
+                    (habit_id, origins[habit_id].isoformat(), value.to_bytes((value.bit_length() + 7) // 8, "little"))
+                    for habit_id, value in bits.items()
+                ],
+            )
+        report(min(start + BITMAP_BACKFILL_BATCH, len(missing)), len(missing))
+
+
+def _v4_origin(created_at: Optional[str], first_date: Optional[str]) -> dt.date:
+    candidates = []
+    for value in (created_at, first_date):
+        try:
+            candidates.append(dt.date.fromisoformat((value or "")[:10]))
+        except ValueError:
+            pass
+    return min(candidates) if candidates else dt.date.today()
+
+
+def _v5_habit_weekly(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS habit_weekly (
+            habit_id INTEGER NOT NULL,
+            week_start TEXT NOT NULL,
+            completed_days INTEGER NOT NULL DEFAULT 0,
+            met INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY(habit_id, week_start),
+            FOREIGN KEY(habit_id) REFERENCES habits(id) ON DELETE CASCADE
+        ) WITHOUT ROWID
+        """
+    )
+
+
+def _v5_backfill_weekly(db: "Database", report: Callable[[int, int], None]) -> None:
+    """按习惯分批汇总尚无周汇总行的习惯；周起点为 ISO 周一（先前进到周日，再退 6 天）。"""
+    missing = _habits_missing(db, "habit_weekly")
+    report(0, len(missing))
+    for start in range(0, len(missing), WEEKLY_BACKFILL_BATCH):
+        batch = missing[start : start + WEEKLY_BACKFILL_BATCH]
+        with db.transaction() as conn:
+            conn.execute(
+                f"""
+                INSERT OR REPLACE INTO habit_weekly(habit_id, week_start, completed_days, met)
+                SELECT r.habit_id, date(r.date, 'weekday 0', '-6 days') AS week, COUNT(*),
+                       COUNT(*) >= h.target_per_week
+                FROM habit_records r JOIN habits h ON h.id = r.habit_id
+                WHERE r.is_completed=1 AND r.habit_id IN ({_placeholders(batch)})
+                GROUP BY r.habit_id, week
+                """,
+                batch,
+            )
+        report(min(start + WEEKLY_BACKFILL_BATCH, len(missing)), len(missing))
+
+
+def _v6_pomodoro_epochs(conn: sqlite3.Connection) -> None:
+    columns = _column_names(conn, "pomodoro_sessions")
+    for column in ("start_epoch", "end_epoch"):
+        if column not in columns:
+            conn.execute(f"ALTER TABLE pomodoro_sessions ADD COLUMN {column} INTEGER")
+
+
+def _v6_backfill_epochs(db: "Database", report: Callable[[int, int], None]) -> None:
+    """分批把 ISO 文本时间换算为 Unix 秒（与写入时同一套解析规则），最后建覆盖索引。"""
+    conn = db.connect()
+    total = conn.execute("SELECT COUNT(*) FROM pomodoro_sessions WHERE start_epoch IS NULL").fetchone()[0]
+    done = 0
+    report(done, total)
+    last_id = 0
+    while True:
+        # 按 id 推进，无法解析的行保持 NULL 也不会被重复读取
+        rows = conn.execute(
+            """
+            SELECT id, start_time, end_time FROM pomodoro_sessions
+            WHERE start_epoch IS NULL AND id > ? ORDER BY id LIMIT ?
+            """,
+            (last_id, EPOCH_BACKFILL_BATCH),
+        ).fetchall()
+        if not rows:
+            break
+        with db.transaction() as tx:
+            tx.executemany(
+                "UPDATE pomodoro_sessions SET start_epoch=?, end_epoch=? WHERE id=?",
+                [(_v6_epoch(start), _v6_epoch(end), row_id) for row_id, start, end in rows],
+            )
+        last_id = rows[-1][0]
+        done += len(rows)
+        report(min(done, total), total)
+    with db.transaction() as tx:
+        tx.execute(POMODORO_EPOCH_INDEX)
+
+
+def _v6_epoch(text: Optional[str]) -> Optional[int]:
+    """v6 写入时的解析规则（utils.dates.epoch_from_iso 的固定副本）：不带时区按 UTC，空值或无法解析为 None。
+
+    迁移须与后续代码解耦，工具函数以后改动也不影响旧库升级的结果。
+    """
+    if not text:
+        return None
+    try:
+        value = dt.datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=dt.timezone.utc)
+    return int(value.timestamp())
+
+
+def _v7_pomodoro_daily(conn: sqlite3.Connection) -> None:
+    # 未关联习惯的番茄 habit_id 记为 0（主键列不能为 NULL）；不设外键，习惯删除后由 rebuild_daily 修正
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS pomodoro_daily (
+            day TEXT NOT NULL,
+            habit_id INTEGER NOT NULL DEFAULT 0,
+            completed INTEGER NOT NULL DEFAULT 0,
+            aborted INTEGER NOT NULL DEFAULT 0,
+            focus_seconds INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY(day, habit_id)
+        ) WITHOUT ROWID
+        """
+    )
+
+
+def _v7_backfill_pomodoro_daily(db: "Database", report: Callable[[int, int], None]) -> None:
+    """一次分组汇总全部番茄记录（先清空再写入，可重复执行）；日期为开始时间的本地日期。"""
+    report(0, 1)
+    with db.transaction() as conn:
+        conn.execute("DELETE FROM pomodoro_daily")
+        conn.execute(
+            """
+            INSERT INTO pomodoro_daily(day, habit_id, completed, aborted, focus_seconds)
+            SELECT date(start_epoch, 'unixepoch', 'localtime') AS day, COALESCE(habit_id, 0) AS habit,
+                   SUM(status='completed'), SUM(status='aborted'),
+                   SUM(CASE WHEN status='completed' THEN duration_seconds ELSE 0 END)
+            FROM pomodoro_sessions
+            WHERE start_epoch IS NOT NULL AND status IN ('completed', 'aborted')
+            GROUP BY day, habit
+            """
+        )
+    report(1, 1)
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "基础表结构", _v1_base_schema),
+    Migration(2, "记录与番茄的二级索引", _v2_secondary_indexes),
+    Migration(3, "连续打卡增量缓存", _v3_habit_streaks, _v3_backfill_streaks),
+    Migration(4, "习惯完成位图", _v4_habit_bitmaps, _v4_backfill_bitmaps),
+    Migration(5, "每周达标汇总", _v5_habit_weekly, _v5_backfill_weekly),
+    Migration(6, "番茄记录的 epoch 时间与覆盖索引", _v6_pomodoro_epochs, _v6_backfill_epochs),
+    Migration(7, "番茄按日汇总", _v7_pomodoro_daily, _v7_backfill_pomodoro_daily),
+]
+
+# 追加迁移时同步修改 database.SCHEMA_VERSION（连接时据此判断是否需要导入本模块）
+LATEST_VERSION = MIGRATIONS[-1].version
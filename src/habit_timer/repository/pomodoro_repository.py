@@ -1,47 +1,157 @@
 import datetime as dt
-from typing import List
+from typing import Iterable, List, Optional, Sequence
 
-from ..domain.models import PomodoroSession
+from ..domain.models import PomodoroDaily, PomodoroSession
+from ..utils.dates import epoch_seconds, iso_date
 from .database import Database
 
 
 class PomodoroRepository:
-    """番茄钟记录持久化。"""
+    """番茄钟记录持久化。
+
+    开始/结束时间同时保存 ISO 文本（导出、展示）与 Unix 秒（start_epoch/end_epoch）；
+    区间统计只用后者，配合 (status, start_epoch) 覆盖索引不必回表。
+    每条记录同时累加到按本地日期、习惯汇总的 pomodoro_daily，按天的专注统计只读汇总表。
+    """
 
     def __init__(self, db: Database):
         self.db = db
 
     def add_session(self, session: PomodoroSession) -> PomodoroSession:
-        cursor = self.db.cursor()
-        cursor.execute(
+        with self.db.transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                INSERT INTO pomodoro_sessions(
+                    habit_id, start_time, end_time, duration_seconds, status, start_epoch, end_epoch
+                ) VALUES(?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    session.habit_id,
+                    session.start_time.isoformat(),
+                    session.end_time.isoformat() if session.end_time else None,
+                    session.duration_seconds,
+                    session.status,
+                    epoch_seconds(session.start_time),
+                    epoch_seconds(session.end_time) if session.end_time else None,
+                ),
+            )
+            session.id = cursor.lastrowid
+            self._add_to_daily(session)
+        return session
+
+    def _add_to_daily(self, session: PomodoroSession) -> None:
+        """把一条记录累加到当天的汇总行，须在调用方的事务中执行。"""
+        completed = session.status == "completed"
+        aborted = session.status == "aborted"
+        if not (completed or aborted):
+            return
+        # 与 rebuild_daily 中 SQLite 的 'localtime' 一致，按本机时区换算日期
+        day = dt.datetime.fromtimestamp(epoch_seconds(session.start_time)).date()
+        self.db.cursor().execute(
             """
-            INSERT INTO pomodoro_sessions(habit_id, start_time, end_time, duration_seconds, status)
+            INSERT INTO pomodoro_daily(day, habit_id, completed, aborted, focus_seconds)
             VALUES(?, ?, ?, ?, ?)
+            ON CONFLICT(day, habit_id) DO UPDATE SET
+                completed = completed + excluded.completed,
+                aborted = aborted + excluded.aborted,
+                focus_seconds = focus_seconds + excluded.focus_seconds
             """,
             (
-                session.habit_id,
-                session.start_time.isoformat(),
-                session.end_time.isoformat() if session.end_time else None,
-                session.duration_seconds,
-                session.status,
+                iso_date(day),
+                session.habit_id or 0,
+                int(completed),
+                int(aborted),
+                session.duration_seconds if completed else 0,
             ),
         )
-        self.db.connect().commit()
-        session.id = cursor.lastrowid
-        return session
+
+    def rebuild_daily(self, start: Optional[dt.date] = None, end: Optional[dt.date] = None) -> None:
+        """按番茄记录重建 start..end（本地日期，含两端）的汇总，默认重建全部。"""
+        day_sql = "date(start_epoch, 'unixepoch', 'localtime')"
+        where, params = "", []
+        having, having_params = "", []
+        if start is not None:
+            # epoch 条件放宽一天以覆盖时区偏移，精确的日期边界由 HAVING 判定
+            where += " AND start_epoch >= ?"
+            params.append(_local_midnight_epoch(start - dt.timedelta(days=1)))
+            having += " AND day >= ?"
+            having_params.append(iso_date(start))
+        if end is not None:
+            where += " AND start_epoch < ?"
+            params.append(_local_midnight_epoch(end + dt.timedelta(days=2)))
+            having += " AND day <= ?"
+            having_params.append(iso_date(end))
+        with self.db.transaction() as conn:
+            conn.execute(f"DELETE FROM pomodoro_daily WHERE 1=1 {having}", having_params)
+            conn.execute(
+                f"""
+                INSERT INTO pomodoro_daily(day, habit_id, completed, aborted, focus_seconds)
+                SELECT {day_sql} AS day, COALESCE(habit_id, 0) AS habit,
+                       SUM(status='completed'), SUM(status='aborted'),
+                       SUM(CASE WHEN status='completed' THEN duration_seconds ELSE 0 END)
+                FROM pomodoro_sessions
+                WHERE start_epoch IS NOT NULL AND status IN ('completed', 'aborted') {where}
+                GROUP BY day, habit
+                HAVING 1=1 {having}
+                """,
+                [*params, *having_params],
+            )
+
+    def fetch_daily(
+        self, start: dt.date, end: dt.date, habit_ids: Optional[Iterable[Optional[int]]] = None
+    ) -> List[PomodoroDaily]:
+        """读取 start..end 的按日汇总行（只含有番茄的日期与习惯），按日期升序。
+
+        habit_ids 中的 None 表示未关联习惯的番茄。
+        """
+        where, params = "", []
+        if habit_ids is not None:
+            ids = [habit_id or 0 for habit_id in habit_ids]
+            where = f"AND habit_id IN ({', '.join('?' * len(ids))})" if ids else "AND 0"
+            params = ids
+        cursor = self.db.read_cursor()
+        cursor.row_factory = None
+        rows = cursor.execute(
+            f"""
+            SELECT day, habit_id, completed, aborted, focus_seconds FROM pomodoro_daily
+            WHERE day BETWEEN ? AND ? {where}
+            ORDER BY day, habit_id
+            """,
+            [iso_date(start), iso_date(end), *params],
+        ).fetchall()
+        return [
+            PomodoroDaily(dt.date.fromisoformat(day), habit_id or None, completed, aborted, seconds)
+            for day, habit_id, completed, aborted, seconds in rows
+        ]
 
     def count_between(self, start: dt.datetime, end: dt.datetime) -> int:
-        row = self.db.cursor().execute(
+        row = self.db.read_cursor().execute(
             """
             SELECT COUNT(*) as cnt FROM pomodoro_sessions
-            WHERE start_time BETWEEN ? AND ? AND status='completed'
+            WHERE status='completed' AND start_epoch BETWEEN ? AND ?
             """,
-            (start.isoformat(), end.isoformat()),
+            (epoch_seconds(start), epoch_seconds(end)),
         ).fetchone()
         return row["cnt"] if row else 0
 
+    def count_since_many(self, starts: Sequence[dt.datetime], end: dt.datetime) -> List[int]:
+        """一次查询统计多个起点到 end 之间的完成数，顺序与 starts 一致。"""
+        if not starts:
+            return []
+        bounds = [epoch_seconds(s) for s in starts]
+        columns = ", ".join(f"SUM(start_epoch >= ?) AS c{i}" for i in range(len(starts)))
+        row = self.db.read_cursor().execute(
+            f"""
+            SELECT {columns} FROM pomodoro_sessions
+            WHERE status='completed' AND start_epoch BETWEEN ? AND ?
+            """,
+            (*bounds, min(bounds), epoch_seconds(end)),
+        ).fetchone()
+        return [row[f"c{i}"] or 0 for i in range(len(starts))]
+
     def recent_sessions(self, limit: int = 20) -> List[PomodoroSession]:
-        rows = self.db.cursor().execute(
+        rows = self.db.read_cursor().execute(
             "SELECT * FROM pomodoro_sessions ORDER BY start_time DESC LIMIT ?", (limit,)
         ).fetchall()
         return [
@@ -55,3 +165,8 @@ class PomodoroRepository:
             )
             for r in rows
         ]
+
+
+def _local_midnight_epoch(day: dt.date) -> int:
+    """本地时区 day 零点的 Unix 秒。"""
+    return int(dt.datetime.combine(day, dt.time.min).timestamp())
@@ -1,9 +1,18 @@
 import datetime as dt
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
-from ..domain.models import HabitRecord
+from ..domain.models import HabitRecord, HabitStreak, RecordTuple
 from ..utils.dates import iso_date
+from .bitmap_repository import BitmapRepository
 from .database import Database
+from .weekly_repository import WeeklyRollupRepository
+
+
+# 重建连续打卡缓存时每次从游标读取的行数
+STREAK_REBUILD_CHUNK = 5000
+
+# 构造 HabitRecord 时读取的列，顺序与 _row_to_record 一致
+_RECORD_COLUMNS = "id, habit_id, date, is_completed, note, recorded_at"
 
 
 class HabitRecordRepository:
@@ -11,38 +20,54 @@ class HabitRecordRepository:
 
     def __init__(self, db: Database):
         self.db = db
+        # 完成位图、每周汇总与连续打卡缓存一样随 upsert 在同一事务中维护
+        self.bitmaps = BitmapRepository(db)
+        self.weekly = WeeklyRollupRepository(db)
 
     def upsert(
         self, habit_id: int, date: dt.date, is_completed: bool, note: str = ""
     ) -> HabitRecord:
-        """插入或更新指定日期的完成状态。"""
-        cursor = self.db.cursor()
-        cursor.execute(
-            """
+        """插入或更新指定日期的完成状态，并在同一事务中维护连续打卡缓存、完成位图与每周汇总。"""
+        sql = """
             INSERT INTO habit_records(habit_id, date, is_completed, note, recorded_at)
             VALUES(?, ?, ?, ?, ?)
             ON CONFLICT(habit_id, date) DO UPDATE SET is_completed=excluded.is_completed, note=excluded.note
-            """,
-            (
-                habit_id,
-                iso_date(date),
-                1 if is_completed else 0,
-                note,
-                dt.datetime.utcnow().isoformat(),
-            ),
+        """
+        params = (
+            habit_id,
+            iso_date(date),
+            1 if is_completed else 0,
+            note,
+            dt.datetime.utcnow().isoformat(),
         )
-        self.db.connect().commit()
-        record_id = cursor.lastrowid
+        with self.db.transaction() as conn:
+            if self.db.supports_returning:
+                # RETURNING 在插入与更新两种情况下都直接给出记录 id，无需再查询
+                record_id = conn.execute(sql + " RETURNING id", params).fetchone()["id"]
+            else:
+                # 旧版 SQLite：更新分支不会刷新 lastrowid，只能回查
+                conn.execute(sql, params)
+                record_id = conn.execute(
+                    "SELECT id FROM habit_records WHERE habit_id=? AND date=?",
+                    (habit_id, iso_date(date)),
+                ).fetchone()["id"]
+            self._update_streak(habit_id, date, is_completed)
+            self.bitmaps.set_day(habit_id, date, is_completed)
+            self.weekly.refresh_week(habit_id, date)
         return HabitRecord(
-            id=record_id if record_id != 0 else self.get_by_habit_date(habit_id, date).id,
+            id=record_id,
             habit_id=habit_id,
             date=date,
             is_completed=is_completed,
             note=note,
         )
 
+    def invalidate(self, habit_id: Optional[int] = None, date: Optional[dt.date] = None) -> None:
+        """丢弃缓存的读取结果（不带参数时全部丢弃）。基类不缓存，供 caching 模块中的子类覆盖；
+        导入、恢复快照等绕过仓储替换数据之后调用。"""
+
     def get_by_habit_date(self, habit_id: int, date: dt.date) -> Optional[HabitRecord]:
-        row = self.db.cursor().execute(
+        row = self.db.read_cursor().execute(
             "SELECT * FROM habit_records WHERE habit_id=? AND date=?", (habit_id, iso_date(date))
         ).fetchone()
         if not row:
@@ -56,32 +81,172 @@ class HabitRecordRepository:
             recorded_at=dt.datetime.fromisoformat(row["recorded_at"]),
         )
 
+    def status_on_date(
+        self, date: dt.date, habit_ids: Optional[Iterable[int]] = None
+    ) -> Dict[int, bool]:
+        """批量读取指定日期各习惯的完成状态，没有记录的习惯不出现在结果中。"""
+        where, params = _habit_filter(habit_ids)
+        rows = self.db.read_cursor().execute(
+            f"SELECT habit_id, is_completed FROM habit_records WHERE date=? {where}",
+            [iso_date(date), *params],
+        ).fetchall()
+        return {r["habit_id"]: bool(r["is_completed"]) for r in rows}
+
+    def streaks_for_habits(
+        self, habit_ids: Optional[Iterable[int]] = None
+    ) -> Dict[int, Tuple[int, int]]:
+        """读取多个习惯的 (当前连续, 最长连续)，直接取自 habit_streaks 缓存。
+
+        缓存缺失的习惯（旧库升级、新建习惯）会先按历史记录重建再返回。
+        """
+        where, params = _habit_filter(habit_ids, column="h.id")
+        sql = f"""
+            SELECT h.id AS habit_id, s.current_streak, s.longest_streak
+            FROM habits h LEFT JOIN habit_streaks s ON s.habit_id = h.id
+            WHERE 1=1 {where}
+        """
+        rows = self.db.read_cursor().execute(sql, params).fetchall()
+        missing = [r["habit_id"] for r in rows if r["current_streak"] is None]
+        if missing:
+            self.rebuild_streaks(missing)
+            rows = self.db.read_cursor().execute(sql, params).fetchall()
+        return {r["habit_id"]: (r["current_streak"], r["longest_streak"]) for r in rows}
+
+    def get_streak(self, habit_id: int) -> Tuple[int, int]:
+        return self.streaks_for_habits([habit_id]).get(habit_id, (0, 0))
+
+    def rebuild_caches(self, habit_ids: Optional[Iterable[int]] = None) -> None:
+        """重建由打卡记录派生的全部缓存（连续打卡、完成位图、每周汇总），用于导入等批量写入之后。"""
+        if habit_ids is not None:
+            habit_ids = list(habit_ids)
+        with self.db.transaction():
+            self.rebuild_streaks(habit_ids)
+            self.bitmaps.rebuild(habit_ids)
+            self.weekly.rebuild(habit_ids)
+
+    def rebuild_streaks(self, habit_ids: Optional[Iterable[int]] = None) -> None:
+        """按历史记录重建连续打卡缓存，用于旧库升级、补录历史与导入后。
+
+        habit_ids 为 None 时重建全部习惯；按 (habit_id, date) 顺序分块读取，内存占用与历史长度无关。
+        """
+        if habit_ids is not None:
+            habit_ids = list(habit_ids)
+        where, params = _habit_filter(habit_ids, column="id")
+        with self.db.transaction() as conn:
+            targets = [r["id"] for r in conn.execute(f"SELECT id FROM habits WHERE 1=1 {where}", params)]
+            states = {habit_id: HabitStreak(habit_id=habit_id) for habit_id in targets}
+
+            where, params = _habit_filter(targets)
+            reader = conn.execute(
+                f"""
+                SELECT habit_id, date, is_completed FROM habit_records
+                WHERE 1=1 {where}
+                ORDER BY habit_id, date
+                """,
+                params,
+            )
+            while True:
+                rows = reader.fetchmany(STREAK_REBUILD_CHUNK)
+                if not rows:
+                    break
+                for habit_id, date, is_completed in rows:
+                    _advance_streak(states[habit_id], dt.date.fromisoformat(date), bool(is_completed))
+
+            conn.executemany(
+                """
+                INSERT OR REPLACE INTO habit_streaks(
+                    habit_id, last_date, last_completed, base_run, base_longest, current_streak, longest_streak
+                ) VALUES(?, ?, ?, ?, ?, ?, ?)
+                """,
+                [_streak_params(state) for state in states.values()],
+            )
+
+    def _update_streak(self, habit_id: int, date: dt.date, is_completed: bool) -> None:
+        """写入打卡后增量维护连续打卡缓存，不提交事务。
+
+        写入日期不早于最后一条记录时 O(1) 推进；补录更早的日期则重建该习惯。
+        """
+        cursor = self.db.cursor()
+        row = cursor.execute("SELECT * FROM habit_streaks WHERE habit_id=?", (habit_id,)).fetchone()
+        state = _row_to_streak(row) if row else None
+        if state is None or (state.last_date is not None and date < state.last_date):
+            self.rebuild_streaks([habit_id])
+            return
+        _advance_streak(state, date, is_completed)
+        cursor.execute(
+            """
+            UPDATE habit_streaks SET
+                last_date=?, last_completed=?, base_run=?, base_longest=?, current_streak=?, longest_streak=?
+            WHERE habit_id=?
+            """,
+            (*_streak_params(state)[1:], habit_id),
+        )
+
     def fetch_by_habit_and_range(
         self, habit_id: int, start: dt.date, end: dt.date
     ) -> List[HabitRecord]:
-        rows = self.db.cursor().execute(
-            """
-            SELECT * FROM habit_records
+        cursor = self.db.read_cursor()
+        cursor.row_factory = None
+        rows = cursor.execute(
+            f"""
+            SELECT {_RECORD_COLUMNS} FROM habit_records
             WHERE habit_id=? AND date BETWEEN ? AND ?
             ORDER BY date ASC
             """,
             (habit_id, iso_date(start), iso_date(end)),
         ).fetchall()
-        return [
-            HabitRecord(
-                id=r["id"],
-                habit_id=r["habit_id"],
-                date=dt.date.fromisoformat(r["date"]),
-                is_completed=bool(r["is_completed"]),
-                note=r["note"],
-                recorded_at=dt.datetime.fromisoformat(r["recorded_at"]),
-            )
-            for r in rows
-        ]
+        return [_row_to_record(r) for r in rows]
+
+    def fetch_record_tuples(
+        self, habit_id: int, start: dt.date, end: dt.date
+    ) -> List[RecordTuple]:
+        """与 fetch_by_habit_and_range 相同的范围，但只返回 (habit_id, date, is_completed)。"""
+        return list(self.iter_record_tuples([habit_id], start, end))
+
+    def iter_record_tuples(
+        self,
+        habit_ids: Optional[Iterable[int]] = None,
+        start: Optional[dt.date] = None,
+        end: Optional[dt.date] = None,
+        chunk_size: int = STREAK_REBUILD_CHUNK,
+    ) -> Iterator[RecordTuple]:
+        """按 (habit_id, date) 顺序分块产出轻量记录，供统计等只读路径使用。
+
+        不读取 note/recorded_at、不构造 HabitRecord，内存占用与历史长度无关。
+        """
+        where, params = _habit_filter(habit_ids)
+        if start is not None:
+            where += " AND date >= ?"
+            params.append(iso_date(start))
+        if end is not None:
+            where += " AND date <= ?"
+            params.append(iso_date(end))
+        cursor = self.db.read_cursor()
+        cursor.row_factory = None
+        cursor.execute(
+            f"""
+            SELECT habit_id, date, is_completed FROM habit_records
+            WHERE 1=1 {where}
+            ORDER BY habit_id, date
+            """,
+            params,
+        )
+        # 不同习惯的记录日期大量重复，缓存解析结果可共享 date 对象，省去重复解析与内存
+        parsed: Dict[str, dt.date] = {}
+        from_iso = dt.date.fromisoformat
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                return
+            for habit_id, date, is_completed in rows:
+                day = parsed.get(date)
+                if day is None:
+                    day = parsed[date] = from_iso(date)
+                yield RecordTuple(habit_id, day, is_completed == 1)
 
     def stats_completed_count(self, habit_id: int, days: int) -> int:
         start = dt.date.today() - dt.timedelta(days=days - 1)
-        row = self.db.cursor().execute(
+        row = self.db.read_cursor().execute(
             """
             SELECT COUNT(*) as cnt FROM habit_records
             WHERE habit_id=? AND date>=? AND is_completed=1
@@ -90,8 +255,38 @@ class HabitRecordRepository:
         ).fetchone()
         return row["cnt"] if row else 0
 
+    def completed_counts(
+        self,
+        windows: Sequence[int],
+        habit_ids: Optional[Iterable[int]] = None,
+        today: Optional[dt.date] = None,
+    ) -> Dict[int, Dict[int, int]]:
+        """一条分组 SQL 统计多个习惯在多个最近 N 天窗口内的完成天数。
+
+        返回 {habit_id: {days: completed}}，窗口口径与 stats_completed_count 一致；
+        没有完成记录的习惯不出现在结果中。
+        """
+        windows = [days for days in dict.fromkeys(windows) if days > 0]
+        if not windows:
+            return {}
+        today = today or dt.date.today()
+        starts = [iso_date(today - dt.timedelta(days=days - 1)) for days in windows]
+        columns = ", ".join(f"SUM(date >= ?) AS w{i}" for i in range(len(windows)))
+        where, params = _habit_filter(habit_ids)
+        rows = self.db.read_cursor().execute(
+            f"""
+            SELECT habit_id, {columns} FROM habit_records
+            WHERE is_completed=1 AND date >= ? {where}
+            GROUP BY habit_id
+            """,
+            [*starts, min(starts), *params],
+        ).fetchall()
+        return {
+            r["habit_id"]: {days: r[f"w{i}"] for i, days in enumerate(windows)} for r in rows
+        }
+
     def fetch_recent_dates(self, habit_id: int, limit: int = 30) -> Dict[str, bool]:
-        rows = self.db.cursor().execute(
+        rows = self.db.read_cursor().execute(
             """
             SELECT date, is_completed FROM habit_records
             WHERE habit_id=?
@@ -101,23 +296,79 @@ class HabitRecordRepository:
         ).fetchall()
         return {r["date"]: bool(r["is_completed"]) for r in rows}
 
-    def all_by_habit(self, habit_id: int):
-        rows = self.db.cursor().execute(
-            """
-            SELECT * FROM habit_records
+    def all_by_habit(self, habit_id: int) -> List[HabitRecord]:
+        cursor = self.db.read_cursor()
+        cursor.row_factory = None
+        rows = cursor.execute(
+            f"""
+            SELECT {_RECORD_COLUMNS} FROM habit_records
             WHERE habit_id=?
             ORDER BY date ASC
             """,
             (habit_id,),
         ).fetchall()
-        return [
-            HabitRecord(
-                id=r["id"],
-                habit_id=r["habit_id"],
-                date=dt.date.fromisoformat(r["date"]),
-                is_completed=bool(r["is_completed"]),
-                note=r["note"],
-                recorded_at=dt.datetime.fromisoformat(r["recorded_at"]),
-            )
-            for r in rows
-        ]
+        return [_row_to_record(r) for r in rows]
+
+
+def _habit_filter(
+    habit_ids: Optional[Iterable[int]], column: str = "habit_id"
+) -> Tuple[str, List[int]]:
+    """生成 column IN (...) 过滤子句；habit_ids 为 None 表示不过滤。"""
+    if habit_ids is None:
+        return "", []
+    ids = list(habit_ids)
+    if not ids:
+        return "AND 0", []
+    return f"AND {column} IN ({', '.join('?' * len(ids))})", ids
+
+
+def _row_to_record(row: Tuple) -> HabitRecord:
+    """按 _RECORD_COLUMNS 顺序的普通元组构造 HabitRecord（比 sqlite3.Row 按列名取值更快）。"""
+    record_id, habit_id, date, is_completed, note, recorded_at = row
+    return HabitRecord(
+        record_id,
+        habit_id,
+        dt.date.fromisoformat(date),
+        is_completed == 1,
+        note,
+        dt.datetime.fromisoformat(recorded_at),
+    )
+
+
+def _advance_streak(state: HabitStreak, date: dt.date, is_completed: bool) -> None:
+    """按日期升序推进一条记录，与逐条遍历的连续打卡算法等价。
+
+    date 必须不早于 state.last_date；等于时表示覆盖最后一天的状态。
+    """
+    if state.last_date is None or date > state.last_date:
+        if state.last_date is not None:
+            state.base_longest = max(state.base_longest, state.current_streak)
+            state.base_run = state.current_streak if (date - state.last_date).days == 1 else 0
+        state.last_date = date
+    state.last_completed = is_completed
+    state.current_streak = state.base_run + 1 if is_completed else 0
+    state.longest_streak = max(state.base_longest, state.current_streak)
+
+
+def _row_to_streak(row) -> HabitStreak:
+    return HabitStreak(
+        habit_id=row["habit_id"],
+        last_date=dt.date.fromisoformat(row["last_date"]) if row["last_date"] else None,
+        last_completed=bool(row["last_completed"]),
+        base_run=row["base_run"],
+        base_longest=row["base_longest"],
+        current_streak=row["current_streak"],
+        longest_streak=row["longest_streak"],
+    )
+
+
+def _streak_params(state: HabitStreak) -> Tuple:
+    return (
+        state.habit_id,
+        iso_date(state.last_date) if state.last_date else None,
+        1 if state.last_completed else 0,
+        state.base_run,
+        state.base_longest,
+        state.current_streak,
+        state.longest_streak,
+    )
@@ -0,0 +1,32 @@
+import datetime as dt
+from typing import List, Tuple
+
+from .database import Database
+
+# (id, 名称, 分类, 每周目标, 今日是否完成, 当前连续, 最长连续)；连续打卡缓存缺失时后两项为 None
+TodayRow = Tuple[int, str, str, int, bool, int, int]
+
+
+class HabitSummaryRepository:
+    """命令行等只读场景的汇总查询：一条 SQL 返回普通元组，不导入领域模型与 dataclasses。
+
+    结果与 HabitService.today_snapshot 一致（启用且未删除的习惯，按创建时间从新到旧）。
+    """
+
+    def __init__(self, db: Database):
+        self.db = db
+
+    def today_rows(self, date: dt.date) -> List[TodayRow]:
+        rows = self.db.read_cursor().execute(
+            """
+            SELECT h.id, h.name, h.category, h.target_per_week,
+                   COALESCE(r.is_completed, 0), s.current_streak, s.longest_streak
+            FROM habits h
+            LEFT JOIN habit_records r ON r.habit_id = h.id AND r.date = ?
+            LEFT JOIN habit_streaks s ON s.habit_id = h.id
+            WHERE h.enabled = 1 AND h.deleted_at IS NULL
+            ORDER BY h.created_at DESC
+            """,
+            (date.isoformat(),),
+        ).fetchall()
+        return [(r[0], r[1], r[2], r[3], bool(r[4]), r[5], r[6]) for r in rows]
@@ -0,0 +1,122 @@
+import datetime as dt
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..domain.models import WeeklyRollup
+from ..utils.dates import iso_date
+from .database import Database
+
+# SQLite 中把日期换算为所在 ISO 周的周一：先前进到周日（当天是周日则不动），再退 6 天
+_WEEK_START_SQL = "date({column}, 'weekday 0', '-6 days')"
+
+
+def week_start(date: dt.date) -> dt.date:
+    """date 所在 ISO 周的周一。"""
+    return date - dt.timedelta(days=date.weekday())
+
+
+class WeeklyRollupRepository:
+    """每周达标汇总（habit_weekly 表）的读写。
+
+    每个习惯每个 ISO 周一行，记录完成天数及是否达到 target_per_week；只有出现过打卡记录的周才有行，
+    缺失的周按 0 天计。由 HabitRecordRepository.upsert 在同一事务中维护，修改目标时由 HabitRepository.update 重算 met。
+    """
+
+    def __init__(self, db: Database):
+        self.db = db
+
+    def refresh_week(self, habit_id: int, date: dt.date) -> None:
+        """重新汇总 date 所在的一周（最多 7 条记录，走 (habit_id, date) 索引），不单独提交。"""
+        monday = week_start(date)
+        self.db.cursor().execute(
+            """
+            INSERT OR REPLACE INTO habit_weekly(habit_id, week_start, completed_days, met)
+            SELECT h.id, ?, w.completed, w.completed >= h.target_per_week
+            FROM habits h, (
+                SELECT COUNT(*) AS completed FROM habit_records
+                WHERE habit_id=? AND date BETWEEN ? AND ? AND is_completed=1
+            ) w
+            WHERE h.id=?
+            """,
+            (iso_date(monday), habit_id, iso_date(monday), iso_date(monday + dt.timedelta(days=6)), habit_id),
+        )
+
+    def retarget(self, habit_id: int, target_per_week: int) -> None:
+        """习惯目标变化后按新目标重算各周的 met，不单独提交。"""
+        self.db.cursor().execute(
+            "UPDATE habit_weekly SET met = completed_days >= ? WHERE habit_id=?",
+            (target_per_week, habit_id),
+        )
+
+    def rebuild(self, habit_ids: Optional[Iterable[int]] = None) -> None:
+        """按打卡记录重建周汇总，整个分组汇总在 SQLite 内完成。"""
+        from .record_repository import _habit_filter
+
+        if habit_ids is not None:
+            habit_ids = list(habit_ids)
+        where, params = _habit_filter(habit_ids)
+        record_where, record_params = _habit_filter(habit_ids, column="r.habit_id")
+        with self.db.transaction() as conn:
+            conn.execute(f"DELETE FROM habit_weekly WHERE 1=1 {where}", params)
+            conn.execute(
+                f"""
+                INSERT INTO habit_weekly(habit_id, week_start, completed_days, met)
+                SELECT r.habit_id, {_WEEK_START_SQL.format(column="r.date")} AS week, COUNT(*),
+                       COUNT(*) >= h.target_per_week
+                FROM habit_records r JOIN habits h ON h.id = r.habit_id
+                WHERE r.is_completed=1 {record_where}
+                GROUP BY r.habit_id, week
+                """,
+                record_params,
+            )
+
+    def fetch_range(
+        self, habit_ids: Optional[Iterable[int]], start: dt.date, end: dt.date
+    ) -> Dict[int, List[WeeklyRollup]]:
+        """读取 start..end 之间各周的汇总行（只含已有的行），按周升序。"""
+        from .record_repository import _habit_filter
+
+        where, params = _habit_filter(habit_ids)
+        cursor = self.db.read_cursor()
+        cursor.row_factory = None
+        rows = cursor.execute(
+            f"""
+            SELECT habit_id, week_start, completed_days, met FROM habit_weekly
+            WHERE week_start BETWEEN ? AND ? {where}
+            ORDER BY habit_id, week_start
+            """,
+            [iso_date(week_start(start)), iso_date(end), *params],
+        ).fetchall()
+        result: Dict[int, List[WeeklyRollup]] = {}
+        for habit_id, week, completed, met in rows:
+            result.setdefault(habit_id, []).append(
+                WeeklyRollup(habit_id, dt.date.fromisoformat(week), completed, met == 1)
+            )
+        return result
+
+    def met_runs(self, habit_ids: Optional[Iterable[int]] = None) -> Dict[int, List[Tuple[dt.date, int]]]:
+        """各习惯连续达标的周段，返回 {habit_id: [(最后一周的周一, 连续周数), ...]}，按时间升序。
+
+        用窗口函数在 SQLite 内分段（相邻达标周的周序号与行号之差相同），只返回段而不是每一周。
+        """
+        from .record_repository import _habit_filter
+
+        where, params = _habit_filter(habit_ids)
+        cursor = self.db.read_cursor()
+        cursor.row_factory = None
+        rows = cursor.execute(
+            f"""
+            SELECT habit_id, MAX(week_start), COUNT(*) FROM (
+                SELECT habit_id, week_start,
+                       CAST(julianday(week_start) / 7 AS INTEGER)
+                           - ROW_NUMBER() OVER (PARTITION BY habit_id ORDER BY week_start) AS grp
+                FROM habit_weekly WHERE met=1 {where}
+            )
+            GROUP BY habit_id, grp
+            ORDER BY habit_id, MAX(week_start)
+            """,
+            params,
+        ).fetchall()
+        result: Dict[int, List[Tuple[dt.date, int]]] = {}
+        for habit_id, last_week, length in rows:
+            result.setdefault(habit_id, []).append((dt.date.fromisoformat(last_week), length))
+        return result
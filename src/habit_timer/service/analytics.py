@@ -0,0 +1,204 @@
+import dataclasses
+import datetime as dt
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from ..domain.models import Habit
+from ..repository.habit_repository import HabitRepository
+from ..repository.record_repository import HabitRecordRepository
+from ..utils import dates
+from ..utils.bitset import CompletionBitmap, count_range
+
+try:  # NumPy 为可选依赖（pip install habit_timer[analytics]），缺失时使用纯 Python 实现
+    import numpy as np
+except ImportError:  # pragma: no cover - 取决于运行环境
+    np = None
+
+DEFAULT_WINDOWS = (7, 30, 90)
+DEFAULT_WEEKS = 12
+
+
+@dataclasses.dataclass(slots=True)
+class HabitMetrics:
+    """单个习惯的统计指标。
+
+    Attributes:
+        habit_id: 习惯主键。
+        current_streak: 当前连续（最后一条记录未完成时为 0），口径同 HabitService.compute_streaks。
+        longest_streak: 历史最长连续。
+        completed: {窗口天数: 最近 N 天（含今天）的完成天数}。
+        rates: {窗口天数: 完成率百分比，保留两位小数}。
+        weeks_met: 最近 weeks 个完整 ISO 周中达到 target_per_week 的周数。
+        weeks_total: 参与统计的周数（不含习惯起始周之前的周）。
+    """
+
+    habit_id: int
+    current_streak: int = 0
+    longest_streak: int = 0
+    completed: Dict[int, int] = dataclasses.field(default_factory=dict)
+    rates: Dict[int, float] = dataclasses.field(default_factory=dict)
+    weeks_met: int = 0
+    weeks_total: int = 0
+
+    @property
+    def weekly_attainment(self) -> float:
+        return round(self.weeks_met / self.weeks_total * 100, 2) if self.weeks_total else 0.0
+
+
+class AnalyticsService:
+    """一次性计算全部习惯的统计指标。
+
+    窗口计数与每周达标来自完成位图（一条查询）。有 NumPy 时把最近一段日期展开为 习惯 × 天 的 0/1 矩阵，
+    用累加和一次算出所有习惯的结果；否则逐个习惯做大整数位运算。两种实现结果一致。
+    连续打卡取自 habit_streaks 缓存（一条查询）：“最后一条记录未完成时为 0”需要未完成的记录，位图中没有。
+    """
+
+    def __init__(self, habit_repo: HabitRepository, record_repo: HabitRecordRepository):
+        self.habit_repo = habit_repo
+        self.record_repo = record_repo
+
+    def compute(
+        self,
+        habit_ids: Optional[Iterable[int]] = None,
+        windows: Sequence[int] = DEFAULT_WINDOWS,
+        weeks: int = DEFAULT_WEEKS,
+        today: Optional[dt.date] = None,
+        use_numpy: Optional[bool] = None,
+    ) -> Dict[int, HabitMetrics]:
+        """返回 {habit_id: HabitMetrics}；habit_ids 为 None 时统计全部启用的习惯。
+
+        use_numpy 为 None 时自动选择，False 强制使用纯 Python 实现。
+        """
+        habits = self.habit_repo.list_all(enabled_only=True)
+        if habit_ids is not None:
+            wanted = set(habit_ids)
+            habits = [h for h in habits if h.id in wanted]
+        return self.compute_for(habits, windows, weeks, today, use_numpy)
+
+    def compute_for(
+        self,
+        habits: List[Habit],
+        windows: Sequence[int] = DEFAULT_WINDOWS,
+        weeks: int = DEFAULT_WEEKS,
+        today: Optional[dt.date] = None,
+        use_numpy: Optional[bool] = None,
+    ) -> Dict[int, HabitMetrics]:
+        """同 compute，但由调用方提供已查询的习惯列表。"""
+        if not habits:
+            return {}
+        today = today or dates.today_date()
+        windows = [days for days in dict.fromkeys(windows) if days > 0]
+        habit_ids = [h.id for h in habits]
+        bitmaps = self.record_repo.bitmaps.load(habit_ids)
+        if use_numpy is None:
+            use_numpy = np is not None
+        if use_numpy:
+            if np is None:
+                raise RuntimeError("未安装 NumPy")
+            results = _compute_numpy(habits, bitmaps, windows, weeks, today)
+        else:
+            results = _compute_python(habits, bitmaps, windows, weeks, today)
+        for habit_id, (current, longest) in self.record_repo.streaks_for_habits(habit_ids).items():
+            if habit_id in results:
+                results[habit_id].current_streak = current
+                results[habit_id].longest_streak = longest
+        return results
+
+
+def _last_full_weeks(today: dt.date, weeks: int) -> List[dt.date]:
+    """最近 weeks 个完整 ISO 周的周一，从早到晚。"""
+    this_monday = today - dt.timedelta(days=today.weekday())
+    return [this_monday - dt.timedelta(weeks=weeks - i) for i in range(weeks)]
+
+
+def _rate(completed: int, days: int) -> float:
+    return round(completed / days * 100, 2)
+
+
+def _compute_python(
+    habits: List[Habit],
+    bitmaps: Dict[int, CompletionBitmap],
+    windows: List[int],
+    weeks: int,
+    today: dt.date,
+) -> Dict[int, HabitMetrics]:
+    mondays = _last_full_weeks(today, weeks)
+    results = {}
+    for habit in habits:
+        metrics = HabitMetrics(habit.id)
+        results[habit.id] = metrics
+        bitmap = bitmaps.get(habit.id)
+        if bitmap is None:
+            metrics.completed = {days: 0 for days in windows}
+            metrics.rates = {days: 0.0 for days in windows}
+            continue
+        bits = bitmap.as_int()
+        t = bitmap.index(today)
+        for days in windows:
+            metrics.completed[days] = count_range(bits, t - days + 1, t)
+            metrics.rates[days] = _rate(metrics.completed[days], days)
+        origin_monday = bitmap.origin - dt.timedelta(days=bitmap.origin.weekday())
+        for monday in mondays:
+            if monday < origin_monday:
+                continue
+            start = bitmap.index(monday)
+            metrics.weeks_total += 1
+            if count_range(bits, start, start + 6) >= habit.target_per_week:
+                metrics.weeks_met += 1
+    return results
+
+
+def _compute_numpy(
+    habits: List[Habit],
+    bitmaps: Dict[int, CompletionBitmap],
+    windows: List[int],
+    weeks: int,
+    today: dt.date,
+) -> Dict[int, HabitMetrics]:
+    # 窗口与每周达标只涉及最近一段日期：截取这段位（起点对齐到周一，使每 7 列恰好是一个 ISO 周），
+    # 拼成 习惯 × 天 的 0/1 矩阵后一次算完。
+    this_monday = today - dt.timedelta(days=today.weekday())
+    earliest = min(today - dt.timedelta(days=max(windows, default=1) - 1), this_monday - dt.timedelta(weeks=weeks))
+    start = earliest - dt.timedelta(days=earliest.weekday())
+    span = (today - start).days + 1
+    width = (span + 7) // 8
+    mask = (1 << span) - 1
+    chunks = []
+    first_week = np.full(len(habits), span, dtype=np.int64)
+    for row, habit in enumerate(habits):
+        bitmap = bitmaps.get(habit.id)
+        if bitmap is None:
+            chunks.append(bytes(width))
+            continue
+        bits = bitmap.as_int()
+        offset = bitmap.index(start)
+        window = bits >> offset if offset >= 0 else bits << -offset
+        chunks.append((window & mask).to_bytes(width, "little"))
+        first_week[row] = (bitmap.origin - start).days // 7
+    packed = np.frombuffer(b"".join(chunks), dtype=np.uint8).reshape(len(habits), width)
+    matrix = np.unpackbits(packed, axis=1, bitorder="little")[:, :span]
+
+    csum = np.cumsum(matrix, axis=1, dtype=np.int32)
+    padded = np.concatenate([np.zeros((len(habits), 1), dtype=csum.dtype), csum], axis=1)
+    completed = {days: padded[:, -1] - padded[:, span - days] for days in windows}
+
+    # 每周完成天数：今天所在的周尚未结束，只取之前的 weeks 个完整周
+    full_weeks = (span - 1) // 7
+    weekly = matrix[:, : full_weeks * 7].reshape(len(habits), full_weeks, 7).sum(axis=2)
+    week_index = np.arange(full_weeks)
+    recent = week_index >= full_weeks - weeks
+    eligible = recent[None, :] & (week_index[None, :] >= first_week[:, None])
+    targets = np.array([h.target_per_week for h in habits])[:, None]
+    met = ((weekly >= targets) & eligible).sum(axis=1)
+    total = eligible.sum(axis=1)
+
+    results = {}
+    for row, habit in enumerate(habits):
+        counts = {days: int(completed[days][row]) for days in windows}
+        results[habit.id] = HabitMetrics(
+            habit_id=habit.id,
+            completed=counts,
+            rates={days: _rate(counts[days], days) for days in windows},
+            weeks_met=int(met[row]),
+            weeks_total=int(total[row]),
+        )
+    return results
@@ -0,0 +1,70 @@
+import asyncio
+import functools
+from concurrent.futures import Executor
+from typing import Any, Callable, Optional
+
+
+class AsyncService:
+    """同步服务的异步外观：公开方法变为协程，在线程池中执行仓储工作。
+
+    例如 ``await AsyncService(habit_service, executor).today_snapshot()``。
+    非方法属性原样返回；以下划线开头的成员不暴露。
+    """
+
+    def __init__(self, service: Any, executor: Executor):
+        self._service = service
+        self._executor = executor
+
+    @property
+    def service(self) -> Any:
+        """被包装的同步服务。"""
+        return self._service
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        attr = getattr(self._service, name)
+        if not callable(attr):
+            return attr
+        executor = self._executor
+
+        @functools.wraps(attr)
+        async def call(*args, **kwargs):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, functools.partial(attr, *args, **kwargs))
+
+        return call
+
+
+class LatestTask:
+    """只保留最新的一次请求：调度新协程时取消尚未完成的旧协程。
+
+    被取消的协程不会再回写 UI；已提交到线程池的仓储调用会执行完，但结果被丢弃。
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    def run(self, coro) -> asyncio.Task:
+        self.cancel()
+        self._task = asyncio.get_event_loop().create_task(coro)
+        return self._task
+
+    def cancel(self) -> None:
+        if self._task and not self._task.done():
+            self._task.cancel()
+        self._task = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+
+def threadsafe_callback(callback: Callable[..., None]) -> Callable[..., None]:
+    """把回调转发到当前事件循环线程执行，用于从线程池中回报进度。"""
+    loop = asyncio.get_running_loop()
+
+    def forward(*args) -> None:
+        loop.call_soon_threadsafe(callback, *args)
+
+    return forward
@@ -1,12 +1,55 @@
-import json
+import dataclasses
+import datetime as dt
+import os
+import sqlite3
 from pathlib import Path
-from typing import Dict, List
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
-from ..domain.models import AppConfig, Habit, HabitRecord, PomodoroSession
+from ..domain.events import DataReloaded
 from ..repository.config_repository import ConfigRepository
 from ..repository.habit_repository import HabitRepository
 from ..repository.pomodoro_repository import PomodoroRepository
 from ..repository.record_repository import HabitRecordRepository
+from ..utils.dates import epoch_from_iso
+from .event_bus import EventBus
+
+# 进度回调：(已处理行数, 总行数)
+ProgressCallback = Callable[[int, int], None]
+
+# 导出时每次从游标读取的行数，决定内存占用上限
+EXPORT_CHUNK_SIZE = 1000
+# 导入时每批 executemany 的行数，每批一个事务
+IMPORT_BATCH_SIZE = 1000
+# 导入文件超过该大小时默认推迟二级索引维护
+DEFER_INDEX_BYTES = 16 * 1024 * 1024
+# 导入报告中最多保留的逐行错误条数
+MAX_REPORTED_ERRORS = 1000
+
+
+class BackupCancelled(Exception):
+    """导出/导入被调用方取消。"""
+
+
+@dataclasses.dataclass
+class ImportReport:
+    """导入结果。
+
+    Attributes:
+        inserted: 各分区实际写入的行数。
+        skipped: 因主键/唯一约束冲突被跳过的行数。
+        error_count: 出错的行数。
+        errors: (分区, 分区内序号, 原因)，最多保留 MAX_REPORTED_ERRORS 条。
+    """
+
+    inserted: Dict[str, int] = dataclasses.field(default_factory=dict)
+    skipped: int = 0
+    error_count: int = 0
+    errors: List[Tuple[str, int, str]] = dataclasses.field(default_factory=list)
+
+    def add_error(self, section: str, index: int, message: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((section, index, message))
 
 
 class BackupService:
@@ -18,139 +61,542 @@ class BackupService:
         record_repo: HabitRecordRepository,
         pomodoro_repo: PomodoroRepository,
         config_repo: ConfigRepository,
+        events: Optional[EventBus] = None,
     ):
         self.habit_repo = habit_repo
         self.record_repo = record_repo
         self.pomodoro_repo = pomodoro_repo
         self.config_repo = config_repo
+        self.events = events or EventBus()
 
-    def export_to_file(self, path: str | Path) -> None:
-        data = {
-            "habits": [self._habit_to_dict(h) for h in self.habit_repo.list_all(include_deleted=True)],
-            "habit_records": [self._record_to_dict(r) for h in self.habit_repo.list_all(include_deleted=True) for r in self.record_repo.all_by_habit(h.id)],
-            "pomodoros": [self._pomodoro_to_dict(p) for p in self.pomodoro_repo.recent_sessions(10000)],
-            "config": self._config_to_dict(self.config_repo.load()),
-        }
-        Path(path).write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
-
-    def import_from_file(self, path: str | Path, merge_strategy: str = "append") -> None:
-        content = Path(path).read_text(encoding="utf-8")
-        data = json.loads(content)
-        conn = self.habit_repo.db.connect()
-        cursor = conn.cursor()
-        if merge_strategy == "replace":
-            cursor.execute("DELETE FROM habit_records")
-            cursor.execute("DELETE FROM pomodoro_sessions")
-            cursor.execute("DELETE FROM habits")
-        # 先导入 habits
-        for h in data.get("habits", []):
-            cursor.execute(
-                """
-                INSERT INTO habits(id, name, description, category, target_per_week, enabled, created_at, deleted_at)
-                VALUES(?, ?, ?, ?, ?, ?, ?, ?)
-                ON CONFLICT(id) DO NOTHING
-                """,
-                (
-                    h.get("id"),
-                    h["name"],
-                    h.get("description", ""),
-                    h.get("category", "其它"),
-                    h.get("target_per_week", 7),
-                    1 if h.get("enabled", True) else 0,
-                    h.get("created_at"),
-                    h.get("deleted_at"),
-                ),
-            )
-        # 导入 habit_records
-        for r in data.get("habit_records", []):
-            cursor.execute(
-                """
-                INSERT OR IGNORE INTO habit_records(id, habit_id, date, is_completed, note, recorded_at)
-                VALUES(?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    r.get("id"),
-                    r["habit_id"],
-                    r["date"],
-                    1 if r.get("is_completed") else 0,
-                    r.get("note", ""),
-                    r.get("recorded_at"),
-                ),
-            )
-        # 导入番茄
-        for p in data.get("pomodoros", []):
-            cursor.execute(
-                """
-                INSERT OR IGNORE INTO pomodoro_sessions(id, habit_id, start_time, end_time, duration_seconds, status)
-                VALUES(?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    p.get("id"),
-                    p.get("habit_id"),
-                    p.get("start_time"),
-                    p.get("end_time"),
-                    p.get("duration_seconds", 0),
-                    p.get("status", "completed"),
-                ),
-            )
-        # 配置覆盖
-        cfg = data.get("config")
-        if cfg:
-            cursor.execute(
-                """
-                INSERT INTO app_config(id, work_minutes, short_break_minutes, long_break_minutes, long_break_interval)
-                VALUES(1, ?, ?, ?, ?)
-                ON CONFLICT(id) DO UPDATE SET
-                    work_minutes=excluded.work_minutes,
-                    short_break_minutes=excluded.short_break_minutes,
-                    long_break_minutes=excluded.long_break_minutes,
-                    long_break_interval=excluded.long_break_interval
-                """,
-                (
-                    cfg.get("work_minutes", 25),
-                    cfg.get("short_break_minutes", 5),
-                    cfg.get("long_break_minutes", 15),
-                    cfg.get("long_break_interval", 4),
-                ),
-            )
-        conn.commit()
-
-    def _habit_to_dict(self, habit: Habit) -> Dict:
-        return {
-            "id": habit.id,
-            "name": habit.name,
-            "description": habit.description,
-            "category": habit.category,
-            "target_per_week": habit.target_per_week,
-            "enabled": habit.enabled,
-            "created_at": habit.created_at.isoformat(),
-            "deleted_at": habit.deleted_at.isoformat() if habit.deleted_at else None,
-        }
+    def export_to_file(
+        self,
+        path: str | Path,
+        habit_ids: Optional[Iterable[int]] = None,
+        start: Optional[dt.date] = None,
+        end: Optional[dt.date] = None,
+        fmt: Optional[str] = None,
+        progress: Optional[ProgressCallback] = None,
+        cancel_event=None,
+        chunk_size: int = EXPORT_CHUNK_SIZE,
+    ) -> int:
+        """流式导出数据，内存占用与数据量无关，返回导出的行数。
 
-    def _record_to_dict(self, record: HabitRecord) -> Dict:
-        return {
-            "id": record.id,
-            "habit_id": record.habit_id,
-            "date": record.date.isoformat(),
-            "is_completed": record.is_completed,
-            "note": record.note,
-            "recorded_at": record.recorded_at.isoformat() if record.recorded_at else None,
-        }
+        Args:
+            path: 目标文件，先写临时文件，成功后原子替换。
+            habit_ids: 仅导出这些习惯及其记录/番茄，None 表示全部。
+            start/end: 记录与番茄的日期范围（含两端），None 表示不限。
+            fmt: "json" 或 "ndjson"，默认按扩展名判断（.ndjson/.jsonl 为 NDJSON）。
+            progress: 每写完一块回调一次。
+            cancel_event: 具有 is_set() 的对象（如 threading.Event），置位后抛出 BackupCancelled。
+        """
+        path = Path(path)
+        fmt = fmt or ("ndjson" if path.suffix.lower() in (".ndjson", ".jsonl") else "json")
+        if fmt not in ("json", "ndjson"):
+            raise ValueError(f"不支持的导出格式: {fmt}")
+        habit_ids = list(habit_ids) if habit_ids is not None else None
+        sections = self._export_queries(habit_ids, start, end)
+        tmp_path = path.with_name(path.name + ".tmp")
+        written = 0
+        try:
+            # 所有查询在同一读事务内执行，导出期间的写入不会造成前后不一致
+            with self.habit_repo.db.read_transaction() as conn, tmp_path.open(
+                "w", encoding="utf-8"
+            ) as fp:
+                total = sum(
+                    conn.execute(f"SELECT COUNT(*) {from_where}", params).fetchone()[0]
+                    for _, _, _, from_where, params in sections
+                )
+                writer = _NdjsonWriter(fp) if fmt == "ndjson" else _JsonWriter(fp)
+                for section, kind, columns, from_where, params in sections:
+                    writer.begin_section(section)
+                    cursor = conn.execute(f"SELECT {columns} {from_where} ORDER BY id", params)
+                    while True:
+                        if cancel_event is not None and cancel_event.is_set():
+                            raise BackupCancelled()
+                        rows = cursor.fetchmany(chunk_size)
+                        if not rows:
+                            break
+                        for row in rows:
+                            writer.write_item(kind, _ROW_CONVERTERS[section](row))
+                        written += len(rows)
+                        if progress:
+                            progress(written, total)
+                    writer.end_section()
+                config = conn.execute("SELECT * FROM app_config WHERE id=1").fetchone()
+                if config:
+                    writer.write_config(self._config_row_to_dict(config))
+                writer.close()
+            os.replace(tmp_path, path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        return written
 
-    def _pomodoro_to_dict(self, p: PomodoroSession) -> Dict:
-        return {
-            "id": p.id,
-            "habit_id": p.habit_id,
-            "start_time": p.start_time.isoformat(),
-            "end_time": p.end_time.isoformat() if p.end_time else None,
-            "duration_seconds": p.duration_seconds,
-            "status": p.status,
-        }
+    def _export_queries(
+        self,
+        habit_ids: Optional[List[int]],
+        start: Optional[dt.date],
+        end: Optional[dt.date],
+    ) -> List[Tuple[str, str, str, str, List]]:
+        """生成各分区的 (名称, NDJSON 类型, 列, FROM/WHERE, 参数)。"""
+        habit_in = ""
+        if habit_ids is not None:
+            habit_in = f"IN ({', '.join('?' * len(habit_ids))})" if habit_ids else "IN (NULL)"
+
+        habit_clauses, habit_params = [], []
+        if habit_ids is not None:
+            habit_clauses.append(f"id {habit_in}")
+            habit_params += habit_ids
+
+        record_clauses, record_params = [], []
+        pomodoro_clauses, pomodoro_params = [], []
+        if habit_ids is not None:
+            record_clauses.append(f"habit_id {habit_in}")
+            record_params += habit_ids
+            pomodoro_clauses.append(f"habit_id {habit_in}")
+            pomodoro_params += habit_ids
+        if start:
+            record_clauses.append("date >= ?")
+            record_params.append(start.isoformat())
+            pomodoro_clauses.append("start_time >= ?")
+            pomodoro_params.append(start.isoformat())
+        if end:
+            record_clauses.append("date <= ?")
+            record_params.append(end.isoformat())
+            pomodoro_clauses.append("start_time < ?")
+            pomodoro_params.append((end + dt.timedelta(days=1)).isoformat())
+
+        def from_where(table: str, clauses: List[str]) -> str:
+            where = "WHERE " + " AND ".join(clauses) if clauses else ""
+            return f"FROM {table} {where}"
 
-    def _config_to_dict(self, cfg: AppConfig) -> Dict:
+        return [
+            (
+                "habits",
+                "habit",
+                "id, name, description, category, target_per_week, enabled, created_at, deleted_at",
+                from_where("habits", habit_clauses),
+                habit_params,
+            ),
+            (
+                "habit_records",
+                "habit_record",
+                "id, habit_id, date, is_completed, note, recorded_at",
+                from_where("habit_records", record_clauses),
+                record_params,
+            ),
+            (
+                "pomodoros",
+                "pomodoro",
+                "id, habit_id, start_time, end_time, duration_seconds, status",
+                from_where("pomodoro_sessions", pomodoro_clauses),
+                pomodoro_params,
+            ),
+        ]
+
+    def import_from_file(
+        self,
+        path: str | Path,
+        merge_strategy: str = "append",
+        fmt: Optional[str] = None,
+        batch_size: int = IMPORT_BATCH_SIZE,
+        progress: Optional[ProgressCallback] = None,
+        cancel_event=None,
+        defer_indexes: Optional[bool] = None,
+    ) -> ImportReport:
+        """流式导入 JSON/NDJSON 备份，返回导入报告。
+
+        边解析边按 batch_size 分批 executemany；单行失败只记入报告，不影响同批其它行。
+        append 策略每批一个事务：取消、文件截断或格式错误时未提交的批次被回滚，已提交的批次保留。
+        replace 策略的清空与全部批次在同一个事务中（各批为 SAVEPOINT），任何异常或取消都整体回滚，
+        原有数据保持不变。
+
+        Args:
+            merge_strategy: "append" 追加（主键冲突的行跳过）；"replace" 先清空再导入。
+            fmt: "json" 或 "ndjson"，默认按扩展名判断。
+            progress: 回调 (已读字节数, 文件总字节数)。
+            defer_indexes: 导入期间删除二级索引、结束后重建；默认文件较大时启用。
+        """
+        path = Path(path)
+        fmt = fmt or ("ndjson" if path.suffix.lower() in (".ndjson", ".jsonl") else "json")
+        if fmt not in ("json", "ndjson"):
+            raise ValueError(f"不支持的导入格式: {fmt}")
+        if merge_strategy not in ("append", "replace"):
+            raise ValueError(f"不支持的合并策略: {merge_strategy}")
+        total_bytes = path.stat().st_size
+        if defer_indexes is None:
+            defer_indexes = total_bytes >= DEFER_INDEX_BYTES
+        db = self.habit_repo.db
+        report = ImportReport()
+        state = _ImportState()
+
+        # 导入期间独占写连接，分批提交之间不会插入其它写操作
+        with db.write_lock:
+            # 先提交等待组提交的写入，避免它们与导入同属一个事务而随导入失败一起回滚
+            db.flush()
+            if merge_strategy == "replace":
+                with db.transaction() as conn:
+                    conn.execute("DELETE FROM habit_streaks")
+                    conn.execute("DELETE FROM habit_records")
+                    conn.execute("DELETE FROM pomodoro_sessions")
+                    conn.execute("DELETE FROM habits")
+                    if defer_indexes:
+                        db.drop_secondary_indexes()
+                    self._read_import(path, fmt, report, state, batch_size, progress, cancel_event, total_bytes)
+                    if defer_indexes:
+                        db.create_secondary_indexes()
+                    self.record_repo.rebuild_caches()
+                    self.pomodoro_repo.rebuild_daily()
+                self.events.publish(DataReloaded("import"))
+            else:
+                if defer_indexes:
+                    db.drop_secondary_indexes()
+                try:
+                    self._read_import(path, fmt, report, state, batch_size, progress, cancel_event, total_bytes)
+                finally:
+                    if defer_indexes:
+                        db.create_secondary_indexes()
+                    # 导入的记录可能早于已有记录，重建受影响习惯的连续打卡缓存与完成位图
+                    self.record_repo.rebuild_caches(state.touched_habits)
+                    if state.first_epoch is not None:
+                        self.pomodoro_repo.rebuild_daily(
+                            dt.datetime.fromtimestamp(state.first_epoch).date(),
+                            dt.datetime.fromtimestamp(state.last_epoch).date(),
+                        )
+                    # 取消或出错时已提交的批次同样生效，视图都需要重新加载
+                    self.events.publish(DataReloaded("import"))
+        if progress:
+            progress(total_bytes, total_bytes)
+        return report
+
+    def _read_import(
+        self,
+        path: Path,
+        fmt: str,
+        report: ImportReport,
+        state: "_ImportState",
+        batch_size: int,
+        progress: Optional[ProgressCallback],
+        cancel_event,
+        total_bytes: int,
+    ) -> None:
+        """解析文件并分批写入，受影响的习惯与番茄时间范围记入 state。"""
+        pending: Dict[str, List[Tuple[int, Tuple]]] = {section: [] for section in _IMPORT_SQL}
+        counters: Dict[str, int] = {}
+        config = None
+        with path.open("rb") as fp:
+            if fmt == "ndjson":
+                reader = _NdjsonReader(fp, report)
+            else:
+                from ..utils.json_stream import JsonObjectStream
+
+                reader = JsonObjectStream(fp)
+            for section, item in reader.items():
+                index = counters[section] = counters.get(section, 0) + 1
+                if section == "config":
+                    if isinstance(item, dict):
+                        config = item
+                    continue
+                if section not in _IMPORT_SQL:
+                    continue
+                try:
+                    params = _IMPORT_PARAMS[section](item)
+                except (AttributeError, KeyError, TypeError, ValueError) as exc:
+                    report.add_error(section, index, f"字段无效: {exc!r}")
+                    continue
+                pending[section].append((index, params))
+                if section == "habit_records":
+                    state.touched_habits.add(params[1])
+                elif section == "pomodoros" and params[6] is not None:
+                    state.add_epoch(params[6])
+                if len(pending[section]) >= batch_size:
+                    self._flush_import_batch(pending, report)
+                    if cancel_event is not None and cancel_event.is_set():
+                        raise BackupCancelled()
+                    if progress:
+                        progress(reader.bytes_read, total_bytes)
+        self._flush_import_batch(pending, report, config)
+
+    def _flush_import_batch(
+        self,
+        pending: Dict[str, List[Tuple[int, Tuple]]],
+        report: ImportReport,
+        config: Optional[Dict] = None,
+    ) -> None:
+        """在一个工作单元中按依赖顺序（习惯 → 记录/番茄）写入当前批次。
+
+        不在外层事务中时立即提交；replace 导入的外层事务中只是一个 SAVEPOINT。
+        """
+        db = self.habit_repo.db
+        with db.transaction() as conn:
+            for section, sql in _IMPORT_SQL.items():
+                rows = pending[section]
+                if not rows:
+                    continue
+                failed = 0
+                before = conn.total_changes
+                conn.execute("SAVEPOINT import_batch")
+                try:
+                    conn.executemany(sql, [params for _, params in rows])
+                except sqlite3.Error:
+                    # 批量失败时回退到逐行写入，定位并跳过出错的行
+                    conn.execute("ROLLBACK TO import_batch")
+                    before = conn.total_changes
+                    for index, params in rows:
+                        try:
+                            conn.execute(sql, params)
+                        except sqlite3.Error as exc:
+                            failed += 1
+                            report.add_error(section, index, str(exc))
+                conn.execute("RELEASE import_batch")
+                inserted = conn.total_changes - before
+                report.inserted[section] = report.inserted.get(section, 0) + inserted
+                report.skipped += len(rows) - inserted - failed
+                rows.clear()
+            if config:
+                conn.execute(
+                    """
+                    INSERT INTO app_config(id, work_minutes, short_break_minutes, long_break_minutes, long_break_interval)
+                    VALUES(1, ?, ?, ?, ?)
+                    ON CONFLICT(id) DO UPDATE SET
+                        work_minutes=excluded.work_minutes,
+                        short_break_minutes=excluded.short_break_minutes,
+                        long_break_minutes=excluded.long_break_minutes,
+                        long_break_interval=excluded.long_break_interval
+                    """,
+                    (
+                        config.get("work_minutes", 25),
+                        config.get("short_break_minutes", 5),
+                        config.get("long_break_minutes", 15),
+                        config.get("long_break_interval", 4),
+                    ),
+                )
+        # 组提交模式下也按批真正提交，保证分块事务语义（外层事务中为空操作）
+        db.flush()
+
+    def _config_row_to_dict(self, row: sqlite3.Row) -> Dict:
         return {
-            "work_minutes": cfg.work_minutes,
-            "short_break_minutes": cfg.short_break_minutes,
-            "long_break_minutes": cfg.long_break_minutes,
-            "long_break_interval": cfg.long_break_interval,
+            "work_minutes": row["work_minutes"],
+            "short_break_minutes": row["short_break_minutes"],
+            "long_break_minutes": row["long_break_minutes"],
+            "long_break_interval": row["long_break_interval"],
         }
+
+
+def _habit_row_to_dict(row: sqlite3.Row) -> Dict:
+    return {
+        "id": row["id"],
+        "name": row["name"],
+        "description": row["description"],
+        "category": row["category"],
+        "target_per_week": row["target_per_week"],
+        "enabled": bool(row["enabled"]),
+        "created_at": row["created_at"],
+        "deleted_at": row["deleted_at"],
+    }
+
+
+def _record_row_to_dict(row: sqlite3.Row) -> Dict:
+    return {
+        "id": row["id"],
+        "habit_id": row["habit_id"],
+        "date": row["date"],
+        "is_completed": bool(row["is_completed"]),
+        "note": row["note"],
+        "recorded_at": row["recorded_at"],
+    }
+
+
+def _pomodoro_row_to_dict(row: sqlite3.Row) -> Dict:
+    return {
+        "id": row["id"],
+        "habit_id": row["habit_id"],
+        "start_time": row["start_time"],
+        "end_time": row["end_time"],
+        "duration_seconds": row["duration_seconds"],
+        "status": row["status"],
+    }
+
+
+_ROW_CONVERTERS = {
+    "habits": _habit_row_to_dict,
+    "habit_records": _record_row_to_dict,
+    "pomodoros": _pomodoro_row_to_dict,
+}
+
+
+def _json_encoder() -> Callable[[object], str]:
+    """复用同一个编码器实例（json.dumps 带参数时每次都会新建编码器）；json 在首次导出时才导入。"""
+    import json
+
+    return json.JSONEncoder(ensure_ascii=False).encode
+
+
+class _JsonWriter:
+    """增量写出与旧版兼容的 JSON 对象：每个分区一个数组，每个元素一行。"""
+
+    def __init__(self, fp):
+        self.fp = fp
+        self.first_section = True
+        self.first_item = True
+        self._dumps = _json_encoder()
+        self.fp.write("{")
+
+    def begin_section(self, section: str) -> None:
+        self._next_key()
+        self.fp.write(f"\n  {self._dumps(section)}: [")
+        self.first_item = True
+
+    def write_item(self, kind: str, item: Dict) -> None:
+        self.fp.write("\n    " if self.first_item else ",\n    ")
+        self.fp.write(self._dumps(item))
+        self.first_item = False
+
+    def end_section(self) -> None:
+        self.fp.write("]" if self.first_item else "\n  ]")
+
+    def write_config(self, config: Dict) -> None:
+        self._next_key()
+        self.fp.write(f'\n  "config": {self._dumps(config)}')
+
+    def close(self) -> None:
+        self.fp.write("\n}\n")
+
+    def _next_key(self) -> None:
+        if not self.first_section:
+            self.fp.write(",")
+        self.first_section = False
+
+
+class _NdjsonWriter:
+    """NDJSON：每行一个 {"type": ..., "data": ...}。"""
+
+    def __init__(self, fp):
+        self.fp = fp
+        self._dumps = _json_encoder()
+
+    def begin_section(self, section: str) -> None:
+        pass
+
+    def write_item(self, kind: str, item: Dict) -> None:
+        self.fp.write(self._dumps({"type": kind, "data": item}))
+        self.fp.write("\n")
+
+    def end_section(self) -> None:
+        pass
+
+    def write_config(self, config: Dict) -> None:
+        self.write_item("config", config)
+
+    def close(self) -> None:
+        pass
+
+
+@dataclasses.dataclass
+class _ImportState:
+    """导入过程中收集的、结束后重建派生数据所需的信息。"""
+
+    touched_habits: set = dataclasses.field(default_factory=set)
+    # 导入番茄的 start_epoch 范围，append 导入后只重建这段日期的按日汇总
+    first_epoch: Optional[int] = None
+    last_epoch: Optional[int] = None
+
+    def add_epoch(self, epoch: int) -> None:
+        self.first_epoch = epoch if self.first_epoch is None else min(self.first_epoch, epoch)
+        self.last_epoch = epoch if self.last_epoch is None else max(self.last_epoch, epoch)
+
+
+_IMPORT_SQL = {
+    "habits": """
+        INSERT INTO habits(id, name, description, category, target_per_week, enabled, created_at, deleted_at)
+        VALUES(?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(id) DO NOTHING
+    """,
+    "habit_records": """
+        INSERT OR IGNORE INTO habit_records(id, habit_id, date, is_completed, note, recorded_at)
+        VALUES(?, ?, ?, ?, ?, ?)
+    """,
+    "pomodoros": """
+        INSERT OR IGNORE INTO pomodoro_sessions(
+            id, habit_id, start_time, end_time, duration_seconds, status, start_epoch, end_epoch
+        ) VALUES(?, ?, ?, ?, ?, ?, ?, ?)
+    """,
+}
+
+
+def _habit_params(h: Dict) -> Tuple:
+    return (
+        h.get("id"),
+        h["name"],
+        h.get("description", ""),
+        h.get("category", "其它"),
+        h.get("target_per_week", 7),
+        1 if h.get("enabled", True) else 0,
+        h.get("created_at"),
+        h.get("deleted_at"),
+    )
+
+
+def _record_params(r: Dict) -> Tuple:
+    return (
+        r.get("id"),
+        r["habit_id"],
+        r["date"],
+        1 if r.get("is_completed") else 0,
+        r.get("note", ""),
+        r.get("recorded_at"),
+    )
+
+
+def _pomodoro_params(p: Dict) -> Tuple:
+    return (
+        p.get("id"),
+        p.get("habit_id"),
+        p["start_time"],
+        p.get("end_time"),
+        p.get("duration_seconds", 0),
+        p.get("status", "completed"),
+        epoch_from_iso(p["start_time"]),
+        epoch_from_iso(p.get("end_time")),
+    )
+
+
+_IMPORT_PARAMS = {
+    "habits": _habit_params,
+    "habit_records": _record_params,
+    "pomodoros": _pomodoro_params,
+}
+
+# NDJSON 行类型到 JSON 分区名的映射
+_NDJSON_SECTIONS = {
+    "habit": "habits",
+    "habit_record": "habit_records",
+    "pomodoro": "pomodoros",
+    "config": "config",
+}
+
+
+class _NdjsonReader:
+    """逐行解析 NDJSON，格式错误的行记入报告后跳过。"""
+
+    def __init__(self, fp, report: ImportReport):
+        self.fp = fp
+        self.report = report
+        self.bytes_read = 0
+
+    def items(self):
+        import json
+
+        for line_no, raw in enumerate(self.fp, start=1):
+            self.bytes_read += len(raw)
+            if not raw.strip():
+                continue
+            try:
+                entry = json.loads(raw)
+                section = _NDJSON_SECTIONS[entry["type"]]
+                data = entry["data"]
+            except (KeyError, TypeError, ValueError) as exc:
+                self.report.add_error("ndjson", line_no, f"行格式无效: {exc!r}")
+                continue
+            yield section, data
@@ -0,0 +1,41 @@
+import threading
+from typing import Callable, Dict, List, Type
+
+from ..domain.events import DomainEvent
+
+EventHandler = Callable[[DomainEvent], None]
+
+
+class EventBus:
+    """进程内的同步事件总线。
+
+    publish 在发布者所在线程（通常是线程池）中直接调用订阅者；需要回到 UI 线程的订阅者
+    自行转发（见 ui.refresh.RefreshScheduler）。订阅某个事件类型也会收到其子类事件。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._handlers: Dict[Type[DomainEvent], List[EventHandler]] = {}
+
+    def subscribe(self, event_type: Type[DomainEvent], handler: EventHandler) -> Callable[[], None]:
+        """注册订阅者，返回取消订阅的函数。"""
+        with self._lock:
+            self._handlers.setdefault(event_type, []).append(handler)
+
+        def unsubscribe() -> None:
+            with self._lock:
+                handlers = self._handlers.get(event_type, [])
+                if handler in handlers:
+                    handlers.remove(handler)
+
+        return unsubscribe
+
+    def publish(self, event: DomainEvent) -> None:
+        with self._lock:
+            handlers = [
+                handler
+                for event_type in type(event).__mro__
+                for handler in self._handlers.get(event_type, ())
+            ]
+        for handler in handlers:
+            handler(event)
@@ -1,18 +1,25 @@
-import datetime as dt
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 
+from ..domain.events import HabitChanged
 from ..domain.models import Habit
 from ..repository.habit_repository import HabitRepository
 from ..repository.record_repository import HabitRecordRepository
 from ..utils import dates
+from .event_bus import EventBus
 
 
 class HabitService:
     """习惯相关业务：创建/编辑/删除 + 统计计算。"""
 
-    def __init__(self, habit_repo: HabitRepository, record_repo: HabitRecordRepository):
+    def __init__(
+        self,
+        habit_repo: HabitRepository,
+        record_repo: HabitRecordRepository,
+        events: Optional[EventBus] = None,
+    ):
         self.habit_repo = habit_repo
         self.record_repo = record_repo
+        self.events = events or EventBus()
 
     def create_habit(
         self,
@@ -30,14 +37,18 @@ class HabitService:
             target_per_week=target_per_week,
             enabled=enabled,
         )
-        return self.habit_repo.create(habit)
+        habit = self.habit_repo.create(habit)
+        self.events.publish(HabitChanged(habit.id, "created"))
+        return habit
 
     def update_habit(self, habit: Habit) -> None:
         self.habit_repo.update(habit)
+        self.events.publish(HabitChanged(habit.id, "updated"))
 
     def delete_habit(self, habit_id: int) -> None:
         # 软删除，保留历史记录，disabled 并标记 deleted_at
         self.habit_repo.soft_delete(habit_id)
+        self.events.publish(HabitChanged(habit_id, "deleted"))
 
     def get_habit(self, habit_id: int, include_deleted: bool = False) -> Habit | None:
         return self.habit_repo.get(habit_id, include_deleted=include_deleted)
@@ -46,26 +57,11 @@ class HabitService:
         return self.habit_repo.list_all(enabled_only=enabled_only)
 
     def compute_streaks(self, habit_id: int) -> Tuple[int, int]:
-        """计算当前连续打卡与历史最长连续打卡。
+        """返回当前连续打卡与历史最长连续打卡。
 
-        算法：按日期升序遍历完成记录，遇到未完成或断档则重置当前连续计数。
+        读取 habit_streaks 增量缓存，O(1)，不随历史长度增长。
         """
-        records = self.record_repo.all_by_habit(habit_id)
-        current = 0
-        longest = 0
-        prev_date: dt.date | None = None
-        for record in records:
-            if not record.is_completed:
-                current = 0
-                prev_date = record.date
-                continue
-            if prev_date and (record.date - prev_date).days == 1:
-                current += 1
-            else:
-                current = 1
-            prev_date = record.date
-            longest = max(longest, current)
-        return current, longest
+        return self.record_repo.get_streak(habit_id)
 
     def recent_completion_stats(self, habit_id: int, days: int) -> Dict[str, float | int]:
         completed = self.record_repo.stats_completed_count(habit_id, days)
@@ -79,13 +75,35 @@ class HabitService:
         """返回今日需要打卡的习惯及完成状态，供 UI 展示。"""
         today = dates.today_date()
         habits = self.habit_repo.list_all(enabled_only=True)
+        statuses = self.record_repo.status_on_date(today, [h.id for h in habits])
+        return [
+            {"habit": habit, "is_completed": statuses.get(habit.id, False)}
+            for habit in habits
+        ]
+
+    def today_snapshot(self, habit_ids: Optional[Iterable[int]] = None) -> List[Dict]:
+        """今日视图所需的全部数据：习惯、今日状态与连续打卡。
+
+        固定三条 SQL（习惯列表、今日状态、连续打卡缓存），不随习惯数量增加查询次数。
+        指定 habit_ids 时只返回这些习惯（用于局部刷新）。
+        """
+        today = dates.today_date()
+        habits = self.habit_repo.list_all(enabled_only=True)
+        if habit_ids is not None:
+            wanted = set(habit_ids)
+            habits = [h for h in habits if h.id in wanted]
+        habit_ids = [h.id for h in habits]
+        statuses = self.record_repo.status_on_date(today, habit_ids)
+        streaks = self.record_repo.streaks_for_habits(habit_ids)
         results = []
         for habit in habits:
-            record = self.record_repo.get_by_habit_date(habit.id, today)
+            current, longest = streaks.get(habit.id, (0, 0))
             results.append(
                 {
                     "habit": habit,
-                    "is_completed": record.is_completed if record else False,
+                    "is_completed": statuses.get(habit.id, False),
+                    "current_streak": current,
+                    "longest_streak": longest,
                 }
             )
         return results
@@ -1,15 +1,18 @@
 import datetime as dt
-from typing import Dict, Optional
+from typing import Dict, Iterable, List, Optional
 
+from ..domain.events import SessionCompleted
 from ..domain.models import PomodoroSession
 from ..repository.pomodoro_repository import PomodoroRepository
+from .event_bus import EventBus
 
 
 class PomodoroService:
     """番茄钟业务：记录完成数据与统计。"""
 
-    def __init__(self, repo: PomodoroRepository):
+    def __init__(self, repo: PomodoroRepository, events: Optional[EventBus] = None):
         self.repo = repo
+        self.events = events or EventBus()
 
     def start_session(self, habit_id: Optional[int], planned_seconds: int) -> PomodoroSession:
         """开始一个番茄计时，先返回内存对象，完成后再写库。"""
@@ -25,15 +28,52 @@ class PomodoroService:
     def complete_session(self, session: PomodoroSession, success: bool = True) -> PomodoroSession:
         session.end_time = dt.datetime.now(dt.timezone.utc)
         session.status = "completed" if success else "aborted"
-        return self.repo.add_session(session)
+        session = self.repo.add_session(session)
+        self.events.publish(SessionCompleted(session.id, session.habit_id, session.status))
+        return session
 
     def stats_today_week_month(self) -> Dict[str, int]:
         now = dt.datetime.now(dt.timezone.utc)
         start_day = dt.datetime.combine(now.date(), dt.time.min).replace(tzinfo=dt.timezone.utc)
         start_week = start_day - dt.timedelta(days=now.weekday())
         start_month = dt.datetime(now.year, now.month, 1, tzinfo=dt.timezone.utc)
-        return {
-            "today": self.repo.count_between(start_day, now),
-            "this_week": self.repo.count_between(start_week, now),
-            "this_month": self.repo.count_between(start_month, now),
-        }
\ No newline at end of file
+        today, this_week, this_month = self.repo.count_since_many(
+            [start_day, start_week, start_month], now
+        )
+        return {"today": today, "this_week": this_week, "this_month": this_month}
+
+    def focus_by_day(
+        self, start: dt.date, end: dt.date, habit_ids: Optional[Iterable[Optional[int]]] = None
+    ) -> List[Dict]:
+        """start..end 每个本地日期的番茄汇总（没有番茄的日期补 0），可用于一年的专注热力图。
+
+        只读 pomodoro_daily，耗时与天数成正比，与番茄总数无关。habit_ids 为 None 时合计全部番茄，
+        其中的 None 表示未关联习惯的番茄。每项为 {"day", "completed", "aborted", "focus_seconds"}。
+        """
+        days = {}
+        for offset in range((end - start).days + 1):
+            day = start + dt.timedelta(days=offset)
+            days[day] = {"day": day, "completed": 0, "aborted": 0, "focus_seconds": 0}
+        for row in self.repo.fetch_daily(start, end, habit_ids):
+            item = days[row.day]
+            item["completed"] += row.completed
+            item["aborted"] += row.aborted
+            item["focus_seconds"] += row.focus_seconds
+        return list(days.values())
+
+    def focus_by_habit(self, start: dt.date, end: dt.date) -> Dict[Optional[int], Dict[str, int]]:
+        """start..end 内各习惯的番茄合计 {habit_id: {"completed", "aborted", "focus_seconds"}}。
+
+        未关联习惯的番茄记在 None 下；没有番茄的习惯不出现在结果中。
+        """
+        totals: Dict[Optional[int], Dict[str, int]] = {}
+        for row in self.repo.fetch_daily(start, end):
+            item = totals.setdefault(row.habit_id, {"completed": 0, "aborted": 0, "focus_seconds": 0})
+            item["completed"] += row.completed
+            item["aborted"] += row.aborted
+            item["focus_seconds"] += row.focus_seconds
+        return totals
+
+    def rebuild_rollups(self, start: Optional[dt.date] = None, end: Optional[dt.date] = None) -> None:
+        """按番茄记录重建按日汇总（默认全部），用于手工修改数据库或时区变化之后。"""
+        self.repo.rebuild_daily(start, end)
\ No newline at end of file
@@ -1,34 +1,107 @@
+import calendar
 import datetime as dt
-from typing import Dict, List
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
 
-from ..domain.models import HabitRecord
+from ..domain.events import DataReloaded, RecordChanged
+from ..domain.models import HabitRecord, MonthTile
 from ..repository.record_repository import HabitRecordRepository
 from ..utils import dates
+from .event_bus import EventBus
+
+# 月份块 LRU 缓存的容量：约 4 个习惯 × 5 年
+MONTH_TILE_CACHE_SIZE = 240
 
 
 class HabitRecordService:
-    """打卡相关业务，封装 UI 调用流程。"""
+    """打卡相关业务，封装 UI 调用流程。
+
+    日历热力图按月读取不可变的 MonthTile，并缓存在 LRU 中；写入某天只失效该习惯的那一个月，
+    导入、恢复等整体重载时清空缓存。服务方法在线程池中调用，缓存由锁保护。
+    """
 
-    def __init__(self, record_repo: HabitRecordRepository):
+    def __init__(
+        self,
+        record_repo: HabitRecordRepository,
+        events: Optional[EventBus] = None,
+        tile_cache_size: int = MONTH_TILE_CACHE_SIZE,
+    ):
         self.record_repo = record_repo
+        self.events = events or EventBus()
+        self.tile_cache_size = tile_cache_size
+        self._tiles: "OrderedDict[Tuple[int, dt.date], MonthTile]" = OrderedDict()
+        self._tiles_lock = threading.Lock()
+        # 每次失效加一；读取期间发生过失效的结果不写入缓存，避免覆盖新数据
+        self._tiles_version = 0
+        self.events.subscribe(DataReloaded, lambda event: self.invalidate_tiles())
 
     def set_today_status(self, habit_id: int, is_completed: bool, note: str = "") -> HabitRecord:
-        return self.record_repo.upsert(habit_id, dates.today_date(), is_completed, note=note)
+        return self.set_status_for_date(habit_id, dates.today_date(), is_completed, note=note)
 
     def set_status_for_date(
         self, habit_id: int, target_date: dt.date, is_completed: bool, note: str = ""
     ) -> HabitRecord:
-        return self.record_repo.upsert(habit_id, target_date, is_completed, note=note)
+        record = self.record_repo.upsert(habit_id, target_date, is_completed, note=note)
+        self.invalidate_tiles(habit_id, target_date)
+        self.events.publish(RecordChanged(habit_id, target_date))
+        return record
 
     def calendar_view(self, habit_id: int, days: int = 30) -> List[Dict]:
         end = dates.today_date()
         start = end - dt.timedelta(days=days - 1)
-        records = self.record_repo.fetch_by_habit_and_range(habit_id, start, end)
-        by_date = {dates.iso_date(r.date): r for r in records}
-        view = []
-        for i in range(days):
-            d = start + dt.timedelta(days=i)
-            iso = dates.iso_date(d)
-            record = by_date.get(iso)
-            view.append({"date": iso, "completed": record.is_completed if record else False})
-        return view
+        # 直接从完成位图取出区间内的位，不读取打卡记录
+        bitmap = self.record_repo.bitmaps.get(habit_id)
+        completed = bitmap.days(start, end) if bitmap else [False] * days
+        return [
+            {"date": dates.iso_date(start + dt.timedelta(days=i)), "completed": done}
+            for i, done in enumerate(completed)
+        ]
+
+    def month_tiles(self, habit_id: int, first_month: dt.date, last_month: dt.date) -> List[MonthTile]:
+        """first_month..last_month 各月的 MonthTile（按月升序），未缓存的月份从完成位图一次切出。"""
+        months = _month_starts(first_month, last_month)
+        with self._tiles_lock:
+            version = self._tiles_version
+            tiles = {}
+            for month in months:
+                tile = self._tiles.get((habit_id, month))
+                if tile is not None:
+                    self._tiles.move_to_end((habit_id, month))
+                    tiles[month] = tile
+        missing = [month for month in months if month not in tiles]
+        if missing:
+            bitmap = self.record_repo.bitmaps.get(habit_id)
+            for month in missing:
+                last_day = _month_end(month)
+                days = bitmap.days(month, last_day) if bitmap else [False] * last_day.day
+                tiles[month] = MonthTile(habit_id, month, tuple(days))
+            with self._tiles_lock:
+                if version == self._tiles_version:
+                    for month in missing:
+                        self._tiles[(habit_id, month)] = tiles[month]
+                    while len(self._tiles) > self.tile_cache_size:
+                        self._tiles.popitem(last=False)
+        return [tiles[month] for month in months]
+
+    def invalidate_tiles(self, habit_id: Optional[int] = None, date: Optional[dt.date] = None) -> None:
+        """失效某习惯某天所在月份的缓存块；不带参数时清空全部。"""
+        with self._tiles_lock:
+            self._tiles_version += 1
+            if habit_id is None:
+                self._tiles.clear()
+            else:
+                self._tiles.pop((habit_id, date.replace(day=1)), None)
+
+
+def _month_starts(first: dt.date, last: dt.date) -> List[dt.date]:
+    month = first.replace(day=1)
+    months = []
+    while month <= last:
+        months.append(month)
+        month = _month_end(month) + dt.timedelta(days=1)
+    return months
+
+
+def _month_end(month: dt.date) -> dt.date:
+    return month.replace(day=calendar.monthrange(month.year, month.month)[1])
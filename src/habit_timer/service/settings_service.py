@@ -1,16 +1,22 @@
+from typing import Optional
+
+from ..domain.events import ConfigChanged
 from ..domain.models import AppConfig
 from ..repository.config_repository import ConfigRepository
+from .event_bus import EventBus
 
 
 class SettingsService:
     """设置读写的业务包装。"""
 
-    def __init__(self, repo: ConfigRepository):
+    def __init__(self, repo: ConfigRepository, events: Optional[EventBus] = None):
         self.repo = repo
+        self.events = events or EventBus()
 
     def get_config(self) -> AppConfig:
         return self.repo.load()
 
     def update_config(self, config: AppConfig) -> AppConfig:
         self.repo.save(config)
+        self.events.publish(ConfigChanged())
         return config
@@ -0,0 +1,130 @@
+import datetime as dt
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from ..domain.events import DataReloaded
+from ..repository.database import BACKUP_PAGES_PER_STEP, Database
+from .event_bus import EventBus
+
+SNAPSHOT_PREFIX = "habit_timer-"
+SNAPSHOT_SUFFIX = ".db"
+
+# 后台定时快照：设置环境变量 HABIT_TIMER_SNAPSHOT_HOURS 为间隔小时数后启用，未设置或为 0 时关闭
+SNAPSHOT_ENV = "HABIT_TIMER_SNAPSHOT_HOURS"
+
+
+def snapshot_interval_from_env() -> Optional[float]:
+    """环境变量给出的快照间隔（秒）；未启用或取值无效时返回 None。"""
+    value = os.environ.get(SNAPSHOT_ENV, "").strip()
+    try:
+        hours = float(value)
+    except ValueError:
+        return None
+    return hours * 3600 if hours > 0 else None
+
+
+class SnapshotService:
+    """整库快照备份/恢复：基于 SQLite 在线备份 API 按页复制，不经过 JSON。"""
+
+    def __init__(self, db: Database, snapshot_dir: Path, keep: int = 7, events: Optional[EventBus] = None):
+        self.db = db
+        self.snapshot_dir = Path(snapshot_dir)
+        self.keep = keep
+        self.events = events or EventBus()
+
+    def create_snapshot(
+        self,
+        dest: Optional[Path] = None,
+        progress: Optional[Callable[[int, int], None]] = None,
+        pages: int = BACKUP_PAGES_PER_STEP,
+    ) -> Path:
+        """生成快照文件并返回路径；未指定 dest 时写入快照目录并按时间命名。"""
+        if dest is None:
+            stamp = dt.datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+            dest = self.snapshot_dir / f"{SNAPSHOT_PREFIX}{stamp}{SNAPSHOT_SUFFIX}"
+        self.db.backup_to(Path(dest), pages=pages, progress=progress)
+        return Path(dest)
+
+    def restore_snapshot(
+        self,
+        src: Path,
+        progress: Optional[Callable[[int, int], None]] = None,
+        pages: int = BACKUP_PAGES_PER_STEP,
+    ) -> None:
+        """用快照覆盖当前数据库。"""
+        self.db.restore_from(Path(src), pages=pages, progress=progress)
+        self.events.publish(DataReloaded("restore"))
+
+    def list_snapshots(self) -> List[Path]:
+        """快照目录中的自动快照，按时间从新到旧。"""
+        if not self.snapshot_dir.is_dir():
+            return []
+        return sorted(self.snapshot_dir.glob(f"{SNAPSHOT_PREFIX}*{SNAPSHOT_SUFFIX}"), reverse=True)
+
+    def prune(self, keep: Optional[int] = None) -> List[Path]:
+        """只保留最新的 keep 个快照，返回被删除的文件。"""
+        keep = self.keep if keep is None else keep
+        removed = self.list_snapshots()[max(keep, 0) :]
+        for path in removed:
+            path.unlink(missing_ok=True)
+        return removed
+
+
+class SnapshotScheduler:
+    """后台定时快照：每隔 interval_seconds 生成一次快照并按 keep 清理旧文件。
+
+    启动时若最新快照已超过一个间隔（或还没有快照）则立即补做一次。在守护线程中运行，备份使用独立连接，不占用 UI 线程。
+    """
+
+    def __init__(self, snapshot_service: SnapshotService, interval_seconds: float):
+        self.snapshot_service = snapshot_service
+        self.interval_seconds = interval_seconds
+        self.last_snapshot: Optional[Path] = None
+        self.last_error: Optional[BaseException] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="snapshot-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def run_once(self) -> Optional[Path]:
+        """立即生成一次快照，失败时记录到 last_error 而不抛出。"""
+        try:
+            self.last_snapshot = self.snapshot_service.create_snapshot()
+            self.snapshot_service.prune()
+            self.last_error = None
+        except Exception as exc:
+            self.last_error = exc
+            return None
+        return self.last_snapshot
+
+    def first_delay(self) -> float:
+        """距下一次快照的秒数：按最新快照的修改时间计算，已过期时为 0。"""
+        snapshots = self.snapshot_service.list_snapshots()
+        if not snapshots:
+            return 0.0
+        try:
+            age = time.time() - snapshots[0].stat().st_mtime
+        except OSError:
+            return 0.0
+        return min(max(self.interval_seconds - age, 0.0), self.interval_seconds)
+
+    def _run(self) -> None:
+        if self._stop.wait(self.first_delay()):
+            return
+        self.run_once()
+        while not self._stop.wait(self.interval_seconds):
+            self.run_once()
@@ -0,0 +1,116 @@
+import datetime as dt
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from ..domain.models import WeeklyRollup
+from ..repository.habit_repository import HabitRepository
+from ..repository.record_repository import HabitRecordRepository
+from ..repository.weekly_repository import week_start
+from ..utils import dates
+from .analytics import DEFAULT_WEEKS, AnalyticsService
+
+
+class StatsService:
+    """统计页业务：批量计算所有习惯的窗口完成情况与连续打卡。
+
+    查询次数固定（习惯列表、完成位图、连续打卡缓存各一条），与习惯数量无关；
+    连续打卡、窗口完成天数与每周达标由 AnalyticsService 对全部习惯一次算出。
+    """
+
+    def __init__(self, habit_repo: HabitRepository, record_repo: HabitRecordRepository):
+        self.habit_repo = habit_repo
+        self.record_repo = record_repo
+        self.analytics = AnalyticsService(habit_repo, record_repo)
+
+    def habit_overview(self, windows: Sequence[int] = (7, 30), weeks: int = DEFAULT_WEEKS) -> List[Dict]:
+        """返回启用习惯的统计概览。
+
+        每项包含 habit、current_streak、longest_streak、windows：
+        {days: {"days", "completed", "completion_rate"}}（口径同 HabitService.recent_completion_stats），
+        以及最近 weeks 个完整周的达标情况 weekly：{"weeks_met", "weeks_total", "attainment_rate",
+        "current_streak", "longest_streak"}，后两项为连续达标周数（见 weekly_attainment）。
+        """
+        habits = self.habit_repo.list_all(enabled_only=True)
+        habit_ids = [h.id for h in habits]
+        metrics = self.analytics.compute_for(habits, windows=windows, weeks=weeks)
+        runs = self.record_repo.weekly.met_runs(habit_ids)
+        this_monday = week_start(dates.today_date())
+        results = []
+        for habit in habits:
+            week_current, week_longest = _week_streaks(runs.get(habit.id, []), this_monday)
+            item = metrics[habit.id]
+            results.append(
+                {
+                    "habit": habit,
+                    "current_streak": item.current_streak,
+                    "longest_streak": item.longest_streak,
+                    "windows": {days: _window_stat(days, item.completed.get(days, 0)) for days in windows},
+                    "weekly": {
+                        "weeks_met": item.weeks_met,
+                        "weeks_total": item.weeks_total,
+                        "attainment_rate": item.weekly_attainment,
+                        "current_streak": week_current,
+                        "longest_streak": week_longest,
+                    },
+                }
+            )
+        return results
+
+    def weekly_attainment(
+        self,
+        habit_ids: Optional[Iterable[int]] = None,
+        weeks: int = DEFAULT_WEEKS,
+        today: Optional[dt.date] = None,
+    ) -> Dict[int, Dict]:
+        """多个习惯最近 weeks 个完整 ISO 周的达标历史与连续达标周数，只读 habit_weekly 汇总表。
+
+        返回 {habit_id: {"history", "weeks_met", "weeks_total", "attainment_rate",
+        "current_streak", "longest_streak"}}：history 为 WeeklyRollup 列表（从早到晚，没有记录的周补 0，
+        习惯开始之前的周不计入）；current_streak 为截至上一个完整周的连续达标周数，本周已达标时也计入。
+        """
+        habits = self.habit_repo.list_all(enabled_only=True)
+        if habit_ids is not None:
+            wanted = set(habit_ids)
+            habits = [h for h in habits if h.id in wanted]
+        ids = [h.id for h in habits]
+        this_monday = week_start(today or dates.today_date())
+        first = this_monday - dt.timedelta(weeks=weeks)
+        rollups = self.record_repo.weekly.fetch_range(ids, first, this_monday - dt.timedelta(days=1))
+        runs = self.record_repo.weekly.met_runs(ids)
+        results = {}
+        for habit in habits:
+            rows = {r.week_start: r for r in rollups.get(habit.id, [])}
+            # 补录的记录可能早于创建日，以两者中较早的一周为起点
+            start = min([week_start(habit.created_at.date()), *rows])
+            history = [
+                rows.get(monday) or WeeklyRollup(habit.id, monday, 0, habit.target_per_week <= 0)
+                for monday in (first + dt.timedelta(weeks=i) for i in range(weeks))
+                if monday >= start
+            ]
+            met = sum(r.met for r in history)
+            current, longest = _week_streaks(runs.get(habit.id, []), this_monday)
+            results[habit.id] = {
+                "history": history,
+                "weeks_met": met,
+                "weeks_total": len(history),
+                "attainment_rate": round(met / len(history) * 100, 2) if history else 0.0,
+                "current_streak": current,
+                "longest_streak": longest,
+            }
+        return results
+
+
+def _week_streaks(runs: List[Tuple[dt.date, int]], this_monday: dt.date) -> Tuple[int, int]:
+    """由 met_runs 的连续达标段得到 (当前连续周数, 最长连续周数)。"""
+    if not runs:
+        return 0, 0
+    last_week, length = runs[-1]
+    current = length if last_week >= this_monday - dt.timedelta(weeks=1) else 0
+    return current, max(n for _, n in runs)
+
+
+def _window_stat(days: int, completed: int) -> Dict[str, float | int]:
+    return {
+        "days": days,
+        "completed": completed,
+        "completion_rate": round(completed / days * 100, 2) if days > 0 else 0.0,
+    }
@@ -1,39 +1,80 @@
+import datetime as dt
+
 import toga
 from toga.style import Pack
 from toga.style.pack import COLUMN, ROW
 
-from ..service.habit_service import HabitService
-from ..service.record_service import HabitRecordService
+from ..domain.events import DataReloaded, HabitChanged, RecordChanged
+from ..service.async_service import AsyncService, LatestTask
+from ..utils import dates
 from ..utils.i18n import t
 
+# 热力图一屏显示的年数
+HEATMAP_YEARS = 5
+
 
 class CalendarView(toga.Box):
-    """最近30天完成情况的简易日历视图。"""
+    """完成情况日历：最近 30 天列表，或按月份块展示多年的热力图。
+
+    热力图的月份块由 HabitRecordService 缓存，翻页和切换习惯时只有首次访问的月份需要读取数据库。
+    """
+
+    REFRESH_EVENTS = (HabitChanged, RecordChanged, DataReloaded)
 
-    def __init__(self, habit_service: HabitService, record_service: HabitRecordService):
+    def __init__(self, habit_service: AsyncService, record_service: AsyncService):
         super().__init__(style=Pack(direction=COLUMN, padding=10, flex=1))
+        # habit_service/record_service 为 HabitService/HabitRecordService 的异步外观
         self.habit_service = habit_service
         self.record_service = record_service
         self.habit_options = {}
+        self._habits_task = LatestTask()
+        self._render_task = LatestTask()
+        # 热力图最后一年（含）距今年份的偏移，向前翻页时增大
+        self.heatmap_offset = 0
 
         self.habit_select = toga.Selection(style=Pack(width=250), on_change=self.on_select_change)
+        self.mode_select = toga.Selection(
+            items=[t("calendar.mode_recent"), t("calendar.mode_heatmap")],
+            style=Pack(width=140, padding_left=8),
+            on_change=self.on_select_change,
+        )
+        self.prev_button = toga.Button(t("calendar.prev"), on_press=self.on_prev, style=Pack(padding_left=8))
+        self.next_button = toga.Button(t("calendar.next"), on_press=self.on_next, style=Pack(padding_left=4))
         self.display = toga.MultilineTextInput(readonly=True, style=Pack(flex=1))
 
         top = toga.Box(style=Pack(direction=ROW, padding_bottom=8))
         top.add(toga.Label(t("calendar.habit_select")))
         top.add(self.habit_select)
+        top.add(self.mode_select)
+        top.add(self.prev_button)
+        top.add(self.next_button)
         self.add(top)
         self.add(self.display)
         self.refresh_habits()
 
     def refresh_habits(self):
-        habits = self.habit_service.list_habits(enabled_only=True)
+        self._habits_task.run(self._load_habits())
+
+    def apply_events(self, events):
+        """习惯列表变化时重载下拉框；仅当前习惯的打卡变化时只重绘日历。"""
+        if any(isinstance(e, (HabitChanged, DataReloaded)) for e in events):
+            self.refresh_habits()
+            return
+        habit_id = self.habit_options.get(self.habit_select.value)
+        if any(isinstance(e, RecordChanged) and e.habit_id == habit_id for e in events):
+            self.render_calendar()
+
+    async def _load_habits(self):
+        habits = await self.habit_service.list_habits(enabled_only=True)
+        selected = self.habit_select.value
         self.habit_options = {t("calendar.no_habit"): None}
         for h in habits:
             self.habit_options[h.name] = h.id
         self.habit_select.items = list(self.habit_options.keys())
-        # 设置默认选项为第一个可用选项，如果没有则设为None
-        if self.habit_select.items:
+        # 优先保留原来选中的习惯，否则选第一个可用选项，如果没有则设为None
+        if selected in self.habit_options:
+            self.habit_select.value = selected
+        elif self.habit_select.items:
             self.habit_select.value = self.habit_select.items[0]
         else:
             self.habit_select.value = None
@@ -42,14 +83,48 @@ class CalendarView(toga.Box):
     def on_select_change(self, widget):
         self.render_calendar()
 
+    @property
+    def heatmap_mode(self) -> bool:
+        return self.mode_select.value == t("calendar.mode_heatmap")
+
+    def on_prev(self, widget):
+        self.heatmap_offset += 1
+        self.render_calendar()
+
+    def on_next(self, widget):
+        if self.heatmap_offset > 0:
+            self.heatmap_offset -= 1
+            self.render_calendar()
+
     def render_calendar(self):
+        """切换习惯时只保留最后一次选择的查询。"""
         habit_id = self.habit_options.get(self.habit_select.value)
         if not habit_id:
+            self._render_task.cancel()
             self.display.value = t("calendar.no_data")
             return
-        data = self.record_service.calendar_view(habit_id, days=30)
+        if self.heatmap_mode:
+            self._render_task.run(self._load_heatmap(habit_id))
+        else:
+            self._render_task.run(self._load_calendar(habit_id))
+
+    async def _load_calendar(self, habit_id: int):
+        self.display.value = t("common.loading")
+        data = await self.record_service.calendar_view(habit_id, days=30)
         lines = []
         for item in data:
             mark = "✔" if item["completed"] else "·"
             lines.append(f"{item['date']}: {mark}")
-        self.display.value = "\n".join(lines)
\ No newline at end of file
+        self.display.value = "\n".join(lines)
+
+    async def _load_heatmap(self, habit_id: int):
+        """每行一个月（新的在上）：■ 完成、· 未完成，行尾为完成天数。"""
+        last_year = dates.today_date().year - self.heatmap_offset
+        tiles = await self.record_service.month_tiles(
+            habit_id, dt.date(last_year - HEATMAP_YEARS + 1, 1, 1), dt.date(last_year, 12, 1)
+        )
+        lines = []
+        for tile in reversed(tiles):
+            cells = "".join("■" if done else "·" for done in tile.days)
+            lines.append(f"{tile.month:%Y-%m} {cells:<31} {tile.completed:>2}/{len(tile.days)}")
+        self.display.value = "\n".join(lines)
@@ -0,0 +1,59 @@
+from typing import Callable, List, Optional
+
+import toga
+from toga.style import Pack
+from toga.style.pack import COLUMN
+
+from ..domain.events import DataReloaded, DomainEvent
+
+# 隐藏期间积累的事件超过该数量时合并为一次整体刷新
+MAX_PENDING_EVENTS = 100
+
+
+class LazyTab(toga.Box):
+    """选项卡占位容器：首次被选中时才构建并加载真实视图。
+
+    隐藏期间收到的事件只记录下来（标记为 dirty），再次选中时一次性交给视图处理。
+    视图模块在构建时才导入，因此占位容器接收全部事件，构建后再按视图的 REFRESH_EVENTS 过滤。
+    """
+
+    REFRESH_EVENTS = (DomainEvent,)
+
+    def __init__(self, factory: Callable[[], toga.Widget]):
+        super().__init__(style=Pack(direction=COLUMN, flex=1))
+        self.factory = factory
+        self.view: Optional[toga.Widget] = None
+        self.visible = False
+        self._pending: List[DomainEvent] = []
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self._pending)
+
+    def activate(self) -> None:
+        """选项卡被选中：未构建则构建（视图构造时会加载数据），否则补处理积累的事件。"""
+        self.visible = True
+        if self.view is None:
+            self.view = self.factory()
+            self.add(self.view)
+            self._pending.clear()
+        elif self._pending:
+            events, self._pending = self._pending, []
+            self.view.apply_events(events)
+
+    def deactivate(self) -> None:
+        self.visible = False
+
+    def apply_events(self, events: List[DomainEvent]) -> None:
+        if self.view is None:
+            # 尚未构建的视图在首次选中时读取最新数据，无需记录
+            return
+        events = [e for e in events if isinstance(e, self.view.REFRESH_EVENTS)]
+        if not events:
+            return
+        if self.visible:
+            self.view.apply_events(events)
+            return
+        self._pending.extend(events)
+        if len(self._pending) > MAX_PENDING_EVENTS:
+            self._pending = [DataReloaded("manual")]
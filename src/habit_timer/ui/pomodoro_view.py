@@ -1,35 +1,40 @@
+import asyncio
+
 import toga
 from toga.style import Pack
 from toga.style.pack import COLUMN, ROW
 
+from ..domain.events import ConfigChanged, DataReloaded, HabitChanged
 from ..domain.models import PomodoroSession
-from ..service.habit_service import HabitService
-from ..service.pomodoro_service import PomodoroService
-from ..service.settings_service import SettingsService
+from ..service.async_service import AsyncService, LatestTask
 from ..utils.i18n import t
 
 
 class PomodoroView(toga.Box):
     """番茄钟视图，包含状态机与非阻塞计时器。"""
 
+    REFRESH_EVENTS = (HabitChanged, ConfigChanged, DataReloaded)
+
     def __init__(
         self,
-        pomodoro_service: PomodoroService,
-        habit_service: HabitService,
-        settings_service: SettingsService,
-        on_data_changed=None,
+        pomodoro_service: AsyncService,
+        habit_service: AsyncService,
+        settings_service: AsyncService,
     ):
         super().__init__(style=Pack(direction=COLUMN, padding=10, flex=1))
+        # 各服务均为异步外观，数据库读写在线程池中进行
         self.pomodoro_service = pomodoro_service
         self.habit_service = habit_service
         self.settings_service = settings_service
-        self.on_data_changed = on_data_changed
 
         self.state = "idle"  # idle -> running -> paused -> finished
         self.remaining_seconds = 0
         self.timer = None
         self.active_session: PomodoroSession | None = None
         self.habit_options = {t("pomodoro.none"): None}
+        self._habits_task = LatestTask()
+        self._config_task = LatestTask()
+        self._pending_saves = set()
 
         self.habit_select = toga.Selection(items=[t("pomodoro.none")], style=Pack(width=200))
         self.time_label = toga.Label("00:00", style=Pack(font_size=36, padding_bottom=8))
@@ -58,27 +63,49 @@ class PomodoroView(toga.Box):
         self.load_default_time()
 
     def load_default_time(self):
-        cfg = self.settings_service.get_config()
+        self._config_task.run(self._load_default_time())
+
+    def apply_events(self, events):
+        """习惯变化只刷新下拉框；配置变化仅在空闲时重置时间，不打断进行中的番茄。"""
+        if any(isinstance(e, (HabitChanged, DataReloaded)) for e in events):
+            self.refresh_habits()
+        if self.state == "idle" and any(isinstance(e, (ConfigChanged, DataReloaded)) for e in events):
+            self.load_default_time()
+
+    async def _load_default_time(self):
+        cfg = await self.settings_service.get_config()
         self.remaining_seconds = cfg.work_minutes * 60
         self._update_time_label()
 
     def refresh_habits(self):
-        habits = self.habit_service.list_habits(enabled_only=True)
+        self._habits_task.run(self._load_habits())
+
+    async def _load_habits(self):
+        habits = await self.habit_service.list_habits(enabled_only=True)
+        selected = self.habit_select.value
         self.habit_options = {t("pomodoro.none"): None}
         for h in habits:
             self.habit_options[h.name] = h.id
         self.habit_select.items = list(self.habit_options.keys())
-        self.habit_select.value = t("pomodoro.none")
+        self.habit_select.value = selected if selected in self.habit_options else t("pomodoro.none")
 
-    def start(self, widget):
-        if self.state == "running":
+    async def start(self, widget):
+        if self.state in ("running", "starting"):
             return
-        cfg = self.settings_service.get_config()
-        self.remaining_seconds = cfg.work_minutes * 60
-        habit_id = self.habit_options.get(self.habit_select.value)
-        self.active_session = self.pomodoro_service.start_session(
-            habit_id=habit_id, planned_seconds=self.remaining_seconds
-        )
+        # 读取配置期间标记为 starting，防止重复点击开始两个番茄
+        self.state = "starting"
+        self._config_task.cancel()
+        try:
+            cfg = await self.settings_service.get_config()
+            self.remaining_seconds = cfg.work_minutes * 60
+            habit_id = self.habit_options.get(self.habit_select.value)
+            self.active_session = await self.pomodoro_service.start_session(
+                habit_id=habit_id, planned_seconds=self.remaining_seconds
+            )
+        except BaseException:
+            # 读取配置或创建会话失败（含任务被取消）时回到空闲，开始按钮仍可再次使用
+            self.state = "idle"
+            raise
         self.state = "running"
         self.status_label.text = t("pomodoro.status.running")
         self._start_timer()
@@ -116,15 +143,27 @@ class PomodoroView(toga.Box):
         if self.timer:
             self.timer.cancel()
             self.timer = None
-        if self.active_session:
-            self.pomodoro_service.complete_session(self.active_session, success=success)
+        session, self.active_session = self.active_session, None
         self.state = "finished"
         self.status_label.text = t("pomodoro.status.finished") if success else t("pomodoro.status.stopped")
-        if self.on_data_changed:
-            self.on_data_changed()
-        self.load_default_time()
         self.state = "idle"
-        self.active_session = None
+        # 写库放到线程池，保留任务引用直到完成，避免被回收；失败时弹出错误对话框
+        task = asyncio.get_event_loop().create_task(self._save_session(session, success))
+        self._pending_saves.add(task)
+        task.add_done_callback(self._on_session_saved)
+
+    async def _save_session(self, session: PomodoroSession | None, success: bool):
+        try:
+            if session:
+                await self.pomodoro_service.complete_session(session, success=success)
+        finally:
+            if self.state == "idle":
+                self.load_default_time()
+
+    def _on_session_saved(self, task: asyncio.Task) -> None:
+        self._pending_saves.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self.app.main_window.error_dialog(t("dialog.error"), str(task.exception()))
 
     def _update_time_label(self):
         minutes = self.remaining_seconds // 60
@@ -0,0 +1,57 @@
+import asyncio
+from typing import Callable, List, Optional, Sequence, Tuple, Type
+
+from ..domain.events import DomainEvent
+from ..service.event_bus import EventBus
+
+# 视图刷新回调：收到本轮合并后的、与自己相关的事件列表
+RefreshCallback = Callable[[List[DomainEvent]], None]
+
+
+class RefreshScheduler:
+    """把总线上的事件合并后分发给视图，每个事件循环周期最多刷新一次。
+
+    事件可能在线程池中发布，这里统一转发到事件循环线程；同一周期（或 delay 秒的去抖窗口）内的
+    多个事件合并为一批，每个订阅者只被调用一次，且只收到它关心的事件类型。
+    """
+
+    def __init__(self, bus: EventBus, loop: Optional[asyncio.AbstractEventLoop] = None, delay: float = 0.0):
+        self.loop = loop or asyncio.get_event_loop()
+        self.delay = delay
+        self._watchers: List[Tuple[Tuple[Type[DomainEvent], ...], RefreshCallback]] = []
+        self._pending: List[DomainEvent] = []
+        self._handle: Optional[asyncio.Handle] = None
+        self._unsubscribe = bus.subscribe(DomainEvent, self._on_event)
+
+    def watch(self, event_types: Sequence[Type[DomainEvent]], callback: RefreshCallback) -> None:
+        """订阅若干事件类型；同一批事件中有匹配项时调用一次 callback。"""
+        self._watchers.append((tuple(event_types), callback))
+
+    def close(self) -> None:
+        self._unsubscribe()
+        if self._handle:
+            self._handle.cancel()
+            self._handle = None
+        self._pending.clear()
+
+    def _on_event(self, event: DomainEvent) -> None:
+        # 可能在任意线程调用
+        self.loop.call_soon_threadsafe(self._enqueue, event)
+
+    def _enqueue(self, event: DomainEvent) -> None:
+        self._pending.append(event)
+        if self.delay > 0:
+            # 去抖：窗口内有新事件则顺延
+            if self._handle:
+                self._handle.cancel()
+            self._handle = self.loop.call_later(self.delay, self._flush)
+        elif self._handle is None:
+            self._handle = self.loop.call_soon(self._flush)
+
+    def _flush(self) -> None:
+        self._handle = None
+        events, self._pending = self._pending, []
+        for event_types, callback in list(self._watchers):
+            matched = [event for event in events if isinstance(event, event_types)]
+            if matched:
+                callback(matched)
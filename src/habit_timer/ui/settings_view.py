@@ -1,20 +1,36 @@
+import threading
+
 import toga
 from toga.style import Pack
 from toga.style.pack import COLUMN, ROW
 
-from ..service.settings_service import SettingsService
-from ..service.backup_service import BackupService
+from ..domain.events import DataReloaded
+from ..service.async_service import AsyncService, LatestTask, threadsafe_callback
+from ..service.backup_service import BackupCancelled
 from ..utils.i18n import t
 
 
 class SettingsView(toga.Box):
     """设置视图：调整番茄钟默认配置。"""
 
-    def __init__(self, settings_service: SettingsService, backup_service: BackupService, on_saved=None):
+    # 导入或恢复可能改变配置，需要重新载入表单
+    REFRESH_EVENTS = (DataReloaded,)
+
+    def __init__(
+        self,
+        settings_service: AsyncService,
+        backup_service: AsyncService,
+        snapshot_service: AsyncService,
+    ):
         super().__init__(style=Pack(direction=COLUMN, padding=10, flex=1))
+        # 各服务均为异步外观，导出/导入/快照在线程池中执行，不阻塞界面
         self.settings_service = settings_service
         self.backup_service = backup_service
-        self.on_saved = on_saved
+        self.snapshot_service = snapshot_service
+        self._load_task = LatestTask()
+        self._cancel_event: threading.Event | None = None
+        # 正在执行的长操作（服务方法名），同时只允许一个
+        self._long_op: str | None = None
 
         self.work_input = toga.NumberInput(min_value=1, max_value=120, style=Pack(width=100))
         self.short_input = toga.NumberInput(min_value=1, max_value=60, style=Pack(width=100))
@@ -34,46 +50,114 @@ class SettingsView(toga.Box):
         save_btn = toga.Button(t("settings.save"), on_press=self.save, style=Pack(padding_left=6))
         export_btn = toga.Button(t("settings.export"), on_press=self.export_data, style=Pack(padding_left=6))
         import_btn = toga.Button(t("settings.import"), on_press=self.import_data, style=Pack(padding_left=6))
+        snapshot_btn = toga.Button(t("settings.snapshot"), on_press=self.create_snapshot, style=Pack(padding_left=6))
+        restore_btn = toga.Button(t("settings.restore"), on_press=self.restore_snapshot, style=Pack(padding_left=6))
         self.add(form)
         self.add(save_btn)
         self.add(toga.Box(children=[export_btn, import_btn], style=Pack(direction=ROW, padding_top=6)))
+        self.add(toga.Box(children=[snapshot_btn, restore_btn], style=Pack(direction=ROW, padding_top=6)))
+        self.progress_label = toga.Label("", style=Pack(padding_top=6))
+        self.add(self.progress_label)
         self.load()
 
     def load(self):
-        cfg = self.settings_service.get_config()
+        self._load_task.run(self._load())
+
+    def apply_events(self, events):
+        self.load()
+
+    async def _load(self):
+        cfg = await self.settings_service.get_config()
         self.work_input.value = cfg.work_minutes
         self.short_input.value = cfg.short_break_minutes
         self.long_input.value = cfg.long_break_minutes
         self.interval_input.value = cfg.long_break_interval
 
-    def save(self, widget):
-        cfg = self.settings_service.get_config()
+    async def save(self, widget):
+        self._load_task.cancel()
+        cfg = await self.settings_service.get_config()
         cfg.work_minutes = int(self.work_input.value or cfg.work_minutes)
         cfg.short_break_minutes = int(self.short_input.value or cfg.short_break_minutes)
         cfg.long_break_minutes = int(self.long_input.value or cfg.long_break_minutes)
         cfg.long_break_interval = int(self.interval_input.value or cfg.long_break_interval)
-        self.settings_service.update_config(cfg)
-        if self.on_saved:
-            self.on_saved()
+        await self.settings_service.update_config(cfg)
 
-    def export_data(self, widget):
+    async def export_data(self, widget):
         window = self.app.main_window
-        dest = window.save_file_dialog(t("settings.export"), suggested_filename="habit_backup.json")
+        dest = await window.save_file_dialog(t("settings.export"), suggested_filename="habit_backup.json")
         if dest:
             try:
-                self.backup_service.export_to_file(dest)
+                await self._run_long(self.backup_service.export_to_file, dest)
                 window.info_dialog(t("settings.export"), t("dialog.export_success"))
+            except BackupCancelled:
+                pass
+            except Exception as exc:
+                window.error_dialog(t("dialog.error"), str(exc))
+
+    async def import_data(self, widget):
+        window = self.app.main_window
+        src = await window.open_file_dialog(t("settings.import"))
+        if src:
+            try:
+                report = await self._run_long(
+                    self.backup_service.import_from_file, src, merge_strategy="append"
+                )
+                if report.error_count:
+                    message = t("dialog.import_partial").format(count=report.error_count)
+                else:
+                    message = t("dialog.import_success")
+                window.info_dialog(t("settings.import"), message)
+            except BackupCancelled:
+                pass
+            except Exception as exc:
+                window.error_dialog(t("dialog.error"), str(exc))
+
+    async def create_snapshot(self, widget):
+        window = self.app.main_window
+        dest = await window.save_file_dialog(t("settings.snapshot"), suggested_filename="habit_snapshot.db")
+        if dest:
+            try:
+                await self._run_long(self.snapshot_service.create_snapshot, dest, cancellable=False)
+                window.info_dialog(t("settings.snapshot"), t("dialog.snapshot_success"))
             except Exception as exc:
                 window.error_dialog(t("dialog.error"), str(exc))
 
-    def import_data(self, widget):
+    async def restore_snapshot(self, widget):
         window = self.app.main_window
-        src = window.open_file_dialog(t("settings.import"))
+        src = await window.open_file_dialog(t("settings.restore"))
         if src:
             try:
-                self.backup_service.import_from_file(src, merge_strategy="append")
-                if self.on_saved:
-                    self.on_saved()
-                window.info_dialog(t("settings.import"), t("dialog.import_success"))
+                await self._run_long(self.snapshot_service.restore_snapshot, src, cancellable=False)
+                window.info_dialog(t("settings.restore"), t("dialog.restore_success"))
             except Exception as exc:
                 window.error_dialog(t("dialog.error"), str(exc))
+
+    async def _run_long(self, func, *args, cancellable: bool = True, **kwargs):
+        """执行长操作并在标签上显示进度。
+
+        同时只运行一个长操作：再次发起仍在进行的同一种可取消操作（如重新导出）时取消上一次，
+        其它情况（快照、恢复等不可取消的操作，或不同种类的操作）在上一个操作结束前拒绝开始。
+        """
+        name = func.__name__
+        if self._long_op is not None:
+            if not cancellable or name != self._long_op:
+                raise RuntimeError(t("dialog.busy"))
+            self._cancel_event.set()
+        self._long_op = name
+        cancel_event = self._cancel_event = threading.Event()
+        if cancellable:
+            kwargs["cancel_event"] = cancel_event
+        self.progress_label.text = t("common.loading")
+        try:
+            return await func(*args, progress=threadsafe_callback(self._show_progress), **kwargs)
+        finally:
+            if self._cancel_event is cancel_event:
+                self._cancel_event = None
+                self._long_op = None
+                self.progress_label.text = ""
+
+    def _show_progress(self, done: int, total: int):
+        if self._cancel_event is None or not total:
+            return
+        percent = min(100, done * 100 // total)
+        self.progress_label.text = t("common.progress").format(percent=percent)
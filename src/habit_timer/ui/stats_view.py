@@ -1,9 +1,11 @@
+import asyncio
+
 import toga
 from toga.style import Pack
 from toga.style.pack import COLUMN
 
-from ..service.habit_service import HabitService
-from ..service.pomodoro_service import PomodoroService
+from ..domain.events import DataReloaded, HabitChanged, RecordChanged, SessionCompleted
+from ..service.async_service import AsyncService, LatestTask
 from ..utils.i18n import t
 
 
@@ -13,31 +15,55 @@ class StatsView(toga.Box):
     注意：避免覆盖 Toga 的 refresh（会与子控件刷新递归）。改用 refresh_view。
     """
 
-    def __init__(self, habit_service: HabitService, pomodoro_service: PomodoroService):
+    REFRESH_EVENTS = (HabitChanged, RecordChanged, SessionCompleted, DataReloaded)
+
+    def __init__(self, stats_service: AsyncService, pomodoro_service: AsyncService):
         # 先保存依赖，避免 Box 初始化过程中触发父类 refresh 时属性未就绪
-        self.habit_service = habit_service
+        # stats_service/pomodoro_service 为 StatsService/PomodoroService 的异步外观
+        self.stats_service = stats_service
         self.pomodoro_service = pomodoro_service
+        self.loading_label = toga.Label("", style=Pack(padding_bottom=4))
         self.output = toga.MultilineTextInput(readonly=True, style=Pack(flex=1))
+        self._refresh_task = LatestTask()
         super().__init__(style=Pack(direction=COLUMN, padding=10, flex=1))
+        self.add(self.loading_label)
         self.add(self.output)
         self.refresh_view()
 
     def refresh_view(self):
-        """刷新统计数据文本，避免与 Toga 内部 refresh 互相递归。"""
+        """刷新统计数据文本，避免与 Toga 内部 refresh 互相递归。
+
+        统计在线程池中计算，新的刷新请求会取消尚未完成的旧请求。
+        """
+        self._refresh_task.run(self._load_and_render())
+
+    def apply_events(self, events):
+        # 统计依赖全部习惯与番茄数据，任何相关事件都整体重算（每个事件循环周期最多一次）
+        self.refresh_view()
+
+    async def _load_and_render(self):
+        self.loading_label.text = t("common.loading")
+        # 两类统计互不依赖，在线程池中并行查询（各线程使用自己的只读连接）
+        overview, p_stats = await asyncio.gather(
+            self.stats_service.habit_overview(windows=(7, 30)),
+            self.pomodoro_service.stats_today_week_month(),
+        )
+        self.loading_label.text = ""
+
         lines = []
         lines.append(t("stats.habit"))
-        habits = self.habit_service.list_habits(enabled_only=True)
-        if not habits:
+        if not overview:
             lines.append(t("stats.none"))
-        for h in habits:
-            current, longest = self.habit_service.compute_streaks(h.id)
-            stat7 = self.habit_service.recent_completion_stats(h.id, 7)
-            stat30 = self.habit_service.recent_completion_stats(h.id, 30)
+        for item in overview:
+            h = item["habit"]
+            current, longest = item["current_streak"], item["longest_streak"]
+            stat7, stat30 = item["windows"][7], item["windows"][30]
+            weekly = item["weekly"]
             lines.append(
                 f"- {h.name} 连续:{current}/{longest} | 7天:{stat7['completed']}/{stat7['days']} ({stat7['completion_rate']}%) | 30天:{stat30['completed']}/{stat30['days']} ({stat30['completion_rate']}%)"
+                f" | 周达标:{weekly['weeks_met']}/{weekly['weeks_total']} 连续{weekly['current_streak']}周"
             )
 
-        p_stats = self.pomodoro_service.stats_today_week_month()
         lines.append(f"\n{t('stats.pomodoro')}")
         lines.append(
             f"今天: {p_stats['today']} 个 | 本周: {p_stats['this_week']} 个 | 本月: {p_stats['this_month']} 个"
@@ -2,27 +2,36 @@ import toga
 from toga.style import Pack
 from toga.style.pack import COLUMN, ROW
 
+from ..domain.events import DataReloaded, HabitChanged, RecordChanged
 from ..domain.models import Habit
-from ..service.habit_service import HabitService
-from ..service.record_service import HabitRecordService
+from ..service.async_service import AsyncService, LatestTask
 from ..utils.i18n import t
 
 
 class TodayView(toga.Box):
     """今日习惯视图：展示列表并提供打卡、编辑、删除的 UI 调用流程。"""
 
+    # 连续打卡会受任意日期的打卡影响，因此关心所有 RecordChanged
+    REFRESH_EVENTS = (HabitChanged, RecordChanged, DataReloaded)
+
     def __init__(
         self,
-        habit_service: HabitService,
-        record_service: HabitRecordService,
-        on_data_changed=None,
+        habit_service: AsyncService,
+        record_service: AsyncService,
     ):
         # 先保存依赖与控件引用，再调用父类，避免父类 refresh 链触发访问未初始化属性
+        # habit_service/record_service 为 HabitService/HabitRecordService 的异步外观
         self.habit_service = habit_service
         self.record_service = record_service
-        self.on_data_changed = on_data_changed
         self.list_box = toga.Box(style=Pack(direction=COLUMN))
+        self.loading_label = toga.Label("", style=Pack(padding_bottom=4))
         self.editing_habit_id = None
+        self._refresh_task = LatestTask()
+        # 习惯 id -> 行控件；刷新时与新数据比对，复用已有原生控件
+        self._rows = {}
+        self._dirty_ids = set()
+        self._full_refresh = False
+        self.empty_label = toga.Label(t("today.no_habit"))
 
         self.name_input = toga.TextInput(placeholder=t("today.name"), style=Pack(flex=1))
         self.category_input = toga.TextInput(placeholder=t("today.category"), style=Pack(width=120))
@@ -41,89 +50,166 @@ class TodayView(toga.Box):
 
         super().__init__(style=Pack(direction=COLUMN, padding=10, flex=1))
         self.add(form_row)
+        self.add(self.loading_label)
         self.scroll = toga.ScrollContainer(content=self.list_box, style=Pack(flex=1))
         self.add(self.scroll)
         self.refresh_view()
 
-    def add_habit(self, widget):
+    async def add_habit(self, widget):
         name = self.name_input.value.strip()
         if not name:
             return
         category = self.category_input.value.strip() or "其它"
         target = int(self.target_input.value or 7)
         if self.editing_habit_id:
-            habit = self.habit_service.get_habit(self.editing_habit_id)
+            habit = await self.habit_service.get_habit(self.editing_habit_id)
             if habit:
                 habit.name = name
                 habit.category = category
                 habit.target_per_week = target
-                self.habit_service.update_habit(habit)
+                await self.habit_service.update_habit(habit)
         else:
-            self.habit_service.create_habit(name=name, category=category, target_per_week=target)
+            await self.habit_service.create_habit(name=name, category=category, target_per_week=target)
         self.name_input.value = ""
         self.category_input.value = ""
         self.editing_habit_id = None
         self.add_btn.text = t("today.add")
-        if self.on_data_changed:
-            self.on_data_changed()
-        self.refresh_view()
 
     def refresh_view(self):
-        """重新渲染习惯列表，避免覆盖 Toga 的 refresh。"""
-        # 清空容器中的所有子元素
-        for child in list(self.list_box.children):
-            self.list_box.remove(child)
-        
-        data = self.habit_service.today_status()
-        if not data:
-            self.list_box.add(toga.Label(t("today.no_habit")))
+        """重新加载整个习惯列表，避免覆盖 Toga 的 refresh。
+
+        数据在线程池中加载，新的刷新请求会取消尚未完成的旧请求。
+        """
+        self._full_refresh = True
+        self._refresh_task.run(self._load_and_render())
+
+    def refresh_rows(self, habit_ids):
+        """只重新加载并修补指定习惯的行；整表刷新进行中时改为重新整表刷新。"""
+        if self._full_refresh:
+            self.refresh_view()
             return
+        self._dirty_ids.update(habit_ids)
+        self._refresh_task.run(self._load_and_patch())
 
-        for item in data:
-            habit = item["habit"]
-            is_completed = item["is_completed"]
-            current_streak, longest_streak = self.habit_service.compute_streaks(habit.id)
-
-            row = toga.Box(style=Pack(direction=ROW, alignment="center", padding_bottom=6))
-            info = toga.Label(
-                f"{habit.name} [{habit.category}] 目标/周:{habit.target_per_week} | 连续:{current_streak}/{longest_streak}",
-                style=Pack(flex=1, padding_right=8),
-            )
-            switch = toga.Switch(
-                t("today.complete"), is_on=is_completed, on_change=self._make_toggle_handler(habit.id)
-            )
-            edit_btn = toga.Button(t("today.edit"), on_press=self._make_edit_handler(habit), style=Pack(width=60))
-            delete_btn = toga.Button(t("today.delete"), on_press=self._make_delete_handler(habit.id), style=Pack(width=60))
-            row.add(info)
-            row.add(switch)
-            row.add(edit_btn)
-            row.add(delete_btn)
-            self.list_box.add(row)
-
-    def _make_toggle_handler(self, habit_id: int):
-        def handler(widget):
-            self.record_service.set_today_status(habit_id, widget.is_on)
-            if self.on_data_changed:
-                self.on_data_changed()
+    def apply_events(self, events):
+        if all(isinstance(e, RecordChanged) for e in events):
+            self.refresh_rows({e.habit_id for e in events})
+        else:
             self.refresh_view()
 
-        return handler
+    async def _load_and_render(self):
+        self.loading_label.text = t("common.loading")
+        data = await self.habit_service.today_snapshot()
+        self.loading_label.text = ""
+        self._full_refresh = False
+        self._dirty_ids.clear()
+        self._render(data)
+
+    async def _load_and_patch(self):
+        habit_ids = set(self._dirty_ids)
+        data = await self.habit_service.today_snapshot(habit_ids=habit_ids)
+        self._dirty_ids -= habit_ids
+        for item in data:
+            row = self._rows.get(item["habit"].id)
+            if row:
+                row.update(item)
 
-    def _make_edit_handler(self, habit: Habit):
-        def handler(widget):
-            self.editing_habit_id = habit.id
-            self.name_input.value = habit.name
-            self.category_input.value = habit.category
-            self.target_input.value = habit.target_per_week
-            self.add_btn.text = t("today.save")
+    def _render(self, data):
+        """按习惯 id 与已有行比对：只修补变化的控件，新增/删除的习惯才插入/移除行。"""
+        ids = {item["habit"].id for item in data}
+        for habit_id in [habit_id for habit_id in self._rows if habit_id not in ids]:
+            self.list_box.remove(self._rows.pop(habit_id).box)
 
-        return handler
+        if not data:
+            if self.empty_label not in self.list_box.children:
+                self.list_box.add(self.empty_label)
+            return
+        if self.empty_label in self.list_box.children:
+            self.list_box.remove(self.empty_label)
+
+        for index, item in enumerate(data):
+            row = self._rows.get(item["habit"].id)
+            if row is None:
+                row = self._rows[item["habit"].id] = _HabitRow(self, item)
+            else:
+                row.update(item)
+            children = self.list_box.children
+            if index < len(children) and children[index] is row.box:
+                continue
+            if row.box in children:
+                self.list_box.remove(row.box)
+            self.list_box.insert(index, row.box)
+
+    def start_edit(self, habit: Habit):
+        self.editing_habit_id = habit.id
+        self.name_input.value = habit.name
+        self.category_input.value = habit.category
+        self.target_input.value = habit.target_per_week
+        self.add_btn.text = t("today.save")
+
+
+class _HabitRow:
+    """今日列表中的一行控件，按习惯 id 复用，数据变化时只修补标签与开关。"""
+
+    def __init__(self, view: TodayView, item):
+        self.view = view
+        self.habit = item["habit"]
+        # 数据库中的完成状态；开关值与之相同时说明是程序回写，不再触发写库
+        self.is_completed = item["is_completed"]
+        # 用户最后一次要求的状态；同一行同时只有一个写入在进行，完成后只补写最新状态
+        self._desired = self.is_completed
+        self._writing = False
+        self.info = toga.Label(_row_text(item), style=Pack(flex=1, padding_right=8))
+        self.switch = toga.Switch(t("today.complete"), is_on=self.is_completed, on_change=self.on_toggle)
+        edit_btn = toga.Button(t("today.edit"), on_press=self.on_edit, style=Pack(width=60))
+        delete_btn = toga.Button(t("today.delete"), on_press=self.on_delete, style=Pack(width=60))
+        self.box = toga.Box(
+            children=[self.info, self.switch, edit_btn, delete_btn],
+            style=Pack(direction=ROW, alignment="center", padding_bottom=6),
+        )
 
-    def _make_delete_handler(self, habit_id: int):
-        def handler(widget):
-            self.habit_service.delete_habit(habit_id)
-            if self.on_data_changed:
-                self.on_data_changed()
-            self.refresh_view()
+    def update(self, item) -> None:
+        self.habit = item["habit"]
+        text = _row_text(item)
+        if self.info.text != text:
+            self.info.text = text
+        # 写入进行中时开关反映的是用户的最新操作，不用可能过时的查询结果覆盖
+        if self._writing:
+            return
+        if self.is_completed != item["is_completed"] or self.switch.is_on != item["is_completed"]:
+            self.is_completed = self._desired = item["is_completed"]
+            self.switch.is_on = self.is_completed
 
-        return handler
\ No newline at end of file
+    async def on_toggle(self, widget):
+        self._desired = widget.is_on
+        if self._writing or self._desired == self.is_completed:
+            return
+        self._writing = True
+        try:
+            # 快速连续切换时按顺序写入，最后落库的总是开关的最终状态
+            while self._desired != self.is_completed:
+                target = self._desired
+                # 连续打卡等由 RecordChanged 事件驱动的局部刷新更新
+                await self.view.record_service.set_today_status(self.habit.id, target)
+                self.is_completed = target
+        except Exception as exc:
+            # 写入失败：开关恢复为数据库中的状态
+            self._desired = self.is_completed
+            self.switch.is_on = self.is_completed
+            self.view.app.main_window.error_dialog(t("dialog.error"), str(exc))
+        finally:
+            self._writing = False
+
+    def on_edit(self, widget):
+        self.view.start_edit(self.habit)
+
+    async def on_delete(self, widget):
+        await self.view.habit_service.delete_habit(self.habit.id)
+
+
+def _row_text(item) -> str:
+    habit = item["habit"]
+    return (
+        f"{habit.name} [{habit.category}] 目标/周:{habit.target_per_week}"
+        f" | 连续:{item['current_streak']}/{item['longest_streak']}"
+    )
@@ -0,0 +1,123 @@
+import datetime as _dt
+from typing import List, Optional
+
+# 按天索引的完成位图：第 i 位表示 origin + i 天是否完成（字节内低位在前，即小端序）。
+# 统计都转换为 Python 大整数上的位运算，逐位循环只在生成日历列表时出现。
+
+
+def longest_run(bits: int) -> int:
+    """最长的连续 1 的个数，只需 O(log 长度) 次大整数位运算。"""
+    if bits <= 0:
+        return 0
+    # levels[k] 的第 p 位为 1 表示从第 p 位起至少有 2**k 个连续 1
+    levels = [bits]
+    while True:
+        step = 1 << (len(levels) - 1)
+        longer = levels[-1] & (levels[-1] >> step)
+        if not longer:
+            break
+        levels.append(longer)
+    # 最长长度在 [2**k, 2**(k+1)) 内，从高到低逐位确定
+    length = 1 << (len(levels) - 1)
+    starts = levels[-1]
+    for k in range(len(levels) - 2, -1, -1):
+        extended = starts & (levels[k] >> length)
+        if extended:
+            starts = extended
+            length += 1 << k
+    return length
+
+
+def run_ending_at(bits: int, index: int) -> int:
+    """以第 index 位结尾的连续 1 的个数（第 index 位为 0 时返回 0）。"""
+    if index < 0:
+        return 0
+    mask = (1 << (index + 1)) - 1
+    zeros = ~bits & mask
+    if not zeros:
+        return index + 1
+    return index - (zeros.bit_length() - 1)
+
+
+def count_range(bits: int, start: int, end: int) -> int:
+    """第 start..end 位（含两端）中 1 的个数，越界部分按 0 计。"""
+    start = max(start, 0)
+    if end < start:
+        return 0
+    return ((bits >> start) & ((1 << (end - start + 1)) - 1)).bit_count()
+
+
+class CompletionBitmap:
+    """单个习惯的完成位图，可持久化为 BLOB。
+
+    十年约 3650 位，即 457 字节；一千个习惯约 450 KB，一条查询即可全部载入。
+    """
+
+    __slots__ = ("origin", "bits")
+
+    def __init__(self, origin: _dt.date, bits: bytes = b""):
+        self.origin = origin
+        self.bits = bytearray(bits)
+
+    def index(self, date: _dt.date) -> int:
+        return (date - self.origin).days
+
+    def get(self, date: _dt.date) -> bool:
+        i = self.index(date)
+        if i < 0 or i // 8 >= len(self.bits):
+            return False
+        return bool(self.bits[i // 8] >> (i % 8) & 1)
+
+    def set(self, date: _dt.date, completed: bool) -> None:
+        """设置某天的完成状态；早于 origin 时整体平移，使 origin 恰好前移到该日期（与按记录重建的起点一致）。"""
+        i = self.index(date)
+        if i < 0:
+            bits = self.as_int() << -i
+            self.bits = bytearray(bits.to_bytes((bits.bit_length() + 7) // 8, "little"))
+            self.origin = date
+            i = 0
+        byte, bit = divmod(i, 8)
+        if byte >= len(self.bits):
+            if not completed:
+                return
+            self.bits.extend(bytes(byte + 1 - len(self.bits)))
+        if completed:
+            self.bits[byte] |= 1 << bit
+        else:
+            self.bits[byte] &= ~(1 << bit) & 0xFF
+
+    def as_int(self) -> int:
+        return int.from_bytes(self.bits, "little")
+
+    def to_bytes(self) -> bytes:
+        """持久化用的字节串，去掉末尾全 0 的字节。"""
+        return bytes(self.bits).rstrip(b"\x00")
+
+    def count(self, start: _dt.date, end: _dt.date) -> int:
+        """start..end（含两端）中的完成天数。"""
+        return count_range(self.as_int(), self.index(start), self.index(end))
+
+    def run_ending(self, date: _dt.date) -> int:
+        """截至 date（含）的连续完成天数。"""
+        return run_ending_at(self.as_int(), self.index(date))
+
+    def longest_run(self) -> int:
+        return longest_run(self.as_int())
+
+    def days(self, start: _dt.date, end: _dt.date) -> List[bool]:
+        """start..end 每天的完成状态，用于日历展示。"""
+        length = (end - start).days + 1
+        if length <= 0:
+            return []
+        offset = self.index(start)
+        bits = self.as_int()
+        window = bits >> offset if offset >= 0 else bits << -offset
+        window &= (1 << length) - 1
+        return [c == "1" for c in reversed(f"{window:0{length}b}")]
+
+    def last_completed(self) -> Optional[_dt.date]:
+        """最后一个完成日，没有时返回 None。"""
+        bits = self.as_int()
+        if not bits:
+            return None
+        return self.origin + _dt.timedelta(days=bits.bit_length() - 1)
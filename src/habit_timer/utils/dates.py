@@ -1,5 +1,5 @@
 import datetime as _dt
-from typing import Iterable, List
+from typing import Iterable, List, Optional
 
 # 日期相关的小工具，避免在业务逻辑中直接散落日期操作。
 
@@ -14,6 +14,23 @@ def iso_date(date: _dt.date) -> str:
     return date.isoformat()
 
 
+def epoch_seconds(value: _dt.datetime) -> int:
+    """时间戳转为 Unix 秒；不带时区的时间按 UTC 处理（本应用写入的时间均为 UTC）。"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=_dt.timezone.utc)
+    return int(value.timestamp())
+
+
+def epoch_from_iso(text: Optional[str]) -> Optional[int]:
+    """ISO 时间字符串转为 Unix 秒，空值或无法解析时返回 None。"""
+    if not text:
+        return None
+    try:
+        return epoch_seconds(_dt.datetime.fromisoformat(text))
+    except ValueError:
+        return None
+
+
 def parse_iso(date_str: str) -> _dt.date:
     return _dt.date.fromisoformat(date_str)
 
@@ -12,6 +12,8 @@ STRINGS = {
         "tabs.stats": "统计",
         "tabs.settings": "设置",
         "tabs.calendar": "日历",
+        "common.loading": "加载中…",
+        "common.progress": "处理中… {percent}%",
         "today.add": "添加习惯",
         "today.save": "保存修改",
         "today.no_habit": "还没有习惯，先添加一个吧！",
@@ -24,6 +26,10 @@ STRINGS = {
         "calendar.habit_select": "选择习惯",
         "calendar.no_habit": "请选择习惯",
         "calendar.no_data": "暂无数据",
+        "calendar.mode_recent": "最近30天",
+        "calendar.mode_heatmap": "多年热力图",
+        "calendar.prev": "上一年",
+        "calendar.next": "下一年",
         "pomodoro.none": "无关联",
         "pomodoro.start": "开始番茄",
         "pomodoro.pause": "暂停/继续",
@@ -45,8 +51,14 @@ STRINGS = {
         "settings.interval": "长休间隔",
         "settings.export": "导出数据",
         "settings.import": "导入数据(追加)",
+        "settings.snapshot": "创建快照",
+        "settings.restore": "从快照恢复",
         "dialog.export_success": "导出成功",
         "dialog.import_success": "导入成功",
+        "dialog.import_partial": "导入完成，{count} 行失败已跳过",
+        "dialog.snapshot_success": "快照已保存",
+        "dialog.restore_success": "恢复成功",
+        "dialog.busy": "另一个操作仍在进行，请稍后再试",
         "dialog.error": "错误",
     },
     "en": {
@@ -55,6 +67,8 @@ STRINGS = {
         "tabs.stats": "Stats",
         "tabs.settings": "Settings",
         "tabs.calendar": "Calendar",
+        "common.loading": "Loading…",
+        "common.progress": "Working… {percent}%",
         "today.add": "Add",
         "today.save": "Save",
         "today.no_habit": "No habits yet, add one!",
@@ -67,6 +81,10 @@ STRINGS = {
         "calendar.habit_select": "Habit",
         "calendar.no_habit": "Select a habit",
         "calendar.no_data": "No data",
+        "calendar.mode_recent": "Last 30 days",
+        "calendar.mode_heatmap": "Heatmap",
+        "calendar.prev": "Earlier",
+        "calendar.next": "Later",
         "pomodoro.none": "None",
         "pomodoro.start": "Start",
         "pomodoro.pause": "Pause/Resume",
@@ -88,8 +106,14 @@ STRINGS = {
         "settings.interval": "Long Break Interval",
         "settings.export": "Export Data",
         "settings.import": "Import Data(Append)",
+        "settings.snapshot": "Create Snapshot",
+        "settings.restore": "Restore Snapshot",
         "dialog.export_success": "Export successful",
         "dialog.import_success": "Import successful",
+        "dialog.import_partial": "Import finished, {count} failed rows skipped",
+        "dialog.snapshot_success": "Snapshot saved",
+        "dialog.restore_success": "Restore successful",
+        "dialog.busy": "Another operation is still running, please try again later",
         "dialog.error": "Error",
     },
 }
@@ -0,0 +1,116 @@
+import codecs
+import json
+from typing import Any, BinaryIO, Iterator, Tuple
+
+# 增量解析大 JSON 文件的小工具，只在内存中保留当前元素附近的文本。
+
+READ_CHUNK_SIZE = 64 * 1024
+
+# 解析错误出现在缓冲区末尾这么多个字符以内时，视为元素被块边界截断（如 "tru"、"\u00"），读入下一块重试
+_TRUNCATION_WINDOW = 16
+
+
+class JsonObjectStream:
+    """逐项解析形如 {"key": [item, ...], "key2": value} 的 JSON 文件。
+
+    顶层必须是对象；值为数组时逐个产出数组元素，否则产出整个值。
+    bytes_read 记录已读取的字节数，可用于进度展示。
+    """
+
+    def __init__(self, fp: BinaryIO, chunk_size: int = READ_CHUNK_SIZE):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.bytes_read = 0
+        self._decoder = json.JSONDecoder()
+        self._text_decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        # 已从缓冲区丢弃的文本对应的字节数，用于在错误信息中给出绝对字节偏移
+        self._discarded_bytes = 0
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        """产出 (顶层键, 数组元素或值)。"""
+        self._expect("{")
+        if self._peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            key = self._value()
+            if not isinstance(key, str):
+                raise ValueError("JSON 对象的键必须是字符串")
+            self._expect(":")
+            if self._peek() == "[":
+                self._pos += 1
+                if self._peek() == "]":
+                    self._pos += 1
+                else:
+                    while True:
+                        yield key, self._value()
+                        if self._next_char(",]") == "]":
+                            break
+            else:
+                yield key, self._value()
+            if self._next_char(",}") == "}":
+                return
+
+    def _fill(self) -> bool:
+        """读取下一块并丢弃已消费的文本，返回是否读到新内容。"""
+        if self._eof:
+            return False
+        raw = self.fp.read(self.chunk_size)
+        if self.bytes_read == 0 and raw.startswith(codecs.BOM_UTF8):
+            self._discarded_bytes += len(codecs.BOM_UTF8)
+        self.bytes_read += len(raw)
+        self._discarded_bytes += len(self._buf[: self._pos].encode("utf-8"))
+        self._buf = self._buf[self._pos :] + self._text_decoder.decode(raw, final=not raw)
+        self._pos = 0
+        if not raw:
+            self._eof = True
+        return True
+
+    def _peek(self) -> str:
+        """跳过空白并返回下一个字符，文件结束时返回空串。"""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos].isspace():
+                self._pos += 1
+            if self._pos < len(self._buf) or not self._fill():
+                return self._buf[self._pos : self._pos + 1]
+
+    def _offset(self, pos: int) -> int:
+        """缓冲区位置对应的文件字节偏移。"""
+        return self._discarded_bytes + len(self._buf[:pos].encode("utf-8"))
+
+    def _expect(self, char: str) -> None:
+        if self._peek() != char:
+            raise ValueError(f"JSON 格式错误：期望 {char!r}，位于第 {self._offset(self._pos)} 字节")
+        self._pos += 1
+
+    def _next_char(self, allowed: str) -> str:
+        char = self._peek()
+        if not char or char not in allowed:
+            raise ValueError(f"JSON 格式错误：期望 {allowed!r} 之一，位于第 {self._offset(self._pos)} 字节")
+        self._pos += 1
+        return char
+
+    def _value(self) -> Any:
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError as exc:
+                # 只有错误位于缓冲区末尾（或字符串一直延伸到末尾）时才可能是块边界截断，读入更多后重试；
+                # 其它错误是真正的格式错误，立即报告，不再把文件其余部分读入缓冲区
+                if self._truncated(exc) and self._fill():
+                    continue
+                raise ValueError(f"JSON 格式错误：{exc.msg}，位于第 {self._offset(exc.pos)} 字节") from None
+            # 数字在缓冲区末尾时可能尚未读完整（如 "12"、"1." 或 "1e" 后面还有内容）
+            if end >= len(self._buf) - 2 and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def _truncated(self, exc: json.JSONDecodeError) -> bool:
+        if self._eof:
+            return False
+        return exc.pos >= len(self._buf) - _TRUNCATION_WINDOW or exc.msg.startswith("Unterminated string")
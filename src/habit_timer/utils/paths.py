@@ -0,0 +1,40 @@
+import os
+import sys
+from pathlib import Path
+from typing import Optional
+
+# 应用数据目录：与 Toga 0.4 的 App.paths.data 约定一致，使命令行与图形界面读写同一个数据库。
+# 命令行不导入 Toga，因此在这里按平台复现该约定；设置环境变量 HABIT_TIMER_DATA_DIR 可覆盖。
+
+DATA_DIR_ENV = "HABIT_TIMER_DATA_DIR"
+
+APP_NAME = "habit_timer"
+APP_ID = "com.example.habit_timer"
+FORMAL_NAME = "HabitTimer"
+AUTHOR = "HabitTimer"
+
+DATABASE_FILENAME = "habit_timer.db"
+SNAPSHOT_DIRNAME = "snapshots"
+
+
+def data_dir(default: Optional[Path] = None) -> Path:
+    """应用数据目录；default 为平台约定的目录（图形界面传入 App.paths.data），未给出时按平台推算。"""
+    override = os.environ.get(DATA_DIR_ENV, "").strip()
+    if override:
+        return Path(override).expanduser()
+    if default is not None:
+        return Path(default)
+    home = Path.home()
+    if sys.platform == "win32":
+        return home / "AppData" / "Local" / AUTHOR / FORMAL_NAME / "Data"
+    if sys.platform == "darwin":
+        return home / "Library" / "Application Support" / APP_ID
+    return home / ".local" / "share" / APP_NAME
+
+
+def database_path() -> Path:
+    return data_dir() / DATABASE_FILENAME
+
+
+def snapshot_dir() -> Path:
+    return data_dir() / SNAPSHOT_DIRNAME
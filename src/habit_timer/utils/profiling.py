@@ -0,0 +1,87 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .reporting import report_target, write_report
+
+# 启动阶段计时：设置环境变量 HABIT_TIMER_PROFILE（或命令行 --profile-startup）后启用，取值规则见 utils.reporting。
+# 未启用时 phase/mark 几乎没有开销。
+
+PROFILE_ENV = "HABIT_TIMER_PROFILE"
+
+# 以本模块被导入的时刻作为起点，__main__ 会最先导入它
+_T0 = time.perf_counter()
+
+
+class StartupProfiler:
+    """记录启动各阶段的起止时间，线程安全（数据库可能在线程池中打开）。"""
+
+    def __init__(self, enabled: bool = False, output: Optional[str] = None):
+        self.enabled = enabled
+        self.output = output
+        self._lock = threading.Lock()
+        # (阶段名, 相对起点的开始毫秒, 耗时毫秒, 线程名)
+        self._phases: List[Tuple[str, float, float, str]] = []
+        self._emitted = False
+
+    @classmethod
+    def from_env(cls) -> "StartupProfiler":
+        enabled, output = report_target(PROFILE_ENV)
+        return cls(enabled=enabled, output=output)
+
+    def enable(self, output: Optional[str] = None) -> None:
+        self.enabled = True
+        if output:
+            self.output = output
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(name, start, time.perf_counter())
+
+    def mark(self, name: str) -> None:
+        """记录一个时间点（耗时为 0 的阶段），如“首次显示完成”。"""
+        if self.enabled:
+            now = time.perf_counter()
+            self._record(name, now, now)
+
+    def phases(self) -> List[Tuple[str, float, float, str]]:
+        with self._lock:
+            return list(self._phases)
+
+    def report(self) -> str:
+        lines = ["startup profile (ms)", f"{'start':>9} {'elapsed':>9}  phase"]
+        for name, start, elapsed, thread in sorted(self.phases(), key=lambda p: p[1]):
+            suffix = "" if thread == "MainThread" else f"  [{thread}]"
+            lines.append(f"{start:9.1f} {elapsed:9.1f}  {name}{suffix}")
+        return "\n".join(lines)
+
+    def report_data(self) -> List[Dict[str, object]]:
+        return [
+            {"phase": name, "start_ms": round(start, 3), "elapsed_ms": round(elapsed, 3), "thread": thread}
+            for name, start, elapsed, thread in self.phases()
+        ]
+
+    def emit(self) -> None:
+        """输出一次报告；未启用或已输出过时忽略。"""
+        if not self.enabled or self._emitted:
+            return
+        self._emitted = True
+        write_report(self.output, self.report, self.report_data)
+
+    def _record(self, name: str, start: float, end: float) -> None:
+        with self._lock:
+            self._phases.append(
+                (name, (start - _T0) * 1000, (end - start) * 1000, threading.current_thread().name)
+            )
+
+
+# 进程级单例
+profiler = StartupProfiler.from_env()
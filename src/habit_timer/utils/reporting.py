@@ -0,0 +1,29 @@
+import os
+import sys
+from typing import Any, Callable, Optional, Tuple
+
+# 调试报告（启动计时、SQL 统计）共用的开关与输出规则：由环境变量启用，
+# 取值为 1/true 时报告输出到 stderr；其它取值视为报告文件路径，以 .json 结尾时写 JSON。
+
+
+def report_target(env: str) -> Tuple[bool, Optional[str]]:
+    """读取环境变量，返回 (是否启用, 报告文件路径)；输出到 stderr 时路径为 None。"""
+    value = os.environ.get(env, "").strip()
+    if not value or value.lower() in ("0", "false", "no"):
+        return False, None
+    return True, None if value.lower() in ("1", "true", "yes") else value
+
+
+def write_report(output: Optional[str], text: Callable[[], str], data: Callable[[], Any]) -> None:
+    """输出报告：未给出路径时把 text() 写到 stderr，路径以 .json 结尾时写 data() 的 JSON，否则写 text()。"""
+    if not output:
+        print(text(), file=sys.stderr)
+        return
+    if output.endswith(".json"):
+        import json
+
+        content = json.dumps(data(), ensure_ascii=False, indent=2)
+    else:
+        content = text()
+    with open(output, "w", encoding="utf-8") as fp:
+        fp.write(content + "\n")
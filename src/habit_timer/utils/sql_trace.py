@@ -0,0 +1,222 @@
+import functools
+import inspect
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .reporting import report_target, write_report
+
+# SQL 语句与仓储/服务方法耗时统计：设置环境变量 HABIT_TIMER_SQL_TRACE 后启用，退出时输出报告，取值规则见 utils.reporting。
+#
+# 语句通过 sqlite3 的 set_trace_callback 捕获并归一化为“形状”（字面量替换为 ?，IN 列表折叠）。
+# SQLite 只在语句开始时回调，因此一条语句的耗时取到同一线程下一条语句开始或所在方法返回为止，
+# 包含读取结果行的时间；不在被包装方法内执行的语句只计数，不计耗时。
+
+TRACE_ENV = "HABIT_TIMER_SQL_TRACE"
+
+# 每个语句形状/方法最多保留的耗时样本数，超出后按蓄水池抽样替换
+MAX_SAMPLES = 10_000
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE = re.compile(r"\s+")
+
+
+def statement_shape(sql: str) -> str:
+    """把展开了参数的 SQL 归一化：字面量替换为 ?，IN 列表折叠为 (?...)，空白压缩。"""
+    shape = _STRING.sub("?", sql)
+    shape = _NUMBER.sub("?", shape)
+    shape = _IN_LIST.sub("(?...)", shape)
+    return _SPACE.sub(" ", shape).strip()
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """最近秩法百分位数，sorted_values 须已升序。"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+class _Series:
+    """一组耗时样本（毫秒）。"""
+
+    __slots__ = ("count", "total", "samples", "callers", "issued")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.samples: List[float] = []
+        # 调用来源 -> 次数
+        self.callers: Dict[str, int] = {}
+        # 方法执行期间发出的语句总数（仅方法统计使用）
+        self.issued = 0
+
+    def add(self, elapsed: Optional[float], caller: Optional[str] = None, issued: int = 0) -> None:
+        self.count += 1
+        self.issued += issued
+        if caller:
+            self.callers[caller] = self.callers.get(caller, 0) + 1
+        if elapsed is None:
+            return
+        self.total += elapsed
+        if len(self.samples) < MAX_SAMPLES:
+            self.samples.append(elapsed)
+        else:
+            slot = random.randrange(self.count)
+            if slot < MAX_SAMPLES:
+                self.samples[slot] = elapsed
+
+    def summary(self) -> Dict[str, Any]:
+        values = sorted(self.samples)
+        return {
+            "count": self.count,
+            "total_ms": round(self.total, 3),
+            "p50_ms": round(percentile(values, 50), 3),
+            "p95_ms": round(percentile(values, 95), 3),
+            "p99_ms": round(percentile(values, 99), 3),
+        }
+
+
+class SqlTracer:
+    """收集语句计数与耗时分布，线程安全。
+
+    Database.instrument(tracer) 为所有连接安装语句回调；wrap(obj) 包装仓储或服务实例的公开方法，
+    记录方法耗时，并把方法执行期间的语句归到最内层方法（caller）与最外层方法（origin，通常是服务方法）。
+    """
+
+    def __init__(self, enabled: bool = False, output: Optional[str] = None):
+        self.enabled = enabled
+        self.output = output
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._statements: Dict[str, _Series] = {}
+        self._methods: Dict[str, _Series] = {}
+        self._emitted = False
+
+    @classmethod
+    def from_env(cls) -> "SqlTracer":
+        enabled, output = report_target(TRACE_ENV)
+        return cls(enabled=enabled, output=output)
+
+    # ---- 采集 ----
+
+    def _frames(self) -> List[Tuple[str, int]]:
+        """当前线程的方法栈：(方法名, 进入时已记录的语句数)。"""
+        frames = getattr(self._local, "frames", None)
+        if frames is None:
+            frames = self._local.frames = []
+        return frames
+
+    def trace_statement(self, sql: str) -> None:
+        """sqlite3 语句回调；先结束同线程上一条语句的计时。"""
+        now = time.perf_counter()
+        self._close_pending(now)
+        frames = self._frames()
+        shape = statement_shape(sql)
+        if not frames:
+            self._add(self._statements, shape, None, "<unwrapped>")
+            return
+        self._local.pending = (shape, now, frames[-1][0], frames[0][0])
+        self._local.statements = getattr(self._local, "statements", 0) + 1
+
+    def _close_pending(self, now: float) -> None:
+        pending = getattr(self._local, "pending", None)
+        if pending is None:
+            return
+        self._local.pending = None
+        shape, start, caller, origin = pending
+        label = caller if caller == origin else f"{origin} > {caller}"
+        self._add(self._statements, shape, (now - start) * 1000, label)
+
+    def _add(
+        self,
+        table: Dict[str, _Series],
+        key: str,
+        elapsed: Optional[float],
+        caller: Optional[str] = None,
+        issued: int = 0,
+    ) -> None:
+        with self._lock:
+            series = table.get(key)
+            if series is None:
+                series = table[key] = _Series()
+            series.add(elapsed, caller, issued)
+
+    def wrap(self, obj: Any, label: Optional[str] = None) -> Any:
+        """在实例上用计时包装替换其公开方法（不修改类），返回 obj。"""
+        label = label or type(obj).__name__
+        for name, method in inspect.getmembers(obj, inspect.ismethod):
+            if not name.startswith("_"):
+                setattr(obj, name, self._timed(f"{label}.{name}", method))
+        return obj
+
+    def _timed(self, name: str, method):
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            frames = self._frames()
+            frames.append((name, getattr(self._local, "statements", 0)))
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                now = time.perf_counter()
+                self._close_pending(now)
+                _, statements_before = frames.pop()
+                issued = getattr(self._local, "statements", 0) - statements_before
+                self._add(self._methods, name, (now - start) * 1000, issued=issued)
+
+        return timed
+
+    # ---- 报告 ----
+
+    def report_data(self) -> Dict[str, List[Dict[str, Any]]]:
+        """结构化报告：语句按总耗时降序，方法按总耗时降序。"""
+        with self._lock:
+            statements = [
+                {"statement": shape, **series.summary(), "callers": dict(series.callers)}
+                for shape, series in self._statements.items()
+            ]
+            # 每次调用的平均语句数，随数据量增长的即为 N+1 查询
+            methods = [
+                {"method": name, **series.summary(), "statements_per_call": round(series.issued / series.count, 2)}
+                for name, series in self._methods.items()
+            ]
+        statements.sort(key=lambda item: (item["total_ms"], item["count"]), reverse=True)
+        methods.sort(key=lambda item: item["total_ms"], reverse=True)
+        return {"statements": statements, "methods": methods}
+
+    def report(self, limit: int = 20) -> str:
+        data = self.report_data()
+        lines = ["sql trace: statements (ms)", f"{'count':>7} {'total':>9} {'p50':>8} {'p95':>8} {'p99':>8}  statement"]
+        for item in data["statements"][:limit]:
+            lines.append(
+                f"{item['count']:7d} {item['total_ms']:9.1f} {item['p50_ms']:8.3f} {item['p95_ms']:8.3f} "
+                f"{item['p99_ms']:8.3f}  {item['statement'][:120]}"
+            )
+            top = sorted(item["callers"].items(), key=lambda kv: kv[1], reverse=True)[:3]
+            lines.append(" " * 45 + "<- " + ", ".join(f"{caller} ×{n}" for caller, n in top))
+        lines.append("")
+        lines.append("sql trace: methods (ms)")
+        lines.append(f"{'count':>7} {'total':>9} {'p50':>8} {'p95':>8} {'p99':>8} {'sql/call':>8}  method")
+        for item in data["methods"][:limit]:
+            lines.append(
+                f"{item['count']:7d} {item['total_ms']:9.1f} {item['p50_ms']:8.3f} {item['p95_ms']:8.3f} "
+                f"{item['p99_ms']:8.3f} {item['statements_per_call']:8.2f}  {item['method']}"
+            )
+        return "\n".join(lines)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._statements.clear()
+            self._methods.clear()
+
+    def emit(self) -> None:
+        """输出一次报告；未启用或已输出过时忽略。"""
+        if not self.enabled or self._emitted:
+            return
+        self._emitted = True
+        write_report(self.output, self.report, self.report_data)
@@ -0,0 +1,53 @@
+import datetime as dt
+import random
+
+import pytest
+
+from habit_timer.domain.models import Habit
+from habit_timer.repository.database import Database
+from habit_timer.repository.habit_repository import HabitRepository
+from habit_timer.repository.record_repository import HabitRecordRepository
+
+# 随机打卡历史的日期范围：习惯创建于区间中段，更早的日期即为补录
+HISTORY_START = dt.date(2024, 1, 1)
+HISTORY_DAYS = 120
+CREATED_AT = dt.datetime(2024, 3, 1, 8, 0, tzinfo=dt.timezone.utc)
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(tmp_path / "habit_timer.db")
+    yield database
+    database.close()
+
+
+@pytest.fixture
+def habit_repo(db):
+    return HabitRepository(db)
+
+
+@pytest.fixture
+def record_repo(db):
+    return HabitRecordRepository(db)
+
+
+def create_habit(habit_repo, name: str, created_at: dt.datetime = CREATED_AT) -> int:
+    """创建习惯并把 created_at 改为指定时间（HabitRepository.create 总是写入当前时间）。"""
+    habit_id = habit_repo.create(Habit(id=None, name=name)).id
+    with habit_repo.db.transaction() as conn:
+        conn.execute("UPDATE habits SET created_at=? WHERE id=?", (created_at.isoformat(), habit_id))
+    return habit_id
+
+
+def random_history(habit_repo, record_repo, seed: int, habits: int = 5, writes: int = 300):
+    """按随机顺序写入打卡（含补录更早的日期与覆盖已有日期），返回习惯 id 列表。"""
+    rng = random.Random(seed)
+    ids = [create_habit(habit_repo, f"h{i}") for i in range(habits)]
+    for _ in range(writes):
+        date = HISTORY_START + dt.timedelta(days=rng.randrange(HISTORY_DAYS))
+        record_repo.upsert(rng.choice(ids), date, rng.random() < 0.75)
+    return ids
+
+
+def table_rows(db, table: str):
+    return [tuple(row) for row in db.connect().execute(f"SELECT * FROM {table} ORDER BY 1, 2")]
@@ -0,0 +1,48 @@
+import datetime as dt
+
+import pytest
+
+from habit_timer.service.analytics import AnalyticsService
+
+from conftest import HISTORY_DAYS, HISTORY_START, create_habit, random_history
+
+WINDOWS = (1, 7, 30, 90, 365)
+# 历史开始前、历史中段（含创建日之前）、历史结束当天与之后很久
+TODAYS = [
+    HISTORY_START - dt.timedelta(days=3),
+    HISTORY_START + dt.timedelta(days=45),
+    HISTORY_START + dt.timedelta(days=HISTORY_DAYS - 1),
+    HISTORY_START + dt.timedelta(days=HISTORY_DAYS + 200),
+]
+
+
+@pytest.fixture
+def analytics(habit_repo, record_repo):
+    ids = random_history(habit_repo, record_repo, seed=7)
+    for habit_id, target in zip(ids, (1, 3, 5, 7, 2)):
+        habit = habit_repo.get(habit_id)
+        habit.target_per_week = target
+        habit_repo.update(habit)
+    # 没有任何记录的习惯
+    create_habit(habit_repo, "empty")
+    return AnalyticsService(habit_repo, record_repo)
+
+
+@pytest.mark.parametrize("today", TODAYS)
+def test_numpy_matches_python(analytics, today):
+    pytest.importorskip("numpy")
+    for weeks in (1, 12, 60):
+        python = analytics.compute(windows=WINDOWS, weeks=weeks, today=today, use_numpy=False)
+        numpy = analytics.compute(windows=WINDOWS, weeks=weeks, today=today, use_numpy=True)
+        assert numpy == python
+
+
+@pytest.mark.parametrize("today", TODAYS)
+def test_window_counts_match_records(analytics, record_repo, today):
+    metrics = analytics.compute(windows=WINDOWS, today=today, use_numpy=False)
+    assert len(metrics) == 6
+    for habit_id, result in metrics.items():
+        completed = {r.date for r in record_repo.all_by_habit(habit_id) if r.is_completed}
+        for days in WINDOWS:
+            start = today - dt.timedelta(days=days - 1)
+            assert result.completed[days] == sum(start <= day <= today for day in completed)
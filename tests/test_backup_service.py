@@ -0,0 +1,151 @@
+import datetime as dt
+import json
+import threading
+
+import pytest
+
+from habit_timer.domain.models import Habit, PomodoroSession
+from habit_timer.repository.config_repository import ConfigRepository
+from habit_timer.repository.pomodoro_repository import PomodoroRepository
+from habit_timer.service.backup_service import BackupCancelled, BackupService
+
+from conftest import table_rows
+
+TABLES = (
+    "habits",
+    "habit_records",
+    "pomodoro_sessions",
+    "habit_streaks",
+    "habit_bitmaps",
+    "habit_weekly",
+    "pomodoro_daily",
+)
+
+
+@pytest.fixture
+def backup(db, habit_repo, record_repo):
+    pomodoro_repo = PomodoroRepository(db)
+    ids = [habit_repo.create(Habit(id=None, name=f"h{i}")).id for i in range(10)]
+    start = dt.date(2024, 1, 1)
+    for habit_id in ids:
+        for day in range(100):
+            record_repo.upsert(habit_id, start + dt.timedelta(days=day), day % 3 != 0)
+    for hour in range(50):
+        begin = dt.datetime(2024, 1, 1, 8, tzinfo=dt.timezone.utc) + dt.timedelta(hours=hour)
+        pomodoro_repo.add_session(
+            PomodoroSession(
+                id=None,
+                habit_id=ids[0],
+                start_time=begin,
+                end_time=begin + dt.timedelta(minutes=25),
+                duration_seconds=1500,
+                status="completed",
+            )
+        )
+    return BackupService(habit_repo, record_repo, pomodoro_repo, ConfigRepository(db))
+
+
+def snapshot(db):
+    return {table: table_rows(db, table) for table in TABLES}
+
+
+@pytest.fixture
+def exported(backup, tmp_path):
+    path = tmp_path / "backup.json"
+    backup.export_to_file(path)
+    return path
+
+
+@pytest.mark.parametrize("defer_indexes", [False, True])
+def test_truncated_replace_import_keeps_existing_data(db, backup, exported, tmp_path, defer_indexes):
+    data = exported.read_bytes()
+    truncated = tmp_path / "truncated.json"
+    truncated.write_bytes(data[: data.index(b'"habit_records"') + 20_000])
+    before = snapshot(db)
+    with pytest.raises(ValueError):
+        backup.import_from_file(truncated, merge_strategy="replace", batch_size=100, defer_indexes=defer_indexes)
+    assert snapshot(db) == before
+    indexes = db.connect().execute("SELECT COUNT(*) FROM sqlite_master WHERE type='index' AND name LIKE 'idx_%'")
+    assert indexes.fetchone()[0] >= 3
+
+
+def test_cancelled_replace_import_keeps_existing_data(db, backup, exported):
+    before = snapshot(db)
+    cancel = threading.Event()
+    # 第一批写入后取消，此时清空与已写入的批次都只在未提交的事务中
+    with pytest.raises(BackupCancelled):
+        backup.import_from_file(
+            exported,
+            merge_strategy="replace",
+            batch_size=50,
+            progress=lambda done, total: cancel.set(),
+            cancel_event=cancel,
+        )
+    assert snapshot(db) == before
+
+
+def test_malformed_json_reports_offset(backup, tmp_path):
+    path = tmp_path / "malformed.json"
+    path.write_text('{"habits": [{"id": 1,,}]}', encoding="utf-8")
+    with pytest.raises(ValueError, match="第 21 字节"):
+        backup.import_from_file(path, merge_strategy="replace")
+
+
+def test_replace_import_round_trip(db, backup, exported):
+    before = snapshot(db)
+    report = backup.import_from_file(exported, merge_strategy="replace", batch_size=100)
+    assert report.error_count == 0
+    assert snapshot(db) == before
+
+
+def read_export(path):
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def test_export_filters_by_habit_and_date(backup, habit_repo, tmp_path):
+    ids = sorted(h.id for h in habit_repo.list_all())
+    path = tmp_path / "filtered.json"
+    start, end = dt.date(2024, 1, 10), dt.date(2024, 1, 19)
+    written = backup.export_to_file(path, habit_ids=ids[1:3], start=start, end=end)
+    data = read_export(path)
+    assert [h["id"] for h in data["habits"]] == ids[1:3]
+    assert {r["habit_id"] for r in data["habit_records"]} == set(ids[1:3])
+    assert sorted({r["date"] for r in data["habit_records"]}) == [
+        (start + dt.timedelta(days=i)).isoformat() for i in range(10)
+    ]
+    assert data["pomodoros"] == []
+    assert written == 2 + 20
+
+
+def test_export_pomodoro_range_includes_whole_end_day(backup, habit_repo, tmp_path):
+    first = min(h.id for h in habit_repo.list_all())
+    path = tmp_path / "day.ndjson"
+    day = dt.date(2024, 1, 2)
+    backup.export_to_file(path, habit_ids=[first], start=day, end=day)
+    lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    pomodoros = [line["data"] for line in lines if line["type"] == "pomodoro"]
+    # 从 1 月 1 日 8 点起每小时一个，第 16~39 个落在 1 月 2 日（UTC）
+    assert len(pomodoros) == 24
+    assert all(p["start_time"].startswith("2024-01-02") for p in pomodoros)
+    assert [line["type"] for line in lines].count("habit_record") == 1
+
+
+def test_export_progress_reaches_total(backup, tmp_path):
+    calls = []
+    written = backup.export_to_file(
+        tmp_path / "all.json", progress=lambda done, total: calls.append((done, total)), chunk_size=64
+    )
+    assert written == 10 + 1000 + 50
+    assert calls[-1] == (written, written)
+    assert all(total == written for _, total in calls)
+    assert [done for done, _ in calls] == sorted(done for done, _ in calls)
+
+
+def test_cancelled_export_keeps_existing_file(backup, tmp_path):
+    path = tmp_path / "backup.json"
+    path.write_text("old", encoding="utf-8")
+    cancel = threading.Event()
+    with pytest.raises(BackupCancelled):
+        backup.export_to_file(path, progress=lambda done, total: cancel.set(), cancel_event=cancel, chunk_size=64)
+    assert path.read_text(encoding="utf-8") == "old"
+    assert not path.with_name(path.name + ".tmp").exists()
@@ -0,0 +1,71 @@
+import datetime as dt
+
+import pytest
+
+from habit_timer.service.analytics import AnalyticsService
+from habit_timer.utils.bitset import CompletionBitmap
+
+from conftest import CREATED_AT, HISTORY_DAYS, HISTORY_START, create_habit, random_history, table_rows
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_backdated_upserts_match_rebuild(db, habit_repo, record_repo, seed):
+    random_history(habit_repo, record_repo, seed)
+    incremental = table_rows(db, "habit_bitmaps")
+    record_repo.bitmaps.rebuild()
+    assert table_rows(db, "habit_bitmaps") == incremental
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_bitmap_bits_match_records(habit_repo, record_repo, seed):
+    ids = random_history(habit_repo, record_repo, seed)
+    bitmaps = record_repo.bitmaps.load(ids)
+    end = HISTORY_START + dt.timedelta(days=HISTORY_DAYS - 1)
+    for habit_id in ids:
+        records = {r.date: r.is_completed for r in record_repo.all_by_habit(habit_id)}
+        bitmap = bitmaps[habit_id]
+        assert habit_repo.get(habit_id).created_at == CREATED_AT
+        # 每个习惯都有早于创建日的补录，起点取最早的记录
+        assert bitmap.origin == min(records) < CREATED_AT.date()
+        days = [HISTORY_START + dt.timedelta(days=i) for i in range(HISTORY_DAYS)]
+        assert bitmap.days(HISTORY_START, end) == [records.get(day, False) for day in days]
+
+
+def test_origin_is_created_at_without_earlier_records(db, habit_repo, record_repo):
+    habit_id = create_habit(habit_repo, "h")
+    record_repo.upsert(habit_id, CREATED_AT.date() + dt.timedelta(days=2), True)
+    record_repo.upsert(habit_id, CREATED_AT.date() + dt.timedelta(days=5), False)
+    assert record_repo.bitmaps.get(habit_id).origin == CREATED_AT.date()
+    incremental = table_rows(db, "habit_bitmaps")
+    record_repo.bitmaps.rebuild()
+    assert table_rows(db, "habit_bitmaps") == incremental
+    assert record_repo.bitmaps.get(habit_id).origin == CREATED_AT.date()
+
+
+def test_uncompleted_backdated_record_moves_origin(db, habit_repo, record_repo):
+    habit_id = create_habit(habit_repo, "h")
+    record_repo.upsert(habit_id, CREATED_AT.date(), True)
+    record_repo.upsert(habit_id, CREATED_AT.date() - dt.timedelta(days=3), False)
+    assert record_repo.bitmaps.get(habit_id).origin == CREATED_AT.date() - dt.timedelta(days=3)
+    incremental = table_rows(db, "habit_bitmaps")
+    record_repo.bitmaps.rebuild()
+    assert table_rows(db, "habit_bitmaps") == incremental
+
+
+def test_weeks_total_stable_across_rebuild(habit_repo, record_repo):
+    ids = random_history(habit_repo, record_repo, seed=4)
+    analytics = AnalyticsService(habit_repo, record_repo)
+    today = HISTORY_START + dt.timedelta(days=HISTORY_DAYS)
+    before = analytics.compute(ids, today=today, use_numpy=False)
+    record_repo.bitmaps.rebuild()
+    assert analytics.compute(ids, today=today, use_numpy=False) == before
+
+
+def test_set_before_origin_shifts_exactly():
+    bitmap = CompletionBitmap(dt.date(2024, 1, 10))
+    bitmap.set(dt.date(2024, 1, 12), True)
+    bitmap.set(dt.date(2024, 1, 7), True)
+    assert bitmap.origin == dt.date(2024, 1, 7)
+    assert bitmap.days(dt.date(2024, 1, 6), dt.date(2024, 1, 13)) == [
+        False, True, False, False, False, False, True, False,
+    ]
@@ -0,0 +1,74 @@
+import datetime as dt
+
+import pytest
+
+from habit_timer.domain.models import Habit
+from habit_timer.repository.caching import CachingRecordRepository
+
+DAY = dt.date(2024, 5, 1)
+WEEK_END = DAY + dt.timedelta(days=6)
+
+
+@pytest.fixture
+def cached(db):
+    return CachingRecordRepository(db, max_entries=4)
+
+
+@pytest.fixture
+def habits(habit_repo):
+    return [habit_repo.create(Habit(id=None, name=f"h{i}")).id for i in range(2)]
+
+
+def test_hits_and_misses(cached, habits):
+    first, _ = habits
+    cached.upsert(first, DAY, True)
+    assert cached.fetch_record_tuples(first, DAY, WEEK_END) == cached.fetch_record_tuples(first, DAY, WEEK_END)
+    cached.status_on_date(DAY)
+    assert (cached.cache_stats.hits, cached.cache_stats.misses) == (1, 2)
+    assert cached.cache_stats.hit_rate == pytest.approx(33.33)
+
+
+def test_upsert_evicts_only_overlapping_entries(cached, habits):
+    first, second = habits
+    cached.fetch_record_tuples(first, DAY, WEEK_END)
+    cached.fetch_record_tuples(first, WEEK_END + dt.timedelta(days=1), WEEK_END + dt.timedelta(days=7))
+    cached.fetch_record_tuples(second, DAY, WEEK_END)
+    cached.status_on_date(DAY + dt.timedelta(days=2))
+    cached.upsert(first, DAY + dt.timedelta(days=2), True)
+    misses = cached.cache_stats.misses
+    # 其它周、其它习惯的条目仍命中；同一周与全体习惯的当日状态重新读取且能读到新写入
+    cached.fetch_record_tuples(first, WEEK_END + dt.timedelta(days=1), WEEK_END + dt.timedelta(days=7))
+    cached.fetch_record_tuples(second, DAY, WEEK_END)
+    assert cached.cache_stats.misses == misses
+    assert [r.date for r in cached.fetch_record_tuples(first, DAY, WEEK_END)] == [DAY + dt.timedelta(days=2)]
+    assert cached.status_on_date(DAY + dt.timedelta(days=2)) == {first: True}
+    assert cached.cache_stats.misses == misses + 2
+
+
+def test_invalidate_habit_without_date(cached, habits):
+    first, second = habits
+    cached.fetch_record_tuples(first, DAY, WEEK_END)
+    cached.get_by_habit_date(first, DAY)
+    cached.fetch_record_tuples(second, DAY, WEEK_END)
+    cached.invalidate(first)
+    misses = cached.cache_stats.misses
+    cached.fetch_record_tuples(second, DAY, WEEK_END)
+    assert cached.cache_stats.misses == misses
+    cached.fetch_record_tuples(first, DAY, WEEK_END)
+    cached.get_by_habit_date(first, DAY)
+    assert cached.cache_stats.misses == misses + 2
+
+
+def test_lru_bound(cached, habits):
+    first, _ = habits
+    days = [DAY + dt.timedelta(days=i) for i in range(6)]
+    for day in days:
+        cached.get_by_habit_date(first, day)
+    assert len(cached._entries) == 4
+    # 最近使用的条目保留，最早的两条被淘汰
+    cached.get_by_habit_date(first, days[2])
+    cached.get_by_habit_date(first, days[5])
+    assert cached.cache_stats.hits == 2
+    cached.get_by_habit_date(first, days[0])
+    assert cached.cache_stats.hits == 2
+    assert len(cached._entries) == 4
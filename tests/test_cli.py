@@ -0,0 +1,52 @@
+import datetime as dt
+import json
+
+from habit_timer import cli
+from habit_timer.domain.models import Habit
+from habit_timer.service.event_bus import EventBus
+from habit_timer.service.habit_service import HabitService
+
+
+def run_json(db, capsys, *argv):
+    assert cli.main(["--db", str(db.db_path), "--json", *argv]) == 0
+    return json.loads(capsys.readouterr().out)
+
+
+def test_list_matches_today_snapshot(db, habit_repo, record_repo, capsys):
+    today = dt.date.today()
+    ids = [habit_repo.create(Habit(id=None, name=f"h{i}", category="c")).id for i in range(4)]
+    disabled = habit_repo.get(ids[1])
+    disabled.enabled = False
+    habit_repo.update(disabled)
+    habit_repo.soft_delete(ids[2])
+    for day in range(3):
+        record_repo.upsert(ids[0], today - dt.timedelta(days=day), True)
+    record_repo.upsert(ids[3], today, False)
+    # 连续打卡缓存缺失的习惯由 list 重建
+    db.connect().execute("DELETE FROM habit_streaks WHERE habit_id=?", (ids[3],))
+    db.flush()
+
+    listed = run_json(db, capsys, "list")
+    expected = [
+        {
+            **{key: getattr(item["habit"], key) for key in ("id", "name", "category", "target_per_week", "enabled")},
+            "today": item["is_completed"],
+            "current_streak": item["current_streak"],
+            "longest_streak": item["longest_streak"],
+        }
+        for item in HabitService(habit_repo, record_repo, EventBus()).today_snapshot()
+    ]
+    assert sorted(listed, key=lambda item: item["id"]) == sorted(expected, key=lambda item: item["id"])
+    assert {item["id"] for item in expected} == {ids[0], ids[3]}
+
+
+def test_check_in_by_name(db, habit_repo, capsys):
+    habit_id = habit_repo.create(Habit(id=None, name="跑步")).id
+    data = run_json(db, capsys, "check-in", "跑步", "--date", "2024-05-01")
+    assert data == {
+        "habit_id": habit_id,
+        "date": "2024-05-01",
+        "is_completed": True,
+        "current_streak": 1,
+        "longest_streak": 1,
+    }
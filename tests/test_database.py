@@ -0,0 +1,62 @@
+import datetime as dt
+import sqlite3
+
+import pytest
+
+from habit_timer.domain.models import Habit
+
+DAY = dt.date(2024, 5, 1)
+
+
+def committed_records(db):
+    """通过独立连接读取已提交的打卡记录。"""
+    conn = sqlite3.connect(db.db_path)
+    try:
+        return conn.execute("SELECT habit_id, date, is_completed FROM habit_records ORDER BY habit_id").fetchall()
+    finally:
+        conn.close()
+
+
+def test_failed_unit_keeps_earlier_group_commit_units(db, habit_repo, record_repo):
+    first = habit_repo.create(Habit(id=None, name="a")).id
+    second = habit_repo.create(Habit(id=None, name="b")).id
+    db.enable_group_commit(delay=60)
+    record_repo.upsert(first, DAY, True)
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            record_repo.upsert(second, DAY, True)
+            raise RuntimeError("boom")
+    db.flush()
+    assert committed_records(db) == [(first, DAY.isoformat(), 1)]
+    assert record_repo.get_streak(first) == (1, 1)
+    assert record_repo.get_streak(second) == (0, 0)
+
+
+def test_group_commit_defers_until_flush(db, habit_repo, record_repo):
+    habit_id = habit_repo.create(Habit(id=None, name="a")).id
+    db.enable_group_commit(delay=60)
+    record_repo.upsert(habit_id, DAY, True)
+    assert committed_records(db) == []
+    db.flush()
+    assert committed_records(db) == [(habit_id, DAY.isoformat(), 1)]
+
+
+def test_nested_failure_rolls_back_inner_unit_only(db, habit_repo, record_repo):
+    habit_id = habit_repo.create(Habit(id=None, name="a")).id
+    with db.transaction():
+        record_repo.upsert(habit_id, DAY, True)
+        with pytest.raises(RuntimeError):
+            with db.transaction():
+                record_repo.upsert(habit_id, DAY + dt.timedelta(days=1), True)
+                raise RuntimeError("boom")
+    assert committed_records(db) == [(habit_id, DAY.isoformat(), 1)]
+
+
+def test_failed_unit_without_pending_work_rolls_back(db, habit_repo, record_repo):
+    habit_id = habit_repo.create(Habit(id=None, name="a")).id
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            record_repo.upsert(habit_id, DAY, True)
+            raise RuntimeError("boom")
+    assert committed_records(db) == []
+    assert not db.connect().in_transaction
@@ -0,0 +1,169 @@
+import datetime as dt
+import random
+import sqlite3
+
+from habit_timer.repository import database, migrations
+from habit_timer.repository.database import Database
+from habit_timer.repository.pomodoro_repository import PomodoroRepository
+from habit_timer.repository.record_repository import HabitRecordRepository
+
+from conftest import table_rows
+
+# 引入 user_version 迁移之前的表结构（user_version 为 0）
+BASELINE_SCHEMA = """
+CREATE TABLE habits (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    description TEXT DEFAULT '',
+    category TEXT DEFAULT '其它',
+    target_per_week INTEGER DEFAULT 7,
+    enabled INTEGER DEFAULT 1,
+    created_at TEXT NOT NULL,
+    deleted_at TEXT
+);
+CREATE TABLE habit_records (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    habit_id INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    is_completed INTEGER NOT NULL,
+    note TEXT DEFAULT '',
+    recorded_at TEXT NOT NULL,
+    FOREIGN KEY(habit_id) REFERENCES habits(id) ON DELETE CASCADE,
+    UNIQUE(habit_id, date)
+);
+CREATE INDEX idx_habit_records_habit_date ON habit_records(habit_id, date);
+CREATE TABLE pomodoro_sessions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    habit_id INTEGER,
+    start_time TEXT NOT NULL,
+    end_time TEXT,
+    duration_seconds INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    FOREIGN KEY(habit_id) REFERENCES habits(id) ON DELETE SET NULL
+);
+CREATE INDEX idx_pomodoro_start_time ON pomodoro_sessions(start_time);
+CREATE TABLE app_config (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    work_minutes INTEGER NOT NULL DEFAULT 25,
+    short_break_minutes INTEGER NOT NULL DEFAULT 5,
+    long_break_minutes INTEGER NOT NULL DEFAULT 15,
+    long_break_interval INTEGER NOT NULL DEFAULT 4
+);
+INSERT INTO app_config(id, work_minutes, short_break_minutes, long_break_minutes, long_break_interval)
+VALUES (1, 25, 5, 15, 4);
+"""
+
+DERIVED_TABLES = ("habit_streaks", "habit_bitmaps", "habit_weekly", "pomodoro_daily")
+
+
+def make_baseline_db(path, seed: int = 7) -> None:
+    rng = random.Random(seed)
+    start = dt.date(2024, 1, 1)
+    conn = sqlite3.connect(path)
+    conn.executescript(BASELINE_SCHEMA)
+    for habit_id in range(1, 31):
+        created = start + dt.timedelta(days=rng.randrange(60))
+        conn.execute(
+            "INSERT INTO habits(id, name, target_per_week, created_at) VALUES(?, ?, ?, ?)",
+            (habit_id, f"h{habit_id}", rng.randint(1, 7), f"{created.isoformat()}T08:00:00+00:00"),
+        )
+        days = rng.sample(range(120), rng.randrange(0, 80))
+        conn.executemany(
+            "INSERT INTO habit_records(habit_id, date, is_completed, recorded_at) VALUES(?, ?, ?, '2024-05-01')",
+            [(habit_id, (start + dt.timedelta(days=d)).isoformat(), rng.random() < 0.8) for d in days],
+        )
+    for _ in range(500):
+        begin = dt.datetime(2024, 1, 1, tzinfo=dt.timezone.utc) + dt.timedelta(minutes=rng.randrange(170_000))
+        conn.execute(
+            """
+            INSERT INTO pomodoro_sessions(habit_id, start_time, end_time, duration_seconds, status)
+            VALUES(?, ?, ?, ?, ?)
+            """,
+            (
+                rng.choice([None, 1, 2, 3]),
+                begin.isoformat(),
+                (begin + dt.timedelta(minutes=25)).isoformat(),
+                1500,
+                rng.choice(["completed", "completed", "aborted", "running"]),
+            ),
+        )
+    conn.commit()
+    conn.close()
+
+
+def test_schema_version_matches_latest_migration():
+    assert database.SCHEMA_VERSION == migrations.LATEST_VERSION
+
+
+def test_baseline_database_migrates_to_latest(tmp_path):
+    path = tmp_path / "baseline.db"
+    make_baseline_db(path)
+    progress = []
+    db = Database(path, migration_progress=lambda version, done, total: progress.append(version))
+    try:
+        conn = db.connect()
+        assert migrations.schema_version(conn) == migrations.LATEST_VERSION
+        assert set(progress) == {3, 4, 5, 6, 7}
+        assert conn.execute("SELECT COUNT(*) FROM pomodoro_sessions WHERE start_epoch IS NULL").fetchone()[0] == 0
+        migrated = {table: table_rows(db, table) for table in DERIVED_TABLES}
+        assert all(migrated.values())
+
+        # 迁移回填的派生数据与当前代码的完整重建一致
+        HabitRecordRepository(db).rebuild_caches()
+        PomodoroRepository(db).rebuild_daily()
+        assert {table: table_rows(db, table) for table in DERIVED_TABLES} == migrated
+    finally:
+        db.close()
+
+
+def test_migrations_are_idempotent(tmp_path):
+    path = tmp_path / "baseline.db"
+    make_baseline_db(path)
+    db = Database(path)
+    try:
+        db.connect()
+        snapshot = {table: table_rows(db, table) for table in DERIVED_TABLES}
+        # 已是最新版本时不再执行任何迁移
+        assert migrations.run_migrations(db) == []
+        assert {table: table_rows(db, table) for table in DERIVED_TABLES} == snapshot
+    finally:
+        db.close()
+
+
+def test_v6_backfills_epochs_from_iso_text(tmp_path):
+    path = tmp_path / "baseline.db"
+    make_baseline_db(path)
+    conn = sqlite3.connect(path)
+    # 旧版本写入过的各种时间文本：不带时区按 UTC，带偏移的按偏移换算，无法解析与缺失的保持 NULL
+    samples = [
+        ("2024-03-01T08:00:00", "2024-03-01T08:25:00", 1709280000, 1709281500),
+        ("2024-03-01T16:00:00+08:00", "2024-03-01T16:25:00.5+08:00", 1709280000, 1709281500),
+        ("2024-03-01 08:00:00Z", None, 1709280000, None),
+        ("not a time", "", None, None),
+    ]
+    ids = [
+        conn.execute(
+            """
+            INSERT INTO pomodoro_sessions(habit_id, start_time, end_time, duration_seconds, status)
+            VALUES(NULL, ?, ?, 1500, 'completed')
+            """,
+            (start, end),
+        ).lastrowid
+        for start, end, _, _ in samples
+    ]
+    conn.commit()
+    conn.close()
+    db = Database(path)
+    try:
+        conn = db.connect()
+        rows = {
+            row_id: (start, end)
+            for row_id, start, end in conn.execute("SELECT id, start_epoch, end_epoch FROM pomodoro_sessions")
+        }
+        assert [rows[row_id] for row_id in ids] == [(start, end) for _, _, start, end in samples]
+        # 基线数据中的每一条都能解析
+        assert sum(start is None for start, _ in rows.values()) == 1
+        indexes = {row[1] for row in conn.execute("PRAGMA index_list(pomodoro_sessions)")}
+        assert "idx_pomodoro_status_start_epoch" in indexes
+    finally:
+        db.close()
@@ -0,0 +1,115 @@
+import datetime as dt
+import random
+import time
+from collections import Counter
+
+import pytest
+
+from habit_timer.domain.models import PomodoroSession
+from habit_timer.repository.pomodoro_repository import PomodoroRepository
+
+from conftest import create_habit, table_rows
+
+BEGIN = dt.datetime(2024, 3, 1, tzinfo=dt.timezone.utc)
+
+
+@pytest.fixture
+def pomodoro_repo(db):
+    return PomodoroRepository(db)
+
+
+def add_sessions(habit_repo, pomodoro_repo, seed: int, count: int = 300):
+    """随机写入番茄（含未关联习惯的），返回全部记录。"""
+    rng = random.Random(seed)
+    habit_ids = [None, create_habit(habit_repo, "a"), create_habit(habit_repo, "b")]
+    sessions = []
+    for _ in range(count):
+        start = BEGIN + dt.timedelta(minutes=rng.randrange(60 * 24 * 30))
+        duration = rng.choice([300, 1500, 3000])
+        sessions.append(
+            pomodoro_repo.add_session(
+                PomodoroSession(
+                    id=None,
+                    habit_id=rng.choice(habit_ids),
+                    start_time=start,
+                    end_time=start + dt.timedelta(seconds=duration),
+                    duration_seconds=duration,
+                    status=rng.choice(["completed", "completed", "aborted", "running"]),
+                )
+            )
+        )
+    return sessions
+
+
+def completed_between(sessions, start, end):
+    return sum(s.status == "completed" and start <= s.start_time <= end for s in sessions)
+
+
+def test_count_between_matches_sessions(habit_repo, pomodoro_repo):
+    sessions = add_sessions(habit_repo, pomodoro_repo, seed=1)
+    end = BEGIN + dt.timedelta(days=20)
+    for start in (BEGIN, BEGIN + dt.timedelta(days=3, hours=5), end, end + dt.timedelta(seconds=1)):
+        assert pomodoro_repo.count_between(start, end) == completed_between(sessions, start, end)
+    # 两端都包含：以某条记录的开始时间为边界
+    first = next(s for s in sessions if s.status == "completed")
+    moment = first.start_time
+    assert pomodoro_repo.count_between(moment, moment) == completed_between(sessions, moment, moment) >= 1
+
+
+def test_count_since_many_matches_count_between(habit_repo, pomodoro_repo):
+    sessions = add_sessions(habit_repo, pomodoro_repo, seed=2)
+    end = BEGIN + dt.timedelta(days=25, hours=3)
+    # 不按顺序的起点，含晚于 end 的起点
+    starts = [
+        end - dt.timedelta(days=7),
+        BEGIN,
+        end - dt.timedelta(hours=1),
+        end + dt.timedelta(days=1),
+        BEGIN + dt.timedelta(days=12),
+    ]
+    counts = pomodoro_repo.count_since_many(starts, end)
+    assert counts == [pomodoro_repo.count_between(start, end) for start in starts]
+    assert counts == [completed_between(sessions, start, end) for start in starts]
+    assert pomodoro_repo.count_since_many([], end) == []
+
+
+@pytest.fixture(params=["CST-8", "EST5EDT,M3.2.0,M11.1.0"])
+def local_tz(request, monkeypatch):
+    """切换本机时区（POSIX TZ 串，不依赖 tzdata），结束后恢复。"""
+    monkeypatch.setenv("TZ", request.param)
+    time.tzset()
+    yield request.param
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_daily_rollup_matches_rebuild_across_local_midnight(db, habit_repo, pomodoro_repo, local_tz):
+    sessions = add_sessions(habit_repo, pomodoro_repo, seed=3)
+    # 每个本地午夜前后各一秒的番茄，含 3 月 10 日夏令时切换当天
+    for day in range(1, 20):
+        midnight = dt.datetime(2024, 3, day).astimezone(dt.timezone.utc)
+        for offset in (-1, 0):
+            start = midnight + dt.timedelta(seconds=offset)
+            sessions.append(
+                pomodoro_repo.add_session(
+                    PomodoroSession(
+                        id=None,
+                        habit_id=None,
+                        start_time=start,
+                        end_time=None,
+                        duration_seconds=60,
+                        status="completed",
+                    )
+                )
+            )
+    incremental = table_rows(db, "pomodoro_daily")
+    local_days = Counter(s.start_time.astimezone().date().isoformat() for s in sessions if s.status == "completed")
+    completed_by_day = Counter()
+    for day, _, completed, _, _ in incremental:
+        completed_by_day[day] += completed
+    assert completed_by_day == local_days
+
+    pomodoro_repo.rebuild_daily()
+    assert table_rows(db, "pomodoro_daily") == incremental
+    pomodoro_repo.rebuild_daily(dt.date(2024, 3, 9), dt.date(2024, 3, 11))
+    assert table_rows(db, "pomodoro_daily") == incremental
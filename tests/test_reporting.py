@@ -0,0 +1,53 @@
+import json
+
+import pytest
+
+from habit_timer.utils.profiling import PROFILE_ENV, StartupProfiler
+from habit_timer.utils.reporting import report_target, write_report
+from habit_timer.utils.sql_trace import TRACE_ENV, SqlTracer
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("", (False, None)),
+        ("0", (False, None)),
+        ("no", (False, None)),
+        ("1", (True, None)),
+        ("TRUE", (True, None)),
+        (" out.json ", (True, "out.json")),
+    ],
+)
+def test_report_target(monkeypatch, value, expected):
+    monkeypatch.setenv("HABIT_TIMER_TEST_REPORT", value)
+    assert report_target("HABIT_TIMER_TEST_REPORT") == expected
+
+
+@pytest.mark.parametrize("cls, env", [(StartupProfiler, PROFILE_ENV), (SqlTracer, TRACE_ENV)])
+def test_from_env(monkeypatch, cls, env):
+    monkeypatch.setenv(env, "report.txt")
+    reporter = cls.from_env()
+    assert (reporter.enabled, reporter.output) == (True, "report.txt")
+    monkeypatch.delenv(env)
+    assert not cls.from_env().enabled
+
+
+def test_write_report(tmp_path, capsys):
+    write_report(None, lambda: "text", lambda: {"a": 1})
+    assert capsys.readouterr().err == "text\n"
+    write_report(str(tmp_path / "r.txt"), lambda: "text", lambda: {"a": 1})
+    assert (tmp_path / "r.txt").read_text(encoding="utf-8") == "text\n"
+    write_report(str(tmp_path / "r.json"), lambda: "text", lambda: {"a": 1})
+    assert json.loads((tmp_path / "r.json").read_text(encoding="utf-8")) == {"a": 1}
+
+
+def test_profiler_emits_once(tmp_path):
+    output = tmp_path / "profile.json"
+    profiler = StartupProfiler(enabled=True, output=str(output))
+    with profiler.phase("open"):
+        pass
+    profiler.emit()
+    assert [phase["phase"] for phase in json.loads(output.read_text(encoding="utf-8"))] == ["open"]
+    output.unlink()
+    profiler.emit()
+    assert not output.exists()
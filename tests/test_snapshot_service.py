@@ -0,0 +1,57 @@
+import os
+import time
+
+import pytest
+
+from habit_timer.service.snapshot_service import (
+    SNAPSHOT_ENV,
+    SnapshotScheduler,
+    SnapshotService,
+    snapshot_interval_from_env,
+)
+
+
+@pytest.fixture
+def snapshots(db, tmp_path):
+    return SnapshotService(db, tmp_path / "snapshots", keep=3)
+
+
+def test_prune_keeps_newest(snapshots):
+    created = [snapshots.create_snapshot() for _ in range(5)]
+    removed = snapshots.prune()
+    assert sorted(removed) == created[:2]
+    assert snapshots.list_snapshots() == created[:1:-1]
+    assert snapshots.prune(keep=1) == created[3:1:-1]
+    assert snapshots.list_snapshots() == [created[-1]]
+
+
+def test_scheduler_runs_at_once_without_snapshots(snapshots):
+    assert SnapshotScheduler(snapshots, interval_seconds=3600).first_delay() == 0
+
+
+def test_scheduler_waits_for_fresh_snapshot(snapshots):
+    snapshots.create_snapshot()
+    assert SnapshotScheduler(snapshots, interval_seconds=3600).first_delay() > 3500
+
+
+def test_scheduler_catches_up_on_stale_snapshot(snapshots):
+    path = snapshots.create_snapshot()
+    stale = time.time() - 7200
+    os.utime(path, (stale, stale))
+    scheduler = SnapshotScheduler(snapshots, interval_seconds=3600)
+    assert scheduler.first_delay() == 0
+    scheduler.start()
+    try:
+        deadline = time.monotonic() + 5
+        while len(snapshots.list_snapshots()) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        scheduler.stop(timeout=5)
+    assert len(snapshots.list_snapshots()) == 2
+    assert scheduler.last_error is None
+
+
+@pytest.mark.parametrize("value, expected", [("", None), ("0", None), ("abc", None), ("24", 86400), ("0.5", 1800)])
+def test_interval_from_env(monkeypatch, value, expected):
+    monkeypatch.setenv(SNAPSHOT_ENV, value)
+    assert snapshot_interval_from_env() == expected
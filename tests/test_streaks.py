@@ -0,0 +1,33 @@
+import pytest
+
+from conftest import random_history, table_rows
+
+
+def reference_streaks(records):
+    """逐条遍历历史记录的连续打卡：最后一条记录未完成时当前连续为 0。"""
+    current = longest = 0
+    previous = None
+    for record in records:
+        if not record.is_completed:
+            current = 0
+        elif previous is not None and (record.date - previous).days == 1:
+            current += 1
+        else:
+            current = 1
+        previous = record.date
+        longest = max(longest, current)
+    return current, longest
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_backdated_upserts_match_history(habit_repo, record_repo, seed):
+    for habit_id in random_history(habit_repo, record_repo, seed):
+        assert record_repo.get_streak(habit_id) == reference_streaks(record_repo.all_by_habit(habit_id))
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_backdated_upserts_match_rebuild(db, habit_repo, record_repo, seed):
+    random_history(habit_repo, record_repo, seed)
+    incremental = table_rows(db, "habit_streaks")
+    record_repo.rebuild_streaks()
+    assert table_rows(db, "habit_streaks") == incremental
@@ -0,0 +1,56 @@
+import datetime as dt
+from collections import Counter
+
+import pytest
+
+from habit_timer.repository.weekly_repository import week_start
+
+from conftest import create_habit, random_history, table_rows
+
+
+def weekly_rows(db):
+    """habit_weekly 中完成天数非零的行；增量维护会留下 0 天的行，与缺失的周等价。"""
+    return [row for row in table_rows(db, "habit_weekly") if row[2]]
+
+
+def reference_rows(habit_repo, record_repo, ids):
+    rows = []
+    for habit_id in ids:
+        target = habit_repo.get(habit_id).target_per_week
+        weeks = Counter(week_start(r.date) for r in record_repo.all_by_habit(habit_id) if r.is_completed)
+        rows += [(habit_id, week.isoformat(), days, int(days >= target)) for week, days in sorted(weeks.items())]
+    return rows
+
+
+def set_target(habit_repo, habit_id, target):
+    habit = habit_repo.get(habit_id)
+    habit.target_per_week = target
+    habit_repo.update(habit)
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_upserts_match_records_and_rebuild(db, habit_repo, record_repo, seed):
+    ids = random_history(habit_repo, record_repo, seed)
+    for habit_id, target in zip(ids, (1, 2, 3, 4, 5)):
+        set_target(habit_repo, habit_id, target)
+    record_repo.upsert(ids[0], dt.date(2024, 2, 5), False)
+    incremental = weekly_rows(db)
+    assert incremental == reference_rows(habit_repo, record_repo, ids)
+    record_repo.weekly.rebuild()
+    assert weekly_rows(db) == incremental
+
+
+def test_retarget_recomputes_met(db, habit_repo, record_repo):
+    habit_id = create_habit(habit_repo, "h")
+    monday = dt.date(2024, 3, 4)
+    for day in range(3):
+        record_repo.upsert(habit_id, monday + dt.timedelta(days=day), True)
+    record_repo.upsert(habit_id, monday + dt.timedelta(days=7), True)
+    assert weekly_rows(db) == [(habit_id, "2024-03-04", 3, 0), (habit_id, "2024-03-11", 1, 0)]
+    set_target(habit_repo, habit_id, 3)
+    assert weekly_rows(db) == [(habit_id, "2024-03-04", 3, 1), (habit_id, "2024-03-11", 1, 0)]
+    set_target(habit_repo, habit_id, 1)
+    assert weekly_rows(db) == [(habit_id, "2024-03-04", 3, 1), (habit_id, "2024-03-11", 1, 1)]
+    # 取消打卡后该周按新的完成天数与当前目标重算
+    record_repo.upsert(habit_id, monday + dt.timedelta(days=7), False)
+    assert weekly_rows(db) == [(habit_id, "2024-03-04", 3, 1)]